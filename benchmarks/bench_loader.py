@@ -0,0 +1,101 @@
+"""
+Throughput benchmark of loading definition files.
+
+Loads a generated definition file cell by cell, then a whole column at a time
+with validate_columns, and reports rows per second for every worker count. With
+more than one worker, workers validate chunks and the parent builds the events,
+so the scaling also shows the cost left in the parent. The best of --repeat runs
+is kept.
+
+Usage: python benchmarks/bench_loader.py [--rows N] [--repeat N] [--workers 1,2,4]
+       [--no-numpy]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cefevent import bulk
+from cefevent.loader import load_events
+
+COLUMNS = [
+    ("name", lambda idx: "Connection {}".format(idx % 20)),
+    ("severity", lambda idx: idx % 11),
+    ("src", lambda idx: "10.0.{}.{}".format(idx // 256 % 256, idx % 256)),
+    ("dst", lambda idx: "192.168.0.{}".format(idx % 256)),
+    ("spt", lambda idx: 1024 + idx % 60000),
+    ("dpt", lambda idx: 443),
+    ("suser", lambda idx: "user{}".format(idx % 1000)),
+    ("duser", lambda idx: "admin"),
+    ("act", lambda idx: "allow"),
+    ("app", lambda idx: "HTTPS"),
+    ("in", lambda idx: idx),
+    ("out", lambda idx: idx * 2),
+    ("cnt", lambda idx: idx % 100),
+    ("cn1", lambda idx: idx),
+    ("cfp1", lambda idx: idx / 10),
+    ("shost", lambda idx: "host{}.example.com".format(idx % 500)),
+    ("dhost", lambda idx: "example.com"),
+    ("fname", lambda idx: "file{}.txt".format(idx)),
+    ("cs1", lambda idx: "rule {}".format(idx % 30)),
+    ("msg", lambda idx: "Connection {} allowed by rule".format(idx)),
+]
+
+
+def write_file(rows: int):
+    fd, fn = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow([name for name, _ in COLUMNS])
+        for idx in range(rows):
+            writer.writerow([value(idx) for _, value in COLUMNS])
+    return fn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--no-numpy", action="store_true")
+    args = parser.parse_args()
+    workers = [int(count) for count in args.workers.split(",")]
+
+    if args.no_numpy:
+        bulk.np = None
+
+    fn = write_file(args.rows)
+    try:
+        for use_bulk in (False, True):
+            single = None
+            for count in workers:
+                best = None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    load_events([fn], workers=count, bulk=use_bulk)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                if single is None:
+                    single = best
+                print(
+                    "bulk={:<5} numpy={:<5} workers={:<3} {:>10.0f} rows/s "
+                    "({:.2f} us/row, x{:.2f})".format(
+                        str(use_bulk),
+                        str(bulk.np is not None),
+                        count,
+                        args.rows / best,
+                        best / args.rows * 1e6,
+                        single / best,
+                    )
+                )
+    finally:
+        os.remove(fn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Memory benchmark of event pools.
+
+Builds a pool of events from the same rows with CEFEvent and CompactCEFEvent
+and reports the traced bytes per event, values included.
+
+Usage: python benchmarks/bench_memory.py [--events N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cefevent import event
+
+HEADERS = [
+    "name",
+    "signatureId",
+    "severity",
+    "sourceAddress",
+    "destinationAddress",
+    "sourcePort",
+    "destinationPort",
+    "sourceUserName",
+    "deviceAction",
+    "requestUrl",
+    "message",
+    "bytesIn",
+]
+
+
+def row(idx: int):
+    return [
+        "Connection allowed",
+        "100",
+        "3",
+        "10.0.{}.{}".format(idx // 256 % 256, idx % 256),
+        "192.168.0.{}".format(idx % 256),
+        str(1024 + idx % 60000),
+        "443",
+        "user{}".format(idx % 1000),
+        "allow",
+        "https://example.com/{}".format(idx),
+        "Connection {} allowed".format(idx),
+        str(idx),
+    ]
+
+
+def measure(cls, count: int):
+    rows = [row(idx) for idx in range(count)]
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    pool = []
+    for fields in rows:
+        ev = cls()
+        ev.load(HEADERS, fields)
+        pool.append(ev)
+
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    assert len(pool) == count
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    for name in ("CEFEvent", "CompactCEFEvent"):
+        cls = getattr(event, name, None)
+        if cls is None:
+            continue
+        print("{:<16} {:>8.0f} bytes/event".format(name, measure(cls, args.events)))
+
+
+if __name__ == "__main__":
+    main()
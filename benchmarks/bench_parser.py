@@ -0,0 +1,74 @@
+"""
+Throughput benchmark of the CEF parser.
+
+Parses lines produced by build_cef and reports the best lines per second of a few
+runs on one core. Lines without escapes are split and validated in a single pass.
+
+Usage: python benchmarks/bench_parser.py [--lines N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cefevent.event import CEFEvent, CompactCEFEvent
+from cefevent.parser import parse_cef
+
+
+def build_lines(count: int):
+    lines = []
+    for idx in range(count):
+        ev = CEFEvent()
+        ev.set_prefix("deviceVendor", "Hyades Inc.")
+        ev.set_prefix("name", "Connection allowed")
+        ev.set_prefix("signatureId", str(idx % 50))
+        ev.set_field("sourceAddress", "10.0.{}.{}".format(idx // 256 % 256, idx % 256))
+        ev.set_field("destinationAddress", "192.168.0.1")
+        ev.set_field("sourcePort", 1024 + idx % 60000)
+        ev.set_field("destinationPort", 443)
+        ev.set_field("sourceUserName", "user{}".format(idx % 1000))
+        ev.set_field("deviceAction", "allow")
+        ev.set_field("requestUrl", "https://example.com/?a={}".format(idx))
+        ev.set_field("message", "Connection {} allowed by rule".format(idx))
+        ev.set_field("bytesIn", idx)
+        lines.append(ev.build_cef())
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = build_lines(args.lines)
+
+    for cls, validate in (
+        (CEFEvent, True),
+        (CEFEvent, False),
+        (CompactCEFEvent, True),
+        (CompactCEFEvent, False),
+    ):
+        # The best of the runs, the others measure whatever else the machine did
+        elapsed = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for line in lines:
+                parse_cef(line, cls=cls, validate=validate)
+            run = time.perf_counter() - start
+            elapsed = run if elapsed is None else min(elapsed, run)
+        print(
+            "{:<16} validate={:<5} {:>10.0f} lines/s ({:.2f} us/line)".format(
+                cls.__name__,
+                str(validate),
+                len(lines) / elapsed,
+                elapsed / len(lines) * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Micro-benchmark of per-field validation cost.
+
+Compares the compiled validators used by CEFEvent.set_field against the
+previous implementation, which interpreted the data_type strings on every call.
+
+Usage: python benchmarks/bench_validators.py [--number N]
+"""
+
+import argparse
+import os
+import re
+import socket
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cefevent.event import CEFEvent
+from cefevent.schema import schema
+
+SAMPLES = [
+    ("sourcePort", "12345"),
+    ("deviceCustomNumber1", "123456789"),
+    ("bytesIn", "4096"),
+    ("sourceAddress", "192.168.67.1"),
+    ("deviceCustomIPv6Address1", "2001:0db8:85a3::1"),
+    ("sourceMacAddress", "AA:bb:CC:dd:EE:ff"),
+    ("deviceCustomFloatingPoint1", "3.1415"),
+    ("message", "This is a test event (Answer=42)"),
+    ("startTime", "1626838050000"),
+]
+
+
+def legacy_validate(obj, value):
+    """
+    The data_type interpreter CEFEvent used before validators were compiled.
+
+    The Integer bound check is guarded, as it used to raise TypeError for str values.
+    """
+    if obj["full_name"].endswith("Port"):
+        try:
+            value = int(value)
+        except:
+            return False
+        if not 0 <= value <= 65535:
+            return False
+        return value
+
+    for dt in obj["data_type"]:
+        if dt in ["Integer", "Long"]:
+            try:
+                if dt == "Integer" and value > 2**31 - 1:
+                    continue
+            except TypeError:
+                pass
+            try:
+                return int(value)
+            except:
+                continue
+        elif dt == "IPv4 Address":
+            if not value.count(".") == 3:
+                continue
+            try:
+                socket.inet_pton(socket.AF_INET, value)
+            except socket.error:
+                continue
+            return value
+        elif dt == "IPv6 Address":
+            if not value.count(":") >= 2:
+                continue
+            try:
+                socket.inet_pton(socket.AF_INET6, value)
+            except:
+                continue
+            return value
+        elif dt == "MAC Address":
+            valid_mac = bool(
+                re.match(
+                    "^" + "[\\:\\-]".join(["([0-9a-f]{2})"] * 6) + "$",
+                    value.strip().lower(),
+                )
+            )
+            if valid_mac:
+                return value.strip().lower()
+            else:
+                continue
+        elif dt == "String":
+            value = str(value).strip()
+            if len(value) > obj["length"] > 0:
+                continue
+            else:
+                value = value.replace("\\", "\\\\")
+                value = value.replace("=", "\\=")
+                value = value.replace("\n", "\\n")
+                return value
+        elif dt == "Floating Point":
+            try:
+                return float(value)
+            except:
+                continue
+        else:
+            return value
+
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    print("{:<28} {:>12} {:>12} {:>8}".format("field", "before ns", "after ns", "speedup"))
+    for field, value in SAMPLES:
+        obj = schema.get(field)
+        metadata = dict(obj.metadata)
+        assert legacy_validate(metadata, value) == obj.validator(value), field
+
+        before = timeit.timeit(
+            lambda: legacy_validate(metadata, value), number=args.number
+        )
+        after = timeit.timeit(lambda: obj.validator(value), number=args.number)
+        print(
+            "{:<28} {:>12.1f} {:>12.1f} {:>7.1f}x".format(
+                field,
+                before / args.number * 1e9,
+                after / args.number * 1e9,
+                before / after,
+            )
+        )
+
+    ev = CEFEvent()
+    total = timeit.timeit(
+        lambda: [ev.set_field(field, value) for field, value in SAMPLES],
+        number=args.number // 10,
+    )
+    print(
+        "set_field: {:.1f} ns per field".format(
+            total / (args.number // 10) / len(SAMPLES) * 1e9
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,2 @@
-from .event import CEFEvent
+from .event import CEFEvent, CompactCEFEvent
 from .sender import CEFSender
@@ -0,0 +1,224 @@
+"""
+asyncio syslog transport and CEF sender.
+
+AsyncSyslog and AsyncCEFSender mirror Syslog and CEFSender, for applications
+that can not block their event loop on socket writes. Writes wait for the
+transport to drain when its buffer is above the high-water mark.
+"""
+
+import asyncio
+import random
+import time
+from typing import AnyStr, List
+
+from cefevent.event import CEFEvent
+from cefevent.loader import LoadStats, load_events
+from cefevent.pacer import TokenBucket
+from cefevent.sender import CEFSender
+from cefevent.syslog import Facility, Framing, Level, format_message, frame_message
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.can_write = asyncio.Event()
+        self.can_write.set()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pause_writing(self):
+        self.can_write.clear()
+
+    def resume_writing(self):
+        self.can_write.set()
+
+    def error_received(self, exc):
+        # Nobody listening on the other side, like the blocking UDP sender we ignore it
+        pass
+
+
+class AsyncSyslog:
+    """An asyncio syslog client that logs to a remote server.
+
+    Example:
+    >>> log = AsyncSyslog(host="foobar.example")
+    >>> await log.connect()
+    >>> await log.send("hello", Level.WARNING)
+    """
+
+    def __init__(
+        self,
+        host="localhost",
+        port=514,
+        facility=Facility.DAEMON,
+        protocol="UDP",
+        framing=Framing.NONE,
+        high_water=64 * 1024,
+    ):
+        """
+        Arguments:
+        - framing: How TCP messages are delimited, see Syslog.
+        - high_water: The transport buffer size above which send waits for it to drain.
+        """
+        if protocol not in ("UDP", "TCP"):
+            raise Exception(
+                "Invalid protocol {}, valid options are UDP and TCP".format(protocol)
+            )
+        self.host = host
+        self.port = port
+        self.facility = facility
+        self.protocol = protocol
+        self.framing = framing
+        self.high_water = high_water
+        self._transport = None
+        self._protocol = None
+        self._writer = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        if self.protocol == "UDP":
+            self._transport, self._protocol = await loop.create_datagram_endpoint(
+                _DatagramProtocol, remote_addr=(self.host, self.port)
+            )
+            self._transport.set_write_buffer_limits(high=self.high_water)
+        else:
+            _, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.transport.set_write_buffer_limits(high=self.high_water)
+
+    async def send(self, message, level=Level.NOTICE):
+        """Send a syslog message, waiting if the transport needs to drain"""
+        if self._transport is None and self._writer is None:
+            await self.connect()
+
+        data = format_message(message, level, self.facility)
+        if self.protocol == "UDP":
+            if not self._protocol.can_write.is_set():
+                await self._protocol.can_write.wait()
+            self._transport.sendto(data)
+        else:
+            self._writer.write(frame_message(data, self.framing))
+            await self._writer.drain()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    async def warn(self, message):
+        """Send a syslog warning message."""
+        await self.send(message, Level.WARNING)
+
+    async def notice(self, message):
+        """Send a syslog notice message."""
+        await self.send(message, Level.NOTICE)
+
+    async def error(self, message):
+        """Send a syslog error message."""
+        await self.send(message, Level.ERR)
+
+
+class AsyncCEFSender(object):
+    # The shortest sleep of the rate loop, every wakeup sends the messages due
+    tick = 0.01
+
+    log = staticmethod(CEFSender.log)
+
+    def __init__(
+        self,
+        files: List[AnyStr],
+        host: AnyStr,
+        port: int,
+        protocol: AnyStr = "UDP",
+        workers: int = 1,
+        syslog_options: dict = None,
+    ):
+        """
+        Create a new AsyncCEFSender.
+
+        The definition files are loaded when the sender is created, like CEFSender.
+
+        Arguments:
+        - files (`list`): The definition files to load events from.
+        - host (`str`): Syslog destination host.
+        - port (`int`): Syslog destination port.
+        - protocol (`str`): UDP or TCP.
+        - workers (`int`): How many processes to use when loading the poll.
+        - syslog_options (`dict`): Extra keyword arguments for AsyncSyslog, like framing.
+
+        """
+
+        self.files = files
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.syslog = AsyncSyslog(
+            host, port=port, protocol=protocol, **(syslog_options or {})
+        )
+
+        self.max_eps = 100
+        self.sent_count = 0
+        self.checkpoint_sent_count = 0
+
+        self.load_stats = LoadStats()
+        self.cef_poll = load_events(files, workers=workers, stats=self.load_stats)
+
+    async def send_log(self, cef: CEFEvent):
+        await self.syslog.send(cef.to_bytes())
+        self.sent_count += 1
+        self.checkpoint_sent_count += 1
+
+    async def send_logs(self):
+        for ev in self.cef_poll:
+            await self.send_log(ev)
+        self.log("{} events sent".format(self.sent_count))
+
+    async def auto_send_log(self, eps: float, report_interval: float = 10):
+        """
+        Send random events from the poll at `eps` events per second, until cancelled.
+
+        Arguments:
+        - eps (`float`): The target events per second.
+        - report_interval (`float`): How often to log the achieved EPS, in seconds.
+
+        """
+
+        self.max_eps = eps
+        self.log(
+            "There are {} events in the poll. The max EPS is set to {}".format(
+                len(self.cef_poll), self.max_eps
+            )
+        )
+
+        bucket = TokenBucket(eps, tick=self.tick)
+        checkpoint = time.monotonic()
+        while True:
+            # Backpressure in send slows the loop down, and the bucket makes up for it
+            for _ in range(bucket.take()):
+                await self.send_log(random.choice(self.cef_poll))
+
+            now = time.monotonic()
+            if now - checkpoint >= report_interval:
+                self.log(
+                    "Current EPS: {}".format(
+                        self.checkpoint_sent_count / (now - checkpoint)
+                    )
+                )
+                checkpoint = now
+                self.checkpoint_sent_count = 0
+
+            await asyncio.sleep(max(bucket.delay(), self.tick))
+
+    async def close(self):
+        await self.syslog.close()
@@ -0,0 +1,188 @@
+import itertools
+import os
+import zlib
+from typing import Any, AnyStr, List, Tuple, Union
+
+from cefevent.syslog import Level, Syslog
+
+
+class Balance:
+    """Strategies to pick a destination for every message"""
+
+    ROUND_ROBIN = "round_robin"
+    HASH = "hash"
+    LEAST_BYTES = "least_bytes"
+
+
+def parse_destination(
+    destination: Union[AnyStr, Tuple[AnyStr, int]], default_port: int = 514
+):
+    """
+    Parse a "host", "host:port" or "[ipv6]:port" string, or a (host, port) tuple.
+
+    Arguments:
+    - destination (`str` or `tuple`): The destination to parse.
+    - default_port (`int`): The port to use when the destination has none.
+
+    """
+
+    if not isinstance(destination, str):
+        host, port = destination
+        return host, int(port)
+
+    if destination.startswith("["):
+        host, _, port = destination[1:].partition("]")
+        port = port.lstrip(":")
+    elif destination.count(":") == 1:
+        host, _, port = destination.partition(":")
+    else:
+        host, port = destination, ""
+    return host, int(port) if port else default_port
+
+
+def spill_dirname(host: AnyStr, port: int):
+    """The spill directory of a destination of MultiSyslog, under spill_dir"""
+    return "{}_{}".format(host.replace(":", "-"), port)
+
+
+class DestinationStats(object):
+    """Throughput counters of a single destination"""
+
+    def __init__(self, host: AnyStr, port: int):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {
+            "destination": "{}:{}".format(self.host, self.port),
+            "messages": self.messages,
+            "bytes": self.bytes,
+        }
+
+
+class MultiSyslog:
+    """Spread syslog messages across several destinations.
+
+    Every destination has its own Syslog client and connection. Messages are
+    assigned round-robin, by hash of a key (so related events always reach the
+    same collector), or to the destination with the least outstanding bytes.
+
+    Example:
+    >>> log = MultiSyslog(["collector1:514", "collector2:514"], protocol="TCP")
+    >>> log.send("hello", Level.WARNING)
+    """
+
+    def __init__(
+        self,
+        destinations: List[Union[AnyStr, Tuple[AnyStr, int]]],
+        port: int = 514,
+        balance: AnyStr = Balance.ROUND_ROBIN,
+        syslog_class: type = Syslog,
+        **syslog_options: Any
+    ):
+        """
+        Arguments:
+        - destinations: "host:port" strings or (host, port) tuples, see parse_destination.
+        - port: The port of destinations that do not have one.
+        - balance: One of the Balance strategies.
+        - syslog_class: The client of every destination, Syslog or ReliableSyslog.
+        - syslog_options: Extra keyword arguments for every Syslog, like protocol. A
+          spill_dir of ReliableSyslog clients gets a host_port subdirectory for every
+          destination.
+        """
+        if balance not in (Balance.ROUND_ROBIN, Balance.HASH, Balance.LEAST_BYTES):
+            raise ValueError("Invalid balance strategy {}".format(balance))
+        if not destinations:
+            raise ValueError("At least one destination is required")
+
+        self.balance = balance
+        self.destinations = [parse_destination(d, port) for d in destinations]
+        spill_dir = syslog_options.pop("spill_dir", None)
+        self.clients = []
+        for host, port in self.destinations:
+            if spill_dir is not None:
+                # Every destination spills to its own directory, a shared SpillLog
+                # would replay the events of the others
+                syslog_options["spill_dir"] = os.path.join(
+                    spill_dir, spill_dirname(host, port)
+                )
+            self.clients.append(syslog_class(host, port=port, **syslog_options))
+        self.counters = [
+            DestinationStats(host, port) for host, port in self.destinations
+        ]
+        self.protocol = self.clients[0].protocol
+        self._next = itertools.cycle(range(len(self.clients)))
+
+    def _pick(self, key: Any = None):
+        if self.balance == Balance.HASH and key is not None:
+            if not isinstance(key, bytes):
+                key = str(key).encode("utf-8")
+            return zlib.crc32(key) % len(self.clients)
+
+        if self.balance == Balance.LEAST_BYTES:
+            # Start from the next client in turn, so ties are spread round-robin
+            start = next(self._next)
+            count = len(self.clients)
+            return min(
+                ((start + i) % count for i in range(count)),
+                key=lambda idx: self.clients[idx].outstanding_bytes(),
+            )
+
+        return next(self._next)
+
+    def send(self, message, level=Level.NOTICE, key=None):
+        """Send a syslog message to one of the destinations
+
+        The key is only used by the hash strategy, messages without a key are
+        sent round-robin.
+        """
+        idx = self._pick(key)
+        self.clients[idx].send(message, level)
+        self._count(idx, message)
+
+    def send_bytes(self, payload, level=Level.NOTICE, key=None):
+        """Send an already encoded message to one of the destinations, see send"""
+        idx = self._pick(key)
+        self.clients[idx].send_bytes(payload, level)
+        self._count(idx, payload)
+
+    def _count(self, idx, message):
+        counters = self.counters[idx]
+        counters.messages += 1
+        counters.bytes += len(message)
+
+    def stats(self):
+        """Return the throughput counters of every destination"""
+        return [counters.as_dict() for counters in self.counters]
+
+    def flush(self):
+        for client in self.clients:
+            if not client.datagram:
+                client.flush()
+
+    def flush_if_due(self):
+        for client in self.clients:
+            if not client.datagram:
+                client.flush_if_due()
+
+    def detach(self):
+        for client in self.clients:
+            client.detach()
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+
+    def warn(self, message):
+        """Send a syslog warning message."""
+        self.send(message, Level.WARNING)
+
+    def notice(self, message):
+        """Send a syslog notice message."""
+        self.send(message, Level.NOTICE)
+
+    def error(self, message):
+        """Send a syslog error message."""
+        self.send(message, Level.ERR)
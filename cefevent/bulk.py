@@ -0,0 +1,233 @@
+from typing import Any, AnyStr, List
+
+from cefevent.event import (
+    CEFEvent,
+    CompactCEFEvent,
+    DEFAULT_PREFIXES,
+    _validate_prefix_value,
+)
+from cefevent.schema import INT32_MAX, INT32_MIN, INT64_MAX, INT64_MIN, schema
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+
+class ColumnReport(object):
+    """
+    The result of validating definition rows column by column.
+
+    - columns (`dict`): The validated values of every known column, False where invalid.
+    - errors (`dict`): For every column with invalid cells, a list of (row index, value).
+    - unknown (`list`): The headers that are neither CEF prefixes nor extensions.
+    """
+
+    def __init__(self, headers: List[AnyStr], rows: int):
+        self.headers = headers
+        self.rows = rows
+        self.columns = {}
+        self.errors = {}
+        self.unknown = []
+
+    def __repr__(self):
+        return "ColumnReport(rows={}, errors={}, unknown={})".format(
+            self.rows,
+            {header: len(errors) for header, errors in self.errors.items()},
+            self.unknown,
+        )
+
+    @property
+    def valid(self):
+        return not self.errors and not self.unknown
+
+
+def _numeric_bounds(obj: Any):
+    if obj.full_name.endswith("Port"):
+        return int, 0, 65535
+    if obj.data_type == ("Integer",):
+        return int, INT32_MIN, INT32_MAX
+    if obj.data_type in (("Long",), ("Integer", "Long")):
+        return int, INT64_MIN, INT64_MAX
+    if obj.data_type == ("Floating Point",):
+        return float, None, None
+    return None, None, None
+
+
+def _validate_numeric_column(values: List[Any], kind: type, low: int, high: int):
+    """Vectorized conversion and range check, None if numpy can not handle the column"""
+    try:
+        arr = np.asarray(values).astype(np.int64 if kind is int else np.float64)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+    validated = arr.tolist()
+    if low is not None:
+        for idx in np.flatnonzero((arr < low) | (arr > high)).tolist():
+            validated[idx] = False
+    return validated
+
+
+def _validate_string_column(values: List[Any], length: int):
+    """Column-wide check, None if any value needs the per-cell validator"""
+    if not all(value.__class__ is str for value in values):
+        return None
+    joined = "\x00".join(values)
+    if "\\" in joined or "=" in joined or "\n" in joined:
+        return None
+    if length > 0 and max(map(len, values)) > length:
+        return None
+    # Any whitespace strip() would remove, like tabs, not only spaces
+    if any(value != value.strip() for value in values):
+        return None
+    return list(values)
+
+
+def _validate_prefix_column(prefix: AnyStr, values: List[Any]):
+    validated = []
+    for value in values:
+        try:
+            validated.append(_validate_prefix_value(prefix, value))
+        except (TypeError, ValueError, AttributeError):
+            validated.append(False)
+    return validated
+
+
+def validate_columns(
+    headers: List[AnyStr], rows: List[List[Any]], use_numpy: bool = None
+) -> ColumnReport:
+    """
+    Validate definition rows one column at a time.
+
+    The type dispatch runs once per column instead of once per cell. Integer, port
+    and float columns are converted and range checked with NumPy when it is
+    installed, other columns go through the precompiled schema validators.
+
+    Arguments:
+    - headers (`list`): The CEF field names of the columns.
+    - rows (`list`): The rows, each with one value per header.
+    - use_numpy (`bool`): Force or disable NumPy, defaults to using it when installed.
+
+    """
+
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ValueError("NumPy is not installed")
+
+    report = ColumnReport(headers, len(rows))
+
+    columns = list(zip(*rows)) if rows else [()] * len(headers)
+
+    for header, values in zip(headers, columns):
+
+        if header in DEFAULT_PREFIXES:
+            validated = _validate_prefix_column(header, values)
+        else:
+            obj = schema.get(header)
+            if obj is None:
+                report.unknown.append(header)
+                continue
+
+            validated = None
+            kind, low, high = _numeric_bounds(obj)
+            if use_numpy and kind is not None and values:
+                validated = _validate_numeric_column(values, kind, low, high)
+            elif obj.data_type == ("String",) and values:
+                validated = _validate_string_column(values, obj.length)
+            if validated is None:
+                validated = list(map(obj.validator, values))
+            header = obj.full_name
+
+        errors = [
+            (row, values[row]) for row, v in enumerate(validated) if v is False
+        ]
+        if errors:
+            report.errors[header] = errors
+        report.columns[header] = validated
+
+    return report
+
+
+def events_from_report(
+    report: ColumnReport, strict: bool = False, cls: type = CEFEvent
+) -> list:
+    """
+    Build events from validated columns, without validating every cell again.
+
+    Invalid cells are left out of their event, like set_field does.
+
+    Arguments:
+    - report (`ColumnReport`): The result of validate_columns.
+    - strict (`bool`): Set to True to throw ValueError if the report has any error.
+    - cls (`type`): The event class to create, CEFEvent or CompactCEFEvent.
+
+    """
+
+    if strict and not report.valid:
+        raise ValueError("Invalid definition rows: {}".format(report))
+
+    if not issubclass(cls, (CEFEvent, CompactCEFEvent)):
+        raise TypeError("Unsupported event class: {}".format(cls))
+
+    prefixes = [(k, v) for k, v in report.columns.items() if k in DEFAULT_PREFIXES]
+    extensions = [
+        (k, v) for k, v in report.columns.items() if k not in DEFAULT_PREFIXES
+    ]
+
+    prefix_keys = [k for k, _ in prefixes]
+    prefix_rows = zip(*[v for _, v in prefixes]) if prefixes else None
+    extension_keys = [k for k, _ in extensions]
+    extension_rows = zip(*[v for _, v in extensions]) if extensions else None
+    # Without errors no value is False, and rows are zipped with their keys as is
+    valid = not report.errors
+
+    compact = issubclass(cls, CompactCEFEvent)
+    if compact:
+        prefix_index = [cls._prefix_index[prefix] for prefix in prefix_keys]
+        ordinals = {k: schema.by_full_name[k].ordinal for k in extension_keys}
+        all_ordinals = bytes(ordinals[k] for k in extension_keys)
+
+    # The values were validated with their columns, so the slots are filled directly,
+    # subclasses still go through their __init__
+    new_event = object.__new__ if cls in (CEFEvent, CompactCEFEvent) else None
+    events = []
+    for _ in range(report.rows):
+        ev = new_event(cls) if new_event is not None else cls(strict=strict)
+        row_prefixes = next(prefix_rows) if prefix_rows is not None else ()
+        row_extensions = next(extension_rows) if extension_rows is not None else ()
+        if not compact:
+            ev.prefixes = dict(DEFAULT_PREFIXES)
+            if valid:
+                ev.prefixes.update(zip(prefix_keys, row_prefixes))
+                ev.extensions = dict(zip(extension_keys, row_extensions))
+            else:
+                for prefix, value in zip(prefix_keys, row_prefixes):
+                    if value is not False:
+                        ev.prefixes[prefix] = value
+                ev.extensions = {
+                    field: value
+                    for field, value in zip(extension_keys, row_extensions)
+                    if value is not False
+                }
+        else:
+            ev_prefixes = list(cls._default_prefixes)
+            for idx, value in zip(prefix_index, row_prefixes):
+                if value is not False:
+                    ev_prefixes[idx] = value
+            ev._prefixes = ev._intern_prefixes(tuple(ev_prefixes))
+            if valid:
+                ev._ordinals = bytearray(all_ordinals)
+                ev._values = list(row_extensions)
+            else:
+                ev._ordinals = bytearray()
+                ev._values = []
+                for field, value in zip(extension_keys, row_extensions):
+                    if value is not False:
+                        ev._ordinals.append(ordinals[field])
+                        ev._values.append(value)
+        ev.strict = strict
+        ev._cef_bytes = None
+        events.append(ev)
+
+    return events
@@ -0,0 +1,69 @@
+import functools
+from typing import Any, Tuple
+
+
+def _render_header(prefixes: Tuple[Any, ...]) -> Tuple[str, bytes]:
+    header = "CEF:{}|{}|{}|{}|{}|{}|{}|".format(*prefixes)
+    return header, header.encode("utf-8")
+
+
+class HeaderCache(object):
+    """
+    LRU-bounded cache of rendered CEF headers.
+
+    Pools usually share a handful of vendor/product/signature combinations, so
+    the "CEF:...|severity|" header is rendered once per distinct prefix tuple and
+    reused by CEFEvent.build_cef and CEFEncoder. The global cache is shared by
+    every thread, so the LRU bookkeeping is left to functools.lru_cache, which
+    keeps it consistent without a lock on the hit path.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Create a new HeaderCache.
+
+        Arguments:
+        - maxsize (`int`): How many distinct headers to keep, least recently used ones are evicted first.
+
+        """
+
+        self.maxsize = maxsize
+        self._get = functools.lru_cache(maxsize=maxsize)(_render_header)
+
+    def __len__(self):
+        return self._get.cache_info().currsize
+
+    @property
+    def hits(self):
+        return self._get.cache_info().hits
+
+    @property
+    def misses(self):
+        return self._get.cache_info().misses
+
+    def get(self, prefixes: Tuple[Any, ...]) -> Tuple[str, bytes]:
+        """
+        Return the rendered header as a (str, utf-8 bytes) pair.
+
+        Arguments:
+        - prefixes (`tuple`): The escaped prefix values, in header order.
+
+        """
+
+        return self._get(prefixes)
+
+    def stats(self):
+        """Return the hit/miss counters and the current size as a dict."""
+        info = self._get.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        self._get.cache_clear()
+
+
+header_cache = HeaderCache()
@@ -0,0 +1,414 @@
+"""
+Resilient delivery over stream syslog transports.
+
+ReliableSyslog reconnects with exponential backoff when the collector goes
+away. Messages sent while it is disconnected wait in a bounded in-memory queue,
+then in an append-only log of segment files on disk, and are written again in
+order once the connection is back.
+
+Delivery is at-least-once: the messages of a write that failed half-way are all
+written again after the reconnect.
+"""
+
+import collections
+import errno
+import os
+import socket
+import ssl
+import struct
+import time
+from typing import AnyStr, Iterable, Optional
+
+from cefevent.syslog import DATAGRAM_PROTOCOLS, Syslog
+
+_record_header = struct.Struct(">I")
+
+# Non-blocking recv flags used to notice a collector that closed the connection
+if hasattr(socket, "MSG_DONTWAIT"):
+    _PEEK_FLAGS = socket.MSG_PEEK | socket.MSG_DONTWAIT
+else:  # not available on Windows
+    _PEEK_FLAGS = None
+
+
+class DeliveryStats(object):
+    """Counters of the messages that could not be written straight away"""
+
+    def __init__(self):
+        # Messages put in the in-memory queue, again when writing them failed
+        self.queued = 0
+        # Messages written to the on-disk spill log
+        self.spilled = 0
+        # Queued or spilled messages written again after a reconnect
+        self.replayed = 0
+        # Messages lost because the queue was full and there is no spill log
+        self.dropped = 0
+        self.reconnects = 0
+
+    def __repr__(self):
+        return (
+            "DeliveryStats(queued={}, spilled={}, replayed={}, dropped={}, "
+            "reconnects={})".format(
+                self.queued, self.spilled, self.replayed, self.dropped, self.reconnects
+            )
+        )
+
+    def as_dict(self):
+        return {
+            "queued": self.queued,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+class SpillLog(object):
+    """
+    An append-only log of messages on disk, split in numbered segment files.
+
+    Every record is the message length, as a 4 bytes big-endian integer, followed
+    by the message. Read segments are deleted, and segments left in the directory
+    by a previous run are read first.
+    """
+
+    def __init__(self, directory: AnyStr, segment_size: int = 16 * 1024 * 1024):
+        """
+        Arguments:
+        - directory (`str`): Where to write the segment files, created if missing.
+        - segment_size (`int`): Start a new segment when the current one is this big.
+
+        """
+
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments = sorted(
+            int(name[8:-4])
+            for name in os.listdir(directory)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+        self._writer = None
+        self._writer_segment = None
+        self._reader = None
+        self._read_offset = 0
+
+    def __repr__(self):
+        return "SpillLog({!r}, segments={})".format(
+            self.directory, len(self._segments)
+        )
+
+    @property
+    def empty(self):
+        return not self._segments
+
+    def _path(self, segment: int):
+        return os.path.join(self.directory, "segment-{}.log".format(segment))
+
+    def _write_segment(self, segment: int, records: Iterable[bytes]):
+        with open(self._path(segment), "ab") as f:
+            for data in records:
+                f.write(_record_header.pack(len(data)))
+                f.write(data)
+
+    def append(self, data: bytes):
+        """Append a message at the end of the log"""
+        if self._writer is None or self._writer.tell() >= self.segment_size:
+            self._close_writer()
+            self._writer_segment = self._segments[-1] + 1 if self._segments else 1
+            self._segments.append(self._writer_segment)
+            # Unbuffered, so a forked process dropping its copy writes nothing
+            self._writer = open(self._path(self._writer_segment), "ab", buffering=0)
+
+        self._writer.write(_record_header.pack(len(data)) + data)
+
+    def prepend(self, records: Iterable[bytes]):
+        """Write messages in a new segment, read before every other one"""
+        records = list(records)
+        if not records:
+            return
+        if self._reader is not None:
+            # Drop the records already read from the first segment
+            self._reader.close()
+            self._reader = None
+            self._rewrite_head()
+        segment = self._segments[0] - 1 if self._segments else 1
+        self._write_segment(segment, records)
+        self._segments.insert(0, segment)
+
+    def _rewrite_head(self):
+        """Replace the first segment by its unread records"""
+        path = self._path(self._segments[0])
+        with open(path, "rb") as f:
+            f.seek(self._read_offset)
+            rest = f.read()
+        with open(path, "wb") as f:
+            f.write(rest)
+
+    def pop(self) -> Optional[bytes]:
+        """Remove and return the oldest message, or None if the log is empty"""
+        while self._segments:
+            segment = self._segments[0]
+            if self._reader is None:
+                if segment == self._writer_segment:
+                    self._close_writer()
+                self._reader = open(self._path(segment), "rb")
+                self._read_offset = 0
+
+            header = self._reader.read(_record_header.size)
+            if len(header) == _record_header.size:
+                (size,) = _record_header.unpack(header)
+                data = self._reader.read(size)
+                if len(data) == size:
+                    self._read_offset = self._reader.tell()
+                    return data
+
+            # End of the segment, a truncated last record is left out
+            self._reader.close()
+            self._reader = None
+            os.remove(self._path(segment))
+            self._segments.pop(0)
+
+        return None
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._writer_segment = None
+
+    def close(self):
+        """Close the segment files, keeping the unread records for the next run"""
+        self._close_writer()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+            self._rewrite_head()
+
+
+class ReliableSyslog(Syslog):
+    """A stream syslog client that survives collector restarts.
+
+    A failed write closes the connection, and sends are queued until the next
+    reconnect attempt, made on send or flush once the backoff delay is over.
+    The delay doubles after every failed attempt, up to max_backoff.
+
+    When the in-memory queue holds queue_size messages, the next ones are
+    appended to a SpillLog in spill_dir, or dropped without spill_dir. After a
+    reconnect, the queue then the spill log are written again in order, before
+    any new message.
+
+    A collector that closed the connection only fails the writes after the
+    next one, so flush first checks whether the connection was closed, at most
+    once every health_interval seconds. Messages flushed in between can be lost.
+
+    Example:
+    >>> log = ReliableSyslog(host="foobar.example", spill_dir="/var/tmp/cefevent")
+    >>> log.send("hello", Level.WARNING)
+    >>> log.stats.as_dict()
+    """
+
+    def __init__(
+        self,
+        host="localhost",
+        port=514,
+        protocol="TCP",
+        queue_size=10000,
+        spill_dir=None,
+        segment_size=16 * 1024 * 1024,
+        backoff=0.5,
+        max_backoff=30.0,
+        health_interval=1.0,
+        **syslog_options
+    ):
+        """
+        Arguments:
+        - queue_size: How many messages to keep in memory while disconnected.
+        - spill_dir: Where to spill messages once the queue is full, see SpillLog.
+        - segment_size: The size of the spill log segment files.
+        - backoff: Seconds to wait before the first reconnect attempt.
+        - max_backoff: The longest wait between two reconnect attempts.
+        - health_interval: Seconds between two checks that the collector did not
+          close the connection, 0 checks on every flush.
+        - syslog_options: The other Syslog arguments, like framing or ssl_context.
+        """
+        if protocol in DATAGRAM_PROTOCOLS:
+            raise ValueError(
+                "ReliableSyslog needs a stream protocol, not {}".format(protocol)
+            )
+
+        self.stats = DeliveryStats()
+        self.queue_size = queue_size
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue = collections.deque()
+        self._spill = SpillLog(spill_dir, segment_size) if spill_dir else None
+        # Messages written to the buffer since the last flush, queued again if it fails
+        self._pending = []
+        self._delay = backoff
+        self._reconnect_at = 0.0
+        self.health_interval = health_interval
+        self._check_at = 0.0
+
+        try:
+            super().__init__(host, port, protocol=protocol, **syslog_options)
+        except OSError:
+            self._disconnect()
+        else:
+            self._replay()
+
+    @property
+    def connected(self):
+        return self.socket is not None
+
+    def _send(self, data):
+        # Queue the message while the collector is unreachable
+        if self.socket is None and time.monotonic() >= self._reconnect_at:
+            self._reconnect()
+        if self.socket is None:
+            self._enqueue(data)
+        else:
+            self._write(data)
+
+    def _enqueue(self, data: bytes):
+        if self._spill is not None and (
+            not self._spill.empty or len(self._queue) >= self.queue_size
+        ):
+            self._spill.append(data)
+            self.stats.spilled += 1
+        elif len(self._queue) < self.queue_size:
+            self._queue.append(data)
+            self.stats.queued += 1
+        else:
+            self.stats.dropped += 1
+            self.metrics.dropped += 1
+
+    def _write(self, data):
+        self._pending.append(data)
+        super()._write(data)
+
+    def _peer_closed(self):
+        # Collectors never write to us, anything readable is the end of the stream
+        if isinstance(self.socket, ssl.SSLSocket):
+            # No MSG_PEEK through TLS, but reading only consumes session tickets
+            self.socket.setblocking(False)
+            try:
+                return self.socket.recv(1) == b""
+            except ssl.SSLWantReadError:
+                return False
+            except OSError:
+                return True
+            finally:
+                self.socket.setblocking(True)
+        if _PEEK_FLAGS is None:
+            return False
+        try:
+            return self.socket.recv(1, _PEEK_FLAGS) == b""
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+    def flush(self):
+        """Write every buffered message, or try to reconnect if it is time to"""
+        if self.socket is None:
+            if time.monotonic() >= self._reconnect_at:
+                self._reconnect()
+            return
+
+        pending = self._pending
+        self._pending = []
+        now = time.monotonic()
+        try:
+            # A recv per flush would double the syscalls of small flushes
+            if now >= self._check_at:
+                self._check_at = now + self.health_interval
+                if self._peer_closed():
+                    self.metrics.error(errno.ECONNRESET)
+                    raise ConnectionResetError("The collector closed the connection")
+            super().flush()
+        except OSError:
+            self._check_at = 0.0
+            self._buffer = []
+            self._buffered = 0
+            self._buffered_messages = 0
+            self._disconnect()
+            self._queue.extendleft(reversed(pending))
+            self.stats.queued += len(pending)
+
+    def flush_if_due(self):
+        # Also reconnect while idle, so the queue is replayed before the next send
+        if self.socket is None:
+            self.flush()
+        else:
+            super().flush_if_due()
+
+    def _disconnect(self):
+        if self.socket is not None:
+            self._save_session()
+            self.socket.close()
+            self.socket = None
+        self._reconnect_at = time.monotonic() + self._delay
+        self._delay = min(self._delay * 2, self.max_backoff)
+
+    def _reconnect(self):
+        try:
+            self._connect()
+        except OSError:
+            self._disconnect()
+            return
+        self.stats.reconnects += 1
+        self.metrics.reconnects += 1
+        self._delay = self.backoff
+        self._replay()
+
+    def _replay(self):
+        """Write the queued then the spilled messages, in order"""
+        while self._queue and self.socket is not None:
+            self.stats.replayed += 1
+            self._write(self._queue.popleft())
+        while self._spill is not None and self.socket is not None:
+            data = self._spill.pop()
+            if data is None:
+                break
+            self.stats.replayed += 1
+            self._write(data)
+        if self.socket is not None:
+            self.flush()
+
+    def outstanding_bytes(self):
+        """Bytes buffered, queued or in the kernel, see Syslog.outstanding_bytes"""
+        queued = sum(map(len, self._queue))
+        if self.socket is None:
+            return self._buffered + queued
+        return super().outstanding_bytes() + queued
+
+    def detach(self):
+        # The queue and the spill log are the parent's to send too
+        self._pending = []
+        self._queue = collections.deque()
+        self._spill = None
+        if self.socket is not None:
+            super().detach()
+            self.socket = None
+
+    def close(self):
+        """Flush, then keep what could not be sent in the spill log for the next run"""
+        if self.socket is None:
+            self._reconnect()
+        if self.socket is not None:
+            self.flush()
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+        if self._queue:
+            if self._spill is not None:
+                self._spill.prepend(self._queue)
+                self.stats.spilled += len(self._queue)
+            else:
+                self.stats.dropped += len(self._queue)
+                self.metrics.dropped += len(self._queue)
+            self._queue.clear()
+        if self._spill is not None:
+            self._spill.close()
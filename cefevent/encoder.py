@@ -0,0 +1,128 @@
+from typing import Any, BinaryIO, Iterable, List
+
+from cefevent.cache import HeaderCache, header_cache
+from cefevent.event import CompactCEFEvent, _get_header_prefixes
+from cefevent.schema import schema
+
+
+class CEFEncoder(object):
+    """
+    Encode events straight into wire-ready CEF bytes.
+
+    Short names are resolved once per field when the encoder is created, and
+    every event is written into a single bytearray, so bulk sends and file dumps
+    skip the per-event str.format of build_cef and the later encode.
+    """
+
+    def __init__(self, encoding: str = "utf-8", cache: HeaderCache = header_cache):
+        """
+        Create a new CEFEncoder.
+
+        Arguments:
+        - encoding (`str`): The encoding of the produced bytes.
+        - cache (`HeaderCache`): The cache of rendered headers, shared with build_cef by default.
+          Set to None to render every header.
+
+        """
+
+        self.encoding = encoding
+        # The cache holds utf-8 headers only
+        self.cache = cache if encoding.lower().replace("-", "") == "utf8" else None
+
+        # b"src=" for every field, by full name and by schema ordinal
+        self._keys = {
+            f.full_name: (f.name + "=").encode(encoding) for f in schema.fields
+        }
+        self._ordinal_keys = [(f.name + "=").encode(encoding) for f in schema.fields]
+
+    def _encode_value(self, value: Any):
+        if value.__class__ is not str:
+            value = str(value)
+        return value.encode(self.encoding)
+
+    def _write_header(self, buf: bytearray, prefixes: tuple):
+        if self.cache is not None:
+            buf += self.cache.get(prefixes)[1]
+            return
+        buf += b"CEF:"
+        buf += b"|".join([self._encode_value(value) for value in prefixes])
+        buf += b"|"
+
+    def _write(self, buf: bytearray, event: Any):
+        encode = self._encode_value
+
+        if isinstance(event, CompactCEFEvent):
+            self._write_header(buf, event._prefixes)
+            keys = self._ordinal_keys
+            pairs = zip(event._ordinals, event._values)
+        else:
+            self._write_header(buf, _get_header_prefixes(event.prefixes))
+            keys = self._keys
+            pairs = event.extensions.items()
+
+        first = True
+        for field, value in pairs:
+            if first:
+                first = False
+            else:
+                buf += b" "
+            buf += keys[field]
+            buf += encode(value)
+
+    def encode(self, event: Any) -> bytes:
+        """Encode a single CEFEvent or CompactCEFEvent."""
+        buf = bytearray()
+        self._write(buf, event)
+        return bytes(buf)
+
+    def encode_many(self, events: Iterable[Any]) -> List[bytes]:
+        """Encode many events, returning one bytes object per event."""
+        buf = bytearray()
+        offsets = [0]
+        for event in events:
+            self._write(buf, event)
+            offsets.append(len(buf))
+
+        view = memoryview(buf)
+        encoded = [
+            bytes(view[offsets[i] : offsets[i + 1]]) for i in range(len(offsets) - 1)
+        ]
+        view.release()
+        return encoded
+
+    def encode_joined(self, events: Iterable[Any], separator: bytes = b"\n") -> bytes:
+        """
+        Encode many events into one buffer.
+
+        Arguments:
+        - events (`iterable`): The events to encode.
+        - separator (`bytes`): Written after every event.
+
+        """
+
+        buf = bytearray()
+        for event in events:
+            self._write(buf, event)
+            buf += separator
+        return bytes(buf)
+
+    def dump(self, events: Iterable[Any], fp: BinaryIO, separator: bytes = b"\n"):
+        """
+        Write events to a binary file, one per line.
+
+        Arguments:
+        - events (`iterable`): The events to write.
+        - fp (`file`): A file opened in binary mode.
+        - separator (`bytes`): Written after every event.
+
+        """
+
+        buf = bytearray()
+        for event in events:
+            self._write(buf, event)
+            buf += separator
+            if len(buf) >= 65536:
+                fp.write(buf)
+                buf.clear()
+        if buf:
+            fp.write(buf)
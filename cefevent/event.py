@@ -1,23 +1,67 @@
-import re
-import socket
+from operator import itemgetter
 from typing import Any, AnyStr, List
 
+from cefevent.cache import header_cache
+
 from cefevent.extensions import extension_dictionary
+from cefevent.schema import schema
+
+DEFAULT_PREFIXES = {
+    "version": 0,
+    "deviceVendor": "CEF Vendor",
+    "deviceProduct": "CEF Product",
+    "deviceVersion": "1.0",
+    "signatureId": "0",
+    "name": "CEF Event",
+    "severity": 5,
+}
+
+# The order of prefixes in the CEF header
+PREFIX_ORDER = tuple(DEFAULT_PREFIXES.keys())
+
+_get_header_prefixes = itemgetter(*PREFIX_ORDER)
+
+_missing = object()
+
+SEVERITY_NAMES = ("Unknown", "Low", "Medium", "High", "Very-High")
+
+
+def _same_value(old: Any, new: Any):
+    # 1 == 1.0 == True, but they are serialized differently
+    return old.__class__ is new.__class__ and old == new
+
+
+def _validate_prefix_value(prefix: AnyStr, value: Any):
+    if prefix == "severity":
+        if value in SEVERITY_NAMES:
+            return value
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return False
+        if value in range(0, 11):
+            return value
+        return False
+    elif prefix == "version" and isinstance(value, int):
+        return value
+
+    value = value.replace("\\", "\\\\")
+    value = value.replace("|", "\\|")
+    return value.strip()
 
 
 class CEFEvent(object):
-    _prefix_list = [
-        "name",
-        "deviceVendor",
-        "deviceProduct",
-        "signatureId",
-        "version",
-        "deviceVersion",
-        "severity",
-    ]
+    __slots__ = ("prefixes", "extensions", "strict", "_cef_bytes")
+
+    _schema = schema
+
+    _prefix_list = list(schema.prefixes)
 
     _extension_dictionary = extension_dictionary
 
+    # Shared by every instance, built once from the schema
+    _reverse_extension_dictionary = {f.full_name: f.metadata for f in schema.fields}
+
     def __init__(self, strict: bool = False):
         """
         Create a new CEFEvent.
@@ -28,119 +72,58 @@ class CEFEvent(object):
         """
 
         self.extensions = None
-        self.prefixes = {}
+        self.prefixes = None
+        self._cef_bytes = None
         self.reset()
 
-        self._reverse_extension_dictionary = {}
-
-        self._validate_extensions()
-        self._build_reverse_extension_dictionary()
-
         self.strict = strict
 
     def __repr__(self):
         return self.build_cef()
 
+    def __getstate__(self):
+        # The cached bytes are not worth sending between processes
+        return self.prefixes, self.extensions, self.strict
+
+    def __setstate__(self, state):
+        self.prefixes, self.extensions, self.strict = state
+        self._cef_bytes = None
+
+    @classmethod
+    def from_string(cls, line: AnyStr, strict: bool = False):
+        """
+        Parse a CEF line, as produced by build_cef, into a new event.
+
+        Arguments:
+        - line (`str`): The CEF line to parse.
+        - strict (`bool`): Set to True to throw ValueError if the line contains invalid fields.
+
+        """
+
+        from cefevent.parser import parse_cef
+
+        return parse_cef(line, strict=strict, cls=cls)
+
     def load(self, headers: List[AnyStr], fields: List[Any]):
         for idx, value in enumerate(fields):
             self.set_field(headers[idx], value)
 
     def _validate_field_value(self, field: AnyStr, value: Any):
-        obj = self._reverse_extension_dictionary[field]
-
-        # Handle special case of ports
-        if obj["full_name"].endswith("Port"):
-            try:
-                value = int(value)
-            except:
-                return False
-            if not 0 <= value <= 65535:
-                return False
-            return value
-
-        for dt in obj["data_type"]:
-            if dt in ["Integer", "Long"]:
-                if dt == "Integer" and value > 2**31-1:
-                    continue
-                try:
-                    return int(value)
-                except:
-                    continue
-            elif dt == "IPv4 Address":
-                if not value.count(".") == 3:
-                    continue
-                try:
-                    socket.inet_pton(socket.AF_INET, value)
-                except AttributeError:  # no inet_pton here, sorry
-                    try:
-                        socket.inet_aton(value)
-                    except socket.error:
-                        continue
-                except socket.error:  # not a valid address
-                    continue
-                return value
-            elif dt == "IPv6 Address":
-                if not value.count(":") >= 2:
-                    continue
-                try:
-                    socket.inet_pton(socket.AF_INET6, value)
-                except:
-                    continue
-                return value
-            elif dt == "MAC Address":
-                valid_mac = bool(
-                    re.match(
-                        "^" + "[\\:\\-]".join(["([0-9a-f]{2})"] * 6) + "$",
-                        value.strip().lower(),
-                    )
-                )
-                if valid_mac:
-                    return value.strip().lower()
-                else:
-                    continue
-
-            elif dt == "String":
-                value = str(value).strip()
-
-                if len(value) > obj["length"] > 0:
-                    continue
-                else:
-                    value = value.replace("\\", "\\\\")
-                    value = value.replace("=", "\\=")
-                    value = value.replace("\n", "\\n")
-                    return value
-            elif dt == "Floating Point":
-                try:
-                    return float(value)
-                except:
-                    continue
-            else:
-                return value
-
-        return False
+        return self._schema.by_full_name[field].validator(value)
 
     def set_prefix(self, prefix: AnyStr, value: Any):
         if prefix in self._prefix_list:
-            if prefix == "severity":
-                if value in ["Unknown", "Low", "Medium", "High", "Very-High"]:
-                    self.prefixes[prefix] = value
-                    return self.prefixes[prefix]
-                elif int(value) in range(0, 11):
-                    self.prefixes[prefix] = int(value)
-                    return self.prefixes[prefix]
-                else:
-                    if self.strict:
-                        raise ValueError(
-                            "The severity must be an int in [0-10]. Not: {}".format(
-                                value
-                            )
-                        )
-                    return False
-            else:
-                value = value.replace("\\", "\\\\")
-                value = value.replace("|", "\\|")
-                self.prefixes[prefix] = value.strip()
+            v = _validate_prefix_value(prefix, value)
+            if v is not False:
+                if not _same_value(self.prefixes.get(prefix, _missing), v):
+                    self.prefixes[prefix] = v
+                    self._cef_bytes = None
                 return self.prefixes[prefix]
+            if self.strict:
+                raise ValueError(
+                    "The severity must be an int in [0-10]. Not: {}".format(value)
+                )
+            return False
         if self.strict:
             raise ValueError("Unknown CEF prefix: {}".format(prefix))
         return False
@@ -149,24 +132,14 @@ class CEFEvent(object):
         if field in self._prefix_list:
             return self.set_prefix(field, value)
 
-        if field in self._reverse_extension_dictionary:
-            v = self._validate_field_value(field, value)
+        obj = self._schema.get(field)
+        if obj is not None:
+            field = obj.full_name
+            v = obj.validator(value)
             if v is not False:
-                self.extensions[field] = v
-                return self.extensions[field]
-            else:
-                if self.strict:
-                    raise ValueError(
-                        "Invalid value for field: {}\nThe following rules apply: {}".format(
-                            field, self.get_field_metadata(field)
-                        )
-                    )
-                return False
-        elif field in self._extension_dictionary:
-            field = self._extension_dictionary[field]["full_name"]
-            v = self._validate_field_value(field, value)
-            if v:
-                self.extensions[field] = v
+                if not _same_value(self.extensions.get(field, _missing), v):
+                    self.extensions[field] = v
+                    self._cef_bytes = None
                 return self.extensions[field]
             else:
                 if self.strict:
@@ -180,77 +153,233 @@ class CEFEvent(object):
             raise ValueError("Unknown CEF field: {}".format(field))
         return False
 
-    def _build_reverse_extension_dictionary(self):
-        for item in self._extension_dictionary.items():
-            self._reverse_extension_dictionary[item[1]["full_name"]] = item[1]
-            self._reverse_extension_dictionary[item[1]["full_name"]]["name"] = item[0]
-
-    def _validate_extensions(self):
-        for item in self._extension_dictionary.items():
-            for dt in item[1]["data_type"]:
-                if dt not in [
-                    "TimeStamp",
-                    "IPv4 Address",
-                    "String",
-                    "Long",
-                    "Integer",
-                    "MAC Address",
-                    "IPv6 Address",
-                    "Floating Point",
-                ]:
-                    print(
-                        "[-] Invalid data_type in item {}: {}".format(
-                            item[0], item[1]["data_type"]
-                        )
-                    )
-            try:
-                int(item[1]["length"])
-            except:
-                print(
-                    "[-] Invalid length in item {}: {}".format(
-                        item[0], item[1]["length"]
-                    )
-                )
-
     def build_cef(self):
-        template = "CEF:{version}|{deviceVendor}|{deviceProduct}|{deviceVersion}|{signatureId}|{name}|{severity}|{extensions}"
+        header = header_cache.get(_get_header_prefixes(self.prefixes))[0]
 
         extensions = [
             "{}={}".format(self.get_cef_field_name(field), self.extensions[field])
             for field in self.extensions.keys()
         ]
 
-        return template.format(extensions=" ".join(extensions), **self.prefixes)
+        return header + " ".join(extensions)
+
+    def to_bytes(self):
+        """
+        Return the utf-8 encoded CEF line.
+
+        The bytes are cached until set_field, set_prefix or reset modify the event,
+        so the prefixes and extensions dicts must not be changed directly.
+        """
+
+        if self._cef_bytes is None:
+            self._cef_bytes = self.build_cef().encode("utf-8")
+        return self._cef_bytes
 
     def get_fields(self):
         return dict(**self.prefixes, **self.extensions)
 
+    def get_field(self, field: AnyStr):
+        """Return the value of a prefix or extension, by short or full name, or None"""
+        if field in self.prefixes:
+            return self.prefixes[field]
+        obj = self._schema.get(field)
+        if obj is not None:
+            return self.extensions.get(obj.full_name)
+
     def get_cef_field_name(self, field: AnyStr):
-        if field in self._extension_dictionary:
-            return field
-        elif field in self._reverse_extension_dictionary:
-            return self._reverse_extension_dictionary[field]["name"]
+        obj = self._schema.get(field)
+        if obj is not None:
+            return obj.name
 
     def get_field_metadata(self, field: AnyStr, metadata: AnyStr = None):
-        if field in self._extension_dictionary:
+        obj = self._schema.get(field)
+        if obj is not None:
             if not metadata:
-                return self._extension_dictionary[field]
+                return dict(obj.metadata)
             else:
-                return self._extension_dictionary[field][metadata]
-        elif field in self._reverse_extension_dictionary:
-            if not metadata:
-                return self._reverse_extension_dictionary[field]
-            else:
-                return self._reverse_extension_dictionary[field][metadata]
+                return obj.metadata[metadata]
 
     def reset(self):
         self.extensions = {}
-        self.prefixes = {
-            "version": 0,
-            "deviceVendor": "CEF Vendor",
-            "deviceProduct": "CEF Product",
-            "deviceVersion": "1.0",
-            "signatureId": "0",
-            "name": "CEF Event",
-            "severity": 5,
+        self.prefixes = dict(DEFAULT_PREFIXES)
+        self._cef_bytes = None
+
+
+class CompactCEFEvent(object):
+    """
+    A memory-compact CEFEvent, meant for pools holding millions of events.
+
+    Extensions are stored as a bytearray of schema ordinals and a parallel list
+    of values, and identical prefix tuples are shared between instances. It
+    exposes the same API as CEFEvent; `prefixes` and `extensions` are read-only
+    dicts built on access.
+    """
+
+    __slots__ = ("_prefixes", "_ordinals", "_values", "strict", "_cef_bytes")
+
+    _schema = schema
+
+    _prefix_list = CEFEvent._prefix_list
+
+    # The order of prefixes in the _prefixes tuple
+    _prefix_order = PREFIX_ORDER
+    _prefix_index = {prefix: idx for idx, prefix in enumerate(_prefix_order)}
+
+    _default_prefixes = tuple(DEFAULT_PREFIXES.values())
+
+    # Interned prefix tuples, so events sharing a header share its storage
+    _interned_prefixes = {_default_prefixes: _default_prefixes}
+    _interned_prefixes_max = 4096
+
+    def __init__(self, strict: bool = False):
+        """
+        Create a new CompactCEFEvent.
+
+        Arguments:
+        - strict (`bool`): Set to True to throw ValueError if trying to create an invalid CEFEvent.
+
+        """
+
+        self._prefixes = None
+        self._ordinals = None
+        self._values = None
+        self._cef_bytes = None
+        self.reset()
+
+        self.strict = strict
+
+    def __repr__(self):
+        return self.build_cef()
+
+    def __getstate__(self):
+        return self._prefixes, bytes(self._ordinals), self._values, self.strict
+
+    def __setstate__(self, state):
+        prefixes, ordinals, self._values, self.strict = state
+        self._prefixes = self._intern_prefixes(prefixes)
+        self._ordinals = bytearray(ordinals)
+        self._cef_bytes = None
+
+    @property
+    def prefixes(self):
+        return dict(zip(self._prefix_order, self._prefixes))
+
+    @property
+    def extensions(self):
+        fields = self._schema.fields
+        return {
+            fields[ordinal].full_name: value
+            for ordinal, value in zip(self._ordinals, self._values)
         }
+
+    @classmethod
+    def from_string(cls, line: AnyStr, strict: bool = False):
+        """
+        Parse a CEF line, as produced by build_cef, into a new event.
+
+        Arguments:
+        - line (`str`): The CEF line to parse.
+        - strict (`bool`): Set to True to throw ValueError if the line contains invalid fields.
+
+        """
+
+        from cefevent.parser import parse_cef
+
+        return parse_cef(line, strict=strict, cls=cls)
+
+    def load(self, headers: List[AnyStr], fields: List[Any]):
+        for idx, value in enumerate(fields):
+            self.set_field(headers[idx], value)
+
+    def _intern_prefixes(self, prefixes: tuple):
+        interned = self._interned_prefixes.get(prefixes)
+        if interned is not None:
+            return interned
+        if len(self._interned_prefixes) < self._interned_prefixes_max:
+            self._interned_prefixes[prefixes] = prefixes
+        return prefixes
+
+    def set_prefix(self, prefix: AnyStr, value: Any):
+        if prefix in self._prefix_index:
+            v = _validate_prefix_value(prefix, value)
+            if v is not False:
+                idx = self._prefix_index[prefix]
+                if not _same_value(self._prefixes[idx], v):
+                    prefixes = list(self._prefixes)
+                    prefixes[idx] = v
+                    self._prefixes = self._intern_prefixes(tuple(prefixes))
+                    self._cef_bytes = None
+                return v
+            if self.strict:
+                raise ValueError(
+                    "The severity must be an int in [0-10]. Not: {}".format(value)
+                )
+            return False
+        if self.strict:
+            raise ValueError("Unknown CEF prefix: {}".format(prefix))
+        return False
+
+    def set_field(self, field: AnyStr, value: Any):
+        if field in self._prefix_index:
+            return self.set_prefix(field, value)
+
+        obj = self._schema.get(field)
+        if obj is not None:
+            v = obj.validator(value)
+            if v is not False:
+                idx = self._ordinals.find(obj.ordinal)
+                if idx == -1:
+                    self._ordinals.append(obj.ordinal)
+                    self._values.append(v)
+                    self._cef_bytes = None
+                elif not _same_value(self._values[idx], v):
+                    self._values[idx] = v
+                    self._cef_bytes = None
+                return v
+            else:
+                if self.strict:
+                    raise ValueError(
+                        "Invalid value for field: {}\nThe following rules apply: {}".format(
+                            obj.full_name, self.get_field_metadata(obj.full_name)
+                        )
+                    )
+                return False
+        if self.strict:
+            raise ValueError("Unknown CEF field: {}".format(field))
+        return False
+
+    def build_cef(self):
+        fields = self._schema.fields
+
+        extensions = [
+            "{}={}".format(fields[ordinal].name, value)
+            for ordinal, value in zip(self._ordinals, self._values)
+        ]
+
+        return header_cache.get(self._prefixes)[0] + " ".join(extensions)
+
+    to_bytes = CEFEvent.to_bytes
+
+    def get_fields(self):
+        return dict(**self.prefixes, **self.extensions)
+
+    def get_field(self, field: AnyStr):
+        """Return the value of a prefix or extension, by short or full name, or None"""
+        idx = self._prefix_index.get(field)
+        if idx is not None:
+            return self._prefixes[idx]
+        obj = self._schema.get(field)
+        if obj is not None:
+            idx = self._ordinals.find(obj.ordinal)
+            if idx != -1:
+                return self._values[idx]
+
+    get_cef_field_name = CEFEvent.get_cef_field_name
+
+    get_field_metadata = CEFEvent.get_field_metadata
+
+    def reset(self):
+        self._prefixes = self._default_prefixes
+        self._ordinals = bytearray()
+        self._values = []
+        self._cef_bytes = None
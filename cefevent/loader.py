@@ -0,0 +1,291 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AnyStr, Iterable, Iterator, List, Tuple
+
+from cefevent.bulk import ColumnReport, events_from_report, validate_columns
+from cefevent.event import CEFEvent
+
+
+class LoadStats(object):
+    """Counters of definition file rows, shared while loading one or more files."""
+
+    def __init__(self):
+        self.files = 0
+        self.rows = 0
+        self.loaded = 0
+        self.skipped = 0
+        # Invalid cells per column, only counted by bulk validation
+        self.invalid = {}
+
+    def __repr__(self):
+        return (
+            "LoadStats(files={}, rows={}, loaded={}, skipped={}, invalid={})".format(
+                self.files, self.rows, self.loaded, self.skipped, self.invalid
+            )
+        )
+
+    def add_report(self, report: ColumnReport):
+        for header, errors in report.errors.items():
+            self.invalid[header] = self.invalid.get(header, 0) + len(errors)
+
+
+def iter_definition_rows(fn: AnyStr, stats: LoadStats = None) -> Iterator:
+    """
+    Lazily read a definition file, yielding (headers, fields) for every valid row.
+
+    The file is a CSV delimited by `;`, with the CEF field names as headers in the
+    first line. Rows whose column count does not match the headers are skipped and
+    counted in `stats.skipped`.
+
+    Arguments:
+    - fn (`str`): The path of the definition file.
+    - stats (`LoadStats`): Optional counters to update.
+
+    """
+
+    if stats is None:
+        stats = LoadStats()
+
+    with open(fn, "r", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+
+        headers = _read_headers(reader)
+        if headers is None:
+            return
+        stats.files += 1
+
+        for fields in _iter_fields(reader, headers, stats):
+            yield headers, fields
+
+
+def _read_headers(reader: Iterable[List[AnyStr]]):
+    for row in reader:
+        if row:
+            return [i.strip() for i in row]
+    return None
+
+
+def _iter_fields(
+    reader: Iterable[List[AnyStr]], headers: List[AnyStr], stats: LoadStats
+):
+    for row in reader:
+        if not row:
+            continue
+
+        stats.rows += 1
+        if len(row) != len(headers):
+            stats.skipped += 1
+            continue
+
+        yield [i.strip() for i in row]
+
+
+def iter_events(
+    files: List[AnyStr],
+    stats: LoadStats = None,
+    strict: bool = False,
+    cls: type = CEFEvent,
+) -> Iterator:
+    """
+    Lazily load events from definition files, one row at a time.
+
+    Memory use is bounded by a single row, whatever the size of the files.
+
+    Arguments:
+    - files (`list`): The paths of the definition files, loaded in order.
+    - stats (`LoadStats`): Optional counters to update.
+    - strict (`bool`): Set to True to throw ValueError on invalid rows.
+    - cls (`type`): The event class to create, CEFEvent or CompactCEFEvent.
+
+    """
+
+    if stats is None:
+        stats = LoadStats()
+
+    for fn in files:
+        for headers, fields in iter_definition_rows(fn, stats):
+            ev = cls(strict=strict)
+            ev.load(headers, fields)
+            stats.loaded += 1
+            yield ev
+
+
+def load_weights(
+    files: List[AnyStr], column: AnyStr = "weight", stats: LoadStats = None
+) -> List[float]:
+    """
+    Read the weight column of definition files, one weight per loaded event.
+
+    Rows are skipped like in iter_events, so the weights line up with the events
+    of load_events. The column is not a CEF field, and is ignored when loading
+    the events.
+
+    Arguments:
+    - files (`list`): The paths of the definition files, loaded in order.
+    - column (`str`): The header of the weight column.
+    - stats (`LoadStats`): Optional counters to update.
+
+    """
+
+    weights = []
+    for fn in files:
+        idx = None
+        for headers, fields in iter_definition_rows(fn, stats):
+            if idx is None:
+                if column not in headers:
+                    raise ValueError("No {} column in {}".format(column, fn))
+                idx = headers.index(column)
+            try:
+                weight = float(fields[idx])
+            except ValueError:
+                weight = None
+            # Also catches nan
+            if weight is None or not weight >= 0:
+                raise ValueError(
+                    "Invalid weight {!r} in {}, weights must be non-negative "
+                    "numbers".format(fields[idx], fn)
+                )
+            weights.append(weight)
+    return weights
+
+
+def _split_file(fn: AnyStr, chunk_size: int):
+    """Return the headers and the (start, end) byte ranges of the rows of a file"""
+
+    with open(fn, "rb") as f:
+        line = f.readline()
+        while line and not line.strip():
+            line = f.readline()
+        headers = _read_headers(csv.reader([line.decode("utf-8")], delimiter=";"))
+
+        chunks = []
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(start + chunk_size)
+            f.readline()
+            end = min(f.tell(), size)
+            chunks.append((start, end))
+            start = end
+
+    return headers, chunks
+
+
+def _load_rows(
+    headers: List[AnyStr],
+    rows: List[List[AnyStr]],
+    stats: LoadStats,
+    strict: bool,
+    cls: type,
+    bulk: bool,
+):
+    if bulk:
+        report = validate_columns(headers, rows)
+        stats.add_report(report)
+        events = events_from_report(report, strict=strict, cls=cls)
+    else:
+        events = []
+        for fields in rows:
+            ev = cls(strict=strict)
+            ev.load(headers, fields)
+            events.append(ev)
+
+    stats.loaded += len(events)
+    return events
+
+
+def _load_chunk(
+    task: Tuple[AnyStr, List[AnyStr], int, int, bool]
+) -> Tuple[ColumnReport, LoadStats]:
+    fn, headers, start, end, bulk = task
+
+    with open(fn, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode("utf-8")
+
+    stats = LoadStats()
+    reader = csv.reader(io.StringIO(data, newline=""), delimiter=";")
+    rows = list(_iter_fields(reader, headers, stats))
+
+    # Validated columns are much cheaper to send back than events, which the
+    # parent builds with events_from_report. Without bulk, cells go through the
+    # same schema validators as set_field.
+    report = validate_columns(headers, rows, use_numpy=None if bulk else False)
+    if bulk:
+        stats.add_report(report)
+    return report, stats
+
+
+def load_events(
+    files: List[AnyStr],
+    workers: int = 1,
+    stats: LoadStats = None,
+    strict: bool = False,
+    cls: type = CEFEvent,
+    chunk_size: int = None,
+    bulk: bool = False,
+) -> list:
+    """
+    Load every event from definition files, optionally with a process pool.
+
+    With more than one worker, files are split into chunks on newline boundaries,
+    parsed and validated in parallel, and the events are built from the validated
+    columns in file order. Chunks are split on raw newlines, so quoted values must
+    not contain line breaks.
+
+    Arguments:
+    - files (`list`): The paths of the definition files, loaded in order.
+    - workers (`int`): How many processes to use, 1 loads in the current process.
+    - stats (`LoadStats`): Optional counters to update.
+    - strict (`bool`): Set to True to throw ValueError on invalid rows.
+    - cls (`type`): The event class to create, CEFEvent or CompactCEFEvent.
+    - chunk_size (`int`): The approximate size in bytes of every chunk, defaults to
+      splitting the files in 4 chunks per worker, with at least 1MB per chunk.
+    - bulk (`bool`): Set to True to validate whole columns at once with validate_columns,
+      and count invalid cells per column in `stats.invalid`.
+
+    """
+
+    if stats is None:
+        stats = LoadStats()
+
+    if workers <= 1:
+        if not bulk:
+            return list(iter_events(files, stats, strict=strict, cls=cls))
+
+        events = []
+        for fn in files:
+            headers = None
+            rows = []
+            for headers, fields in iter_definition_rows(fn, stats):
+                rows.append(fields)
+            if rows:
+                events.extend(_load_rows(headers, rows, stats, strict, cls, bulk))
+        return events
+
+    if chunk_size is None:
+        total_size = sum(os.path.getsize(fn) for fn in files)
+        chunk_size = max(total_size // (workers * 4), 1024 * 1024)
+
+    tasks = []
+    for fn in files:
+        headers, chunks = _split_file(fn, chunk_size)
+        if headers is None:
+            continue
+        stats.files += 1
+        for start, end in chunks:
+            tasks.append((fn, headers, start, end, bulk))
+
+    events = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for report, chunk_stats in executor.map(_load_chunk, tasks):
+            events.extend(events_from_report(report, strict=strict, cls=cls))
+            stats.rows += chunk_stats.rows
+            stats.skipped += chunk_stats.skipped
+            stats.loaded += report.rows
+            for header, count in chunk_stats.invalid.items():
+                stats.invalid[header] = stats.invalid.get(header, 0) + count
+
+    return events
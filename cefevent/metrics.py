@@ -0,0 +1,119 @@
+"""
+Transport metrics.
+
+Every Syslog records the messages and bytes it writes, how long each socket
+call takes, and the errno of failed calls, so a throughput ceiling can be put
+on either the serialization or the socket layer.
+"""
+
+import errno
+import math
+import time
+from typing import Callable, List, Optional
+
+# Socket call latencies are counted in power of two buckets, bucket i holding the
+# calls that took less than 2**i microseconds, and the last one every longer call
+LATENCY_BUCKETS = 24
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """The q-th (0-100) percentile of values, by nearest rank, or None if empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * q / 100.0))
+    return ordered[rank - 1]
+
+
+class TransportMetrics(object):
+    """
+    Counters of a syslog transport.
+
+    - messages (`int`): Messages written to the socket.
+    - bytes (`int`): Bytes written to the socket, framing included.
+    - calls (`int`): Socket write calls, a stream flush writes many messages at once.
+    - busy_ns (`int`): Nanoseconds spent in socket write calls.
+    - errors (`dict`): Failed socket calls by errno name, like EAGAIN or EMSGSIZE.
+    - reconnects (`int`): Connections opened again after a failure.
+    - dropped (`int`): Messages given up on, like datagrams the socket failed to send,
+      see also ReliableSyslog.
+    - latency (`list`): The socket call latency histogram, see LATENCY_BUCKETS.
+    """
+
+    def __init__(self, callback: Optional[Callable] = None, interval: float = 10.0):
+        """
+        Arguments:
+        - callback (`callable`): Called with snapshot() every `interval` seconds, checked
+          when a socket call is recorded.
+        - interval (`float`): Seconds between two callback calls.
+
+        """
+
+        self.callback = callback
+        self.interval = interval
+        self.messages = 0
+        self.bytes = 0
+        self.calls = 0
+        self.busy_ns = 0
+        self.errors = {}
+        self.reconnects = 0
+        self.dropped = 0
+        self.latency = [0] * LATENCY_BUCKETS
+        self._next_report = time.perf_counter_ns() + int(interval * 1e9)
+
+    def __repr__(self):
+        return "TransportMetrics(messages={}, bytes={}, errors={})".format(
+            self.messages, self.bytes, self.errors
+        )
+
+    def record(self, messages: int, size: int, start_ns: int, end_ns: int):
+        """Count a successful socket call, timed with time.perf_counter_ns()"""
+        elapsed = end_ns - start_ns
+        self.messages += messages
+        self.bytes += size
+        self.calls += 1
+        self.busy_ns += elapsed
+        idx = (elapsed // 1000).bit_length()
+        self.latency[idx if idx < LATENCY_BUCKETS else -1] += 1
+
+        if self.callback is not None and end_ns >= self._next_report:
+            self._next_report = end_ns + int(self.interval * 1e9)
+            self.callback(self.snapshot())
+
+    def error(self, err: int):
+        """Count a failed socket call by its errno"""
+        name = errno.errorcode.get(err, str(err))
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def percentile(self, q: float):
+        """The upper bound in microseconds of the q-th (0-100) latency percentile"""
+        if not self.calls:
+            return None
+        rank = self.calls * q / 100.0
+        seen = 0
+        for idx, count in enumerate(self.latency):
+            seen += count
+            if seen >= rank and count:
+                return 2 ** idx
+        return 2 ** (LATENCY_BUCKETS - 1)
+
+    def snapshot(self):
+        """Return the counters as a dict"""
+        return {
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "calls": self.calls,
+            "busy_seconds": self.busy_ns / 1e9,
+            "errors": dict(self.errors),
+            "reconnects": self.reconnects,
+            "dropped": self.dropped,
+            "latency_us": {
+                "p50": self.percentile(50),
+                "p99": self.percentile(99),
+                "p999": self.percentile(99.9),
+                # Upper bound in microseconds: calls
+                "histogram": {
+                    2 ** idx: count for idx, count in enumerate(self.latency) if count
+                },
+            },
+        }
@@ -0,0 +1,96 @@
+import time
+from typing import Callable
+
+
+class TokenBucket(object):
+    """
+    Pace events at a target rate, in bursts.
+
+    Tokens accrue at `rate` per second of the monotonic clock, up to `burst`.
+    Every wakeup sends as many events as there are whole tokens, so oversleeping
+    or a slow send is made up by a bigger burst instead of lowering the rate,
+    and a saturated sender does not build an unbounded backlog.
+
+    Example:
+    >>> bucket = TokenBucket(10000)
+    >>> while True:
+    ...     for _ in range(bucket.wait()):
+    ...         send()
+    """
+
+    # The longest sleep of wait(), so a rate raised by another thread is followed
+    max_sleep = 0.1
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = None,
+        tick: float = 0.001,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Arguments:
+        - rate (`float`): The target events per second.
+        - burst (`int`): The most events sent at once, defaults to 50ms of events.
+        - tick (`float`): The shortest sleep of wait(), in seconds, so high rates are sent
+          in batches instead of one wakeup per event.
+        - clock (`callable`): A monotonic clock, in seconds.
+
+        """
+
+        if rate <= 0:
+            raise ValueError("The rate must be positive, not {}".format(rate))
+        self.rate = rate
+        self._default_burst = burst is None
+        self.burst = max(1, int(rate * 0.05)) if burst is None else burst
+        self.tick = tick
+        self.clock = clock
+        self.tokens = 0.0
+        self._last = clock()
+
+    def __repr__(self):
+        return "TokenBucket(rate={}, burst={})".format(self.rate, self.burst)
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def take(self, limit: int = None) -> int:
+        """Take every whole token available now, at most `limit`, without waiting"""
+        self._refill()
+        count = int(self.tokens)
+        if limit is not None and count > limit:
+            count = limit
+        self.tokens -= count
+        return count
+
+    def delay(self) -> float:
+        """Seconds until the next token, 0 if one is available"""
+        if self.tokens >= 1:
+            return 0.0
+        if not self.rate:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+    def wait(self) -> int:
+        """Sleep until at least one token is available, then take them all"""
+        count = self.take()
+        while not count:
+            time.sleep(min(max(self.delay(), self.tick), self.max_sleep))
+            count = self.take()
+        return count
+
+    def set_rate(self, rate: float):
+        """
+        Change the rate, keeping the tokens accrued at the previous one.
+
+        A rate of 0 pauses the bucket, wait() then sleeps in steps of max_sleep
+        until another thread sets a positive rate.
+        """
+        if rate < 0:
+            raise ValueError("The rate can not be negative, not {}".format(rate))
+        self._refill()
+        self.rate = rate
+        if self._default_burst:
+            self.burst = max(1, int(rate * 0.05))
@@ -0,0 +1,308 @@
+import re
+from typing import AnyStr, Iterable, Iterator, List
+
+from cefevent.event import (
+    CEFEvent,
+    CompactCEFEvent,
+    DEFAULT_PREFIXES,
+    _validate_prefix_value,
+)
+from cefevent.schema import schema
+
+_header_re = re.compile(
+    r"CEF:((?:[^|\\]|\\.)*)" + r"\|((?:[^|\\]|\\.)*)" * 6 + r"\|(.*)", re.DOTALL
+)
+_header_unescape_re = re.compile(r"\\([\\|])")
+
+_extension_split_re = re.compile(r"(?:^| )(\w+)=")
+_extension_unescape_re = re.compile(r"\\([\\=n])")
+_extension_unescape_map = {"\\": "\\", "=": "=", "n": "\n"}
+
+_header_fields = (
+    "version",
+    "deviceVendor",
+    "deviceProduct",
+    "deviceVersion",
+    "signatureId",
+    "name",
+    "severity",
+)
+
+# Archived feeds repeat a handful of headers, so parsed prefixes are kept by their
+# raw text, and cleared when full
+_prefix_cache = {}
+_PREFIX_CACHE_SIZE = 1024
+
+# (full name, validator, length) of every short and full name. String values
+# without escapes are already in their escaped form, and only need the strip and
+# length check of their validator, so String fields have no validator here.
+_parse_fields = {
+    key: (
+        obj.full_name,
+        None
+        if obj.data_type == ("String",) and not obj.full_name.endswith("Port")
+        else obj.validator,
+        obj.length,
+    )
+    for key, obj in schema.lookup.items()
+}
+_ordinals = {obj.full_name: obj.ordinal for obj in schema.fields}
+
+_new_event = object.__new__
+
+
+def _unescape_header(value: AnyStr):
+    if "\\" in value:
+        return _header_unescape_re.sub(r"\1", value)
+    return value
+
+
+def _unescape_extension(value: AnyStr):
+    if "\\" in value:
+        return _extension_unescape_re.sub(
+            lambda m: _extension_unescape_map[m.group(1)], value
+        )
+    return value
+
+
+def _split_header(line: AnyStr):
+    start = line.find("CEF:")
+    if start == -1:
+        raise ValueError("Not a CEF line: {!r}".format(line))
+    line = line[start:]
+
+    # Fast path, no escaped pipes in the header
+    parts = line[4:].split("|", 7)
+    if len(parts) == 8 and "\\" not in line[: len(line) - len(parts[7])]:
+        return parts
+    match = _header_re.match(line)
+    if match is not None:
+        return list(match.groups())
+
+    raise ValueError("Incomplete CEF header: {!r}".format(line))
+
+
+def _split_extensions(extensions: AnyStr):
+    # Fast path, without escapes every "=" ends a key and every key follows a space
+    key = extensions.split("=", 1)[0].lstrip(" ")
+    if "\\" not in extensions and " " not in key:
+        chunks = extensions.split("=")
+        pairs = []
+        for chunk in chunks[1:-1]:
+            value, sep, next_key = chunk.rpartition(" ")
+            if not sep:
+                break
+            pairs.append((key, value))
+            key = next_key
+        else:
+            if len(chunks) > 1:
+                pairs.append((key, chunks[-1]))
+            return pairs
+
+    # ["", key, value, key, value, ...]
+    parts = _extension_split_re.split(extensions)
+    return zip(parts[1::2], parts[2::2])
+
+
+def _invalid_value(full_name: AnyStr):
+    return ValueError(
+        "Invalid value for field: {}\nThe following rules apply: {}".format(
+            full_name, dict(schema.by_full_name[full_name].metadata)
+        )
+    )
+
+
+def _parse_plain_extensions(extensions: AnyStr, strict: bool, validate: bool):
+    # Without escapes every "=" ends a key and every key follows a space, so the
+    # pairs are split and validated in a single pass. Returns None when a value
+    # holds a bare "=", the caller then falls back to the regex split.
+    parsed = {}
+    get = _parse_fields.get
+    chunks = extensions.split("=")
+    if len(chunks) == 1:
+        return parsed
+    key = chunks[0].lstrip(" ")
+    if " " in key:
+        return None
+    # The last value ends the line, the added space makes it split like the others
+    chunks[-1] += " "
+    for chunk in chunks[1:]:
+        value, sep, next_key = chunk.rpartition(" ")
+        if not sep or not key:
+            return None
+        field = get(key)
+        if field is None:
+            if strict:
+                raise ValueError("Unknown CEF field: {}".format(key))
+            key = next_key
+            continue
+        key = next_key
+        full_name, validator, length = field
+        if not validate:
+            parsed[full_name] = value
+            continue
+        if validator is None:
+            v = value.strip()
+            if len(v) > length > 0:
+                v = False
+        else:
+            v = validator(value)
+        if v is False:
+            if strict:
+                raise _invalid_value(full_name)
+            continue
+        parsed[full_name] = v
+    return parsed
+
+
+def _parse_extensions(extensions: AnyStr, strict: bool, validate: bool):
+    """Return the {full name: value} of the extensions, in order"""
+    # Values without escapes are the same once unescaped and escaped again
+    if "\\" not in extensions and "\n" not in extensions:
+        parsed = _parse_plain_extensions(extensions, strict, validate)
+        if parsed is not None:
+            return parsed
+
+    parsed = {}
+    lookup = schema.lookup
+    for key, value in _split_extensions(extensions):
+        obj = lookup.get(key)
+        if obj is None:
+            if strict:
+                raise ValueError("Unknown CEF field: {}".format(key))
+            continue
+        if not validate:
+            parsed[obj.full_name] = value
+            continue
+        v = obj.validator(_unescape_extension(value))
+        if v is False:
+            if strict:
+                raise _invalid_value(obj.full_name)
+            continue
+        parsed[obj.full_name] = v
+    return parsed
+
+
+def _header_value(value: AnyStr):
+    if "\\" in value:
+        return _validate_prefix_value("name", _unescape_header(value))
+    # Without backslashes, unescaping and escaping again is a no-op
+    return value.strip()
+
+
+def _parse_prefixes(parts: List[AnyStr], strict: bool):
+    version = parts[0]
+    prefixes = {
+        "version": int(version) if version.isdigit() else version.strip(),
+        "deviceVendor": _header_value(parts[1]),
+        "deviceProduct": _header_value(parts[2]),
+        "deviceVersion": _header_value(parts[3]),
+        "signatureId": _header_value(parts[4]),
+        "name": _header_value(parts[5]),
+    }
+
+    severity = parts[6]
+    if severity.isdigit() and int(severity) <= 10:
+        prefixes["severity"] = int(severity)
+    else:
+        severity = _validate_prefix_value("severity", severity)
+        if severity is not False:
+            prefixes["severity"] = severity
+        elif strict:
+            raise ValueError(
+                "The severity must be an int in [0-10]. Not: {}".format(parts[6])
+            )
+
+    return prefixes
+
+
+def parse_cef(
+    line: AnyStr, strict: bool = False, cls: type = CEFEvent, validate: bool = True
+):
+    """
+    Parse a CEF line into a new event.
+
+    Anything before "CEF:", such as a syslog header, is ignored. Header pipes and
+    extension escapes are unescaped before the values go through set_prefix and
+    set_field, so parsing the output of build_cef yields an identical event.
+
+    Arguments:
+    - line (`str`): The CEF line to parse.
+    - strict (`bool`): Set to True to throw ValueError on unknown fields or invalid values.
+    - cls (`type`): The event class to create, CEFEvent or CompactCEFEvent. Other classes
+      are filled through set_prefix and set_field.
+    - validate (`bool`): Set to False to skip value validation and keep extension values as
+      their escaped text, which is faster when re-sending archived feeds. Only supported
+      for CEFEvent and CompactCEFEvent.
+
+    """
+
+    parts = _split_header(line.rstrip("\r\n"))
+
+    if not issubclass(cls, (CEFEvent, CompactCEFEvent)):
+        if not validate:
+            raise ValueError("validate=False needs a CEFEvent or CompactCEFEvent")
+        ev = cls(strict=strict)
+        version = parts[0]
+        ev.set_prefix("version", int(version) if version.isdigit() else version)
+        for idx in range(1, 7):
+            ev.set_prefix(_header_fields[idx], _unescape_header(parts[idx]))
+
+        for key, value in _split_extensions(parts[7]):
+            ev.set_field(key, _unescape_extension(value))
+
+        return ev
+
+    header = tuple(parts[:7])
+    cached = _prefix_cache.get(header)
+    if cached is None:
+        prefixes = _parse_prefixes(parts, strict)
+        # Invalid severities are left out, and parsed again to raise in strict mode
+        complete = len(prefixes) == 7
+        prefixes = dict(DEFAULT_PREFIXES, **prefixes)
+        # The same prefixes as a dict for CEFEvent and as a tuple for CompactCEFEvent
+        cached = prefixes, CompactCEFEvent._intern_prefixes(
+            CompactCEFEvent, tuple(prefixes.values())
+        )
+        if complete:
+            if len(_prefix_cache) >= _PREFIX_CACHE_SIZE:
+                _prefix_cache.clear()
+            _prefix_cache[header] = cached
+
+    extensions = _parse_extensions(parts[7], strict, validate)
+
+    # Fast path, fill the slots directly instead of going through set_field
+    ev = _new_event(cls) if cls is CEFEvent or cls is CompactCEFEvent else cls()
+    if isinstance(ev, CEFEvent):
+        ev.prefixes = cached[0].copy()
+        ev.extensions = extensions
+    else:
+        ev._prefixes = cached[1]
+        ev._ordinals = bytearray([_ordinals[name] for name in extensions])
+        ev._values = list(extensions.values())
+    ev.strict = strict
+    ev._cef_bytes = None
+
+    return ev
+
+
+def iter_parse_cef(
+    lines: Iterable[AnyStr],
+    strict: bool = False,
+    cls: type = CEFEvent,
+    validate: bool = True,
+) -> Iterator:
+    """
+    Lazily parse CEF lines, skipping blank ones.
+
+    Arguments:
+    - lines (`iterable`): The CEF lines to parse, like an open file.
+    - strict (`bool`): Set to True to throw ValueError on unknown fields or invalid values.
+    - cls (`type`): The event class to create, CEFEvent or CompactCEFEvent.
+    - validate (`bool`): Set to False to skip value validation, see parse_cef.
+
+    """
+
+    for line in lines:
+        if line.strip():
+            yield parse_cef(line, strict=strict, cls=cls, validate=validate)
@@ -0,0 +1,328 @@
+"""
+Load-shape profiles for auto send.
+
+A profile gives the target EPS at any time since the start of a run, and
+CEFSender.auto_send_profile drives its TokenBucket with it. Profiles can be
+built in Python or loaded from a JSON spec file:
+
+    {"type": "ramp", "start": 100, "end": 20000, "duration": 600}
+
+A list of specs runs one profile after the other, every one but the last
+needs a duration:
+
+    [
+        {"type": "ramp", "start": 0, "end": 5000, "duration": 60},
+        {"type": "sine", "mean": 5000, "amplitude": 2000, "period": 60, "duration": 600},
+        {"type": "burst", "base": 1000, "peak": 20000, "period": 60, "length": 5}
+    ]
+"""
+
+import csv
+import json
+import math
+from typing import Any, AnyStr, List, Optional, Tuple
+
+
+class Profile(object):
+    """The target rate of a run over time"""
+
+    # The length of the profile in seconds, None if it never ends
+    duration = None
+
+    def rate(self, t: float) -> float:
+        """The target EPS, `t` seconds after the start"""
+        raise NotImplementedError
+
+    def mean_rate(self, start: float, end: float, steps: int = 10) -> float:
+        """The average target EPS between two times, sampled at `steps` points"""
+        if end <= start:
+            return self.rate(start)
+        width = (end - start) / steps
+        return sum(self.rate(start + (i + 0.5) * width) for i in range(steps)) / steps
+
+    def peak_rate(self) -> float:
+        """The highest target EPS"""
+        raise NotImplementedError
+
+
+class Constant(Profile):
+    def __init__(self, eps: float, duration: float = None):
+        self.eps = eps
+        self.duration = duration
+
+    def __repr__(self):
+        return "Constant(eps={}, duration={})".format(self.eps, self.duration)
+
+    def rate(self, t: float) -> float:
+        return self.eps
+
+    def peak_rate(self) -> float:
+        return self.eps
+
+
+class Ramp(Profile):
+    """A linear ramp from `start` to `end` EPS over `duration` seconds"""
+
+    def __init__(self, start: float, end: float, duration: float):
+        if duration <= 0:
+            raise ValueError("A ramp needs a positive duration")
+        self.start = start
+        self.end = end
+        self.duration = duration
+
+    def __repr__(self):
+        return "Ramp(start={}, end={}, duration={})".format(
+            self.start, self.end, self.duration
+        )
+
+    def rate(self, t: float) -> float:
+        progress = min(max(t / self.duration, 0.0), 1.0)
+        return self.start + (self.end - self.start) * progress
+
+    def peak_rate(self) -> float:
+        return max(self.start, self.end)
+
+
+class Step(Profile):
+    """A schedule of constant rates, as (seconds, EPS) steps, optionally repeated"""
+
+    def __init__(self, steps: List[Tuple[float, float]], repeat: bool = False):
+        if not steps:
+            raise ValueError("A step profile needs at least one step")
+        self.steps = [(float(seconds), float(eps)) for seconds, eps in steps]
+        self.repeat = repeat
+        self.period = sum(seconds for seconds, _ in self.steps)
+        self.duration = None if repeat else self.period
+
+    def __repr__(self):
+        return "Step(steps={}, repeat={})".format(self.steps, self.repeat)
+
+    def rate(self, t: float) -> float:
+        if self.repeat:
+            t %= self.period
+        for seconds, eps in self.steps:
+            if t < seconds:
+                return eps
+            t -= seconds
+        return self.steps[-1][1]
+
+    def peak_rate(self) -> float:
+        return max(eps for _, eps in self.steps)
+
+
+class Sine(Profile):
+    """A sinusoidal rate around `mean`, like a day and night curve"""
+
+    def __init__(
+        self,
+        mean: float,
+        amplitude: float,
+        period: float,
+        duration: float = None,
+        phase: float = 0.0,
+    ):
+        """
+        Arguments:
+        - mean (`float`): The average EPS.
+        - amplitude (`float`): The largest distance from the mean, the rate never
+          goes below 0.
+        - period (`float`): The length of a cycle in seconds.
+        - duration (`float`): The length of the profile, None never ends.
+        - phase (`float`): The start of the cycle, in fractions of a period.
+
+        """
+
+        if period <= 0:
+            raise ValueError("A sine profile needs a positive period")
+        self.mean = mean
+        self.amplitude = amplitude
+        self.period = period
+        self.duration = duration
+        self.phase = phase
+
+    def __repr__(self):
+        return "Sine(mean={}, amplitude={}, period={}, duration={})".format(
+            self.mean, self.amplitude, self.period, self.duration
+        )
+
+    def rate(self, t: float) -> float:
+        angle = 2 * math.pi * (t / self.period + self.phase)
+        return max(0.0, self.mean + self.amplitude * math.sin(angle))
+
+    def peak_rate(self) -> float:
+        return self.mean + abs(self.amplitude)
+
+
+class Burst(Profile):
+    """A `base` rate with `length` seconds at `peak` EPS every `period` seconds"""
+
+    def __init__(
+        self,
+        base: float,
+        peak: float,
+        period: float,
+        length: float,
+        duration: float = None,
+    ):
+        if period <= 0 or not 0 <= length <= period:
+            raise ValueError("A burst needs a positive period, longer than its length")
+        self.base = base
+        self.peak = peak
+        self.period = period
+        self.length = length
+        self.duration = duration
+
+    def __repr__(self):
+        return "Burst(base={}, peak={}, period={}, length={}, duration={})".format(
+            self.base, self.peak, self.period, self.length, self.duration
+        )
+
+    def rate(self, t: float) -> float:
+        return self.peak if t % self.period < self.length else self.base
+
+    def peak_rate(self) -> float:
+        return max(self.base, self.peak)
+
+
+class Sequence(Profile):
+    """Profiles run one after the other"""
+
+    def __init__(self, profiles: List[Profile]):
+        if not profiles:
+            raise ValueError("A sequence needs at least one profile")
+        if any(profile.duration is None for profile in profiles[:-1]):
+            raise ValueError(
+                "Every profile of a sequence but the last needs a duration"
+            )
+        self.profiles = profiles
+        if profiles[-1].duration is None:
+            self.duration = None
+        else:
+            self.duration = sum(profile.duration for profile in profiles)
+
+    def __repr__(self):
+        return "Sequence({})".format(self.profiles)
+
+    def rate(self, t: float) -> float:
+        for profile in self.profiles[:-1]:
+            if t < profile.duration:
+                return profile.rate(t)
+            t -= profile.duration
+        return self.profiles[-1].rate(t)
+
+    def peak_rate(self) -> float:
+        return max(profile.peak_rate() for profile in self.profiles)
+
+
+class Scaled(Profile):
+    """A profile with every rate multiplied by `factor`, like a share of send workers"""
+
+    def __init__(self, profile: Profile, factor: float):
+        self.profile = profile
+        self.factor = factor
+        self.duration = profile.duration
+
+    def __repr__(self):
+        return "Scaled({}, factor={})".format(self.profile, self.factor)
+
+    def rate(self, t: float) -> float:
+        return self.profile.rate(t) * self.factor
+
+    def peak_rate(self) -> float:
+        return self.profile.peak_rate() * self.factor
+
+
+PROFILE_TYPES = {
+    "constant": Constant,
+    "ramp": Ramp,
+    "step": Step,
+    "sine": Sine,
+    "burst": Burst,
+}
+
+
+def profile_from_spec(spec: Any) -> Profile:
+    """
+    Build a profile from a spec: a dict with a "type" key and the arguments of
+    its class, or a list of specs for a Sequence.
+
+    Arguments:
+    - spec (`dict` or `list`): The spec, as loaded from JSON.
+
+    """
+
+    if isinstance(spec, list):
+        return Sequence([profile_from_spec(item) for item in spec])
+    if not isinstance(spec, dict):
+        raise ValueError("Invalid profile spec: {!r}".format(spec))
+
+    args = dict(spec)
+    kind = args.pop("type", None)
+    if kind not in PROFILE_TYPES:
+        raise ValueError(
+            "Invalid profile type {!r}, valid options are {}".format(
+                kind, ", ".join(PROFILE_TYPES)
+            )
+        )
+    try:
+        return PROFILE_TYPES[kind](**args)
+    except TypeError as e:
+        raise ValueError("Invalid {} profile spec {!r}: {}".format(kind, spec, e))
+
+
+def load_profile(fn: AnyStr) -> Profile:
+    """Load a profile from a JSON spec file, see profile_from_spec"""
+    with open(fn, "r") as f:
+        return profile_from_spec(json.load(f))
+
+
+class ProfileSample(object):
+    """The target and achieved EPS of one sample interval of a run"""
+
+    def __init__(self, time: float, target: float, achieved: float):
+        # Seconds since the start of the run, at the start of the interval
+        self.time = time
+        self.target = target
+        self.achieved = achieved
+
+    def __repr__(self):
+        return "ProfileSample(time={:.1f}, target={:.1f}, achieved={:.1f})".format(
+            self.time, self.target, self.achieved
+        )
+
+    def as_dict(self):
+        return {"time": self.time, "target": self.target, "achieved": self.achieved}
+
+
+def saturation_point(
+    samples: List[ProfileSample], tolerance: float = 0.05
+) -> Optional[ProfileSample]:
+    """
+    Return the first sample whose achieved EPS is more than `tolerance` below its
+    target, where the sender or the collector could not keep up, or None.
+
+    Arguments:
+    - samples (`list`): The ProfileSample of a run, in order.
+    - tolerance (`float`): The accepted shortfall, as a fraction of the target.
+
+    """
+
+    for sample in samples:
+        if sample.achieved < sample.target * (1 - tolerance):
+            return sample
+    return None
+
+
+def write_samples(samples: List[ProfileSample], fn: AnyStr):
+    """Write the samples of a run to a CSV file: time, target and achieved EPS"""
+    with open(fn, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "target", "achieved"])
+        for sample in samples:
+            writer.writerow(
+                [
+                    "{:.3f}".format(sample.time),
+                    "{:.1f}".format(sample.target),
+                    "{:.1f}".format(sample.achieved),
+                ]
+            )
@@ -0,0 +1,187 @@
+"""
+Time-faithful replay.
+
+Events are sent in the order of a timestamp field, like rt, each at its
+original offset from the first event divided by a speed multiplier. Streamed
+files go through a bounded reorder buffer, so a capture that is only roughly
+in order can be replayed without loading it in memory.
+"""
+
+import heapq
+import re
+from datetime import datetime, timezone
+from typing import AnyStr, Iterable, Iterator, Optional, Tuple
+
+_MONTHS = {
+    name: idx
+    for idx, name in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), 1
+    )
+}
+
+# MMM dd [yyyy] HH:mm:ss[.SSS] [zone], the CEF date format, the zone is ignored
+_cef_date_re = re.compile(
+    r"^([A-Za-z]{3}) +(\d{1,2}) +(?:(\d{4}) +)?"
+    r"(\d{1,2}):(\d{2}):(\d{2})(\.\d+)?(?: +\S+)?$"
+)
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """
+    Parse a CEF timestamp to seconds since the epoch, or return None.
+
+    Accepted values are milliseconds since the epoch, the CEF "MMM dd yyyy HH:mm:ss"
+    format with optional milliseconds, year and time zone, and ISO 8601. Dates
+    without a zone are read as UTC, and dates without a year in the current year,
+    only the offsets between events matter for a replay.
+
+    Arguments:
+    - value (`str` or `int`): The value of a timestamp field.
+
+    """
+
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000.0
+    value = value.strip()
+    if value.isdigit():
+        return int(value) / 1000.0
+
+    match = _cef_date_re.match(value)
+    if match is not None:
+        month = _MONTHS.get(match.group(1).lower())
+        if month is None:
+            return None
+        year = int(match.group(3) or datetime.now().year)
+        try:
+            date = datetime(
+                year,
+                month,
+                int(match.group(2)),
+                int(match.group(4)),
+                int(match.group(5)),
+                int(match.group(6)),
+                tzinfo=timezone.utc,
+            )
+        except ValueError:
+            return None
+        return date.timestamp() + float(match.group(7) or 0)
+
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+class ReplayStats(object):
+    """
+    Counters of a replay.
+
+    The lag of an event is its send time minus its scheduled time: positive when
+    it was sent late, like after an oversleep or a slow send, negative when it was
+    sent early, at most one tick early, to send close events together.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        # Events without a valid timestamp, left out of the replay
+        self.skipped = 0
+        # Events older than one already sent, too far out of order for the reorder
+        # buffer, sent straight away
+        self.out_of_order = 0
+        self.late = 0
+        self.early = 0
+        self.late_seconds = 0.0
+        self.early_seconds = 0.0
+        self.max_late = 0.0
+        self.max_early = 0.0
+
+    def __repr__(self):
+        return (
+            "ReplayStats(sent={}, skipped={}, out_of_order={}, late={}, "
+            "early={})".format(
+                self.sent, self.skipped, self.out_of_order, self.late, self.early
+            )
+        )
+
+    def record(self, lag: float):
+        """Count a sent event, `lag` seconds after its scheduled time"""
+        self.sent += 1
+        if lag > 0:
+            self.late += 1
+            self.late_seconds += lag
+            if lag > self.max_late:
+                self.max_late = lag
+        elif lag < 0:
+            self.early += 1
+            self.early_seconds -= lag
+            if -lag > self.max_early:
+                self.max_early = -lag
+
+    def as_dict(self):
+        return {
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "out_of_order": self.out_of_order,
+            "late": self.late,
+            "early": self.early,
+            "mean_late_ms": 1000 * self.late_seconds / self.late if self.late else 0.0,
+            "max_late_ms": 1000 * self.max_late,
+            "mean_early_ms": (
+                1000 * self.early_seconds / self.early if self.early else 0.0
+            ),
+            "max_early_ms": 1000 * self.max_early,
+        }
+
+
+def order_by_timestamp(
+    events: Iterable, field: AnyStr, window: int = None, stats: ReplayStats = None
+) -> Iterator[Tuple[float, object]]:
+    """
+    Yield (timestamp, event) in timestamp order, through a reorder buffer.
+
+    Up to `window` events are held in a heap, and the oldest one is yielded when
+    it is full, so memory is bounded however large the input is. An event older
+    than one already yielded is yielded straight away and counted in
+    `stats.out_of_order`. Events without a valid timestamp are counted in
+    `stats.skipped`.
+
+    Arguments:
+    - events (`iterable`): The events, with a get_field method.
+    - field (`str`): The timestamp field, like rt, start or end.
+    - window (`int`): The size of the reorder buffer, None sorts every event.
+    - stats (`ReplayStats`): Optional counters to update.
+
+    """
+
+    if stats is None:
+        stats = ReplayStats()
+
+    heap = []
+    last = None
+    # Keeps events of the same timestamp in input order, and never compares events
+    seq = 0
+    for ev in events:
+        ts = parse_timestamp(ev.get_field(field))
+        if ts is None:
+            stats.skipped += 1
+            continue
+
+        if last is not None and ts < last:
+            stats.out_of_order += 1
+            yield last, ev
+            continue
+
+        heapq.heappush(heap, (ts, seq, ev))
+        seq += 1
+        if window is not None and len(heap) > window:
+            last, _, ev = heapq.heappop(heap)
+            yield last, ev
+
+    while heap:
+        last, _, ev = heapq.heappop(heap)
+        yield last, ev
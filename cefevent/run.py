@@ -4,7 +4,12 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import argparse
+import json
+import signal
+import ssl
+from cefevent.profiles import load_profile, write_samples
 from cefevent.sender import CEFSender
+from cefevent.syslog import Framing, HeaderFormat
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -18,27 +23,254 @@ if __name__ == "__main__":
         help="an file containing event definitions",
     )
     parser.add_argument(
-        "--host", type=str, help="Syslog destination host", required=True
+        "--host",
+        type=str,
+        help="Syslog destination host, or comma separated host:port destinations",
     )
     parser.add_argument("--port", type=int, default=514, help="Syslog destination port")
     parser.add_argument("--tcp", action="store_true", help="Use TCP instead of UDP")
+    parser.add_argument(
+        "--tls", action="store_true", help="Use TLS (RFC 5425) instead of UDP"
+    )
+    parser.add_argument(
+        "--tls-ca",
+        type=str,
+        help="CA file verifying the collector certificate, with --tls",
+    )
+    parser.add_argument(
+        "--unix",
+        type=str,
+        metavar="PATH",
+        help="Send to the Unix domain socket of a local agent, like /dev/log",
+    )
+    parser.add_argument(
+        "--unix-stream",
+        action="store_true",
+        help="Use a stream Unix domain socket instead of a datagram one, with --unix. "
+        "Messages end with a newline unless --framing is set",
+    )
+    parser.add_argument(
+        "--balance",
+        choices=["round_robin", "hash", "least_bytes"],
+        default="round_robin",
+        help="How to spread events across several destinations",
+    )
+    parser.add_argument(
+        "--hash-field", type=str, help="The field hashed by --balance hash, like src"
+    )
+    parser.add_argument(
+        "--framing",
+        choices=["lf", "octet"],
+        help="TCP framing, newline terminated or octet counted (RFC 6587)",
+    )
+    parser.add_argument(
+        "--header",
+        choices=["rfc3164", "rfc5424"],
+        help="Add a syslog header with the send time and this host name",
+    )
+    parser.add_argument(
+        "--tcp-buffer",
+        type=int,
+        default=0,
+        help="Coalesce TCP messages until this many bytes are buffered",
+    )
+    parser.add_argument(
+        "--reconnect",
+        action="store_true",
+        help="Reconnect to TCP collectors and queue events while they are down",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=10000,
+        help="Events queued in memory while disconnected, with --reconnect",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=str,
+        help="Spill events to this directory once the queue is full, with --reconnect",
+    )
     parser.add_argument(
         "--auto_send",
         action="store_true",
         help="Auto send logs, default to sending once",
     )
     parser.add_argument("--eps", type=int, default=100, help="Max EPS")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="Stop --auto_send, --profile or --replay after this many seconds",
+    )
+    parser.add_argument("--count", type=int, help="Stop after sending this many events")
+    parser.add_argument(
+        "--summary",
+        type=str,
+        metavar="JSON_FILE",
+        help="Write the statistics of the run to this file as JSON, - for stdout",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="SPEC_FILE",
+        help="Auto send following the load-shape profile of this JSON spec file",
+    )
+    parser.add_argument(
+        "--profile-report",
+        type=str,
+        metavar="CSV_FILE",
+        help="Write the target and achieved EPS of every second to this file",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        metavar="FIELD",
+        help="Send events at the offsets of this timestamp field, like rt, then stop",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Speed multiplier of --replay, 10 replays an hour in 6 minutes",
+    )
+    parser.add_argument(
+        "--reorder-window",
+        type=int,
+        default=10000,
+        help="Events buffered to put a --stream --replay back in timestamp order",
+    )
+    parser.add_argument(
+        "--select",
+        choices=["random", "round_robin", "shuffle", "weighted"],
+        default="random",
+        help="How --auto_send picks events from the definition files",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Seed of --select, to repeat a run exactly"
+    )
+    parser.add_argument(
+        "--weight-column",
+        type=str,
+        default="weight",
+        help="The column holding the weight of every event, with --select weighted",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes sending events with --auto_send, sharing the EPS",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Log transport metrics, like socket call latencies, every 10 seconds",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the definition files lazily instead of loading them first",
+    )
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="Processes used to parse and validate the definition files",
+    )
+    parser.add_argument(
+        "--bulk-load",
+        action="store_true",
+        help="Validate the definition files a whole column at a time",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Keep events in a compact form, about half the memory for large files",
+    )
 
     args = parser.parse_args()
+    if args.host is None and args.unix is None:
+        parser.error("one of --host or --unix is required")
+
+    profile = load_profile(args.profile) if args.profile else None
+
+    framing = {"lf": Framing.LF, "octet": Framing.OCTET_COUNTING}.get(args.framing)
+
+    syslog_options = {
+        "framing": framing,
+        "buffer_size": args.tcp_buffer,
+        "flush_interval": 1.0,
+        "header_format": {
+            "rfc3164": HeaderFormat.RFC3164,
+            "rfc5424": HeaderFormat.RFC5424,
+        }.get(args.header),
+    }
+    if args.metrics:
+        syslog_options["metrics_callback"] = CEFSender.log_metrics
+    if args.unix is not None:
+        protocol = "UNIX_STREAM" if args.unix_stream else "UNIX_DGRAM"
+        syslog_options["path"] = args.unix
+    elif args.tls:
+        protocol = "TLS"
+        syslog_options["ssl_context"] = ssl.create_default_context(cafile=args.tls_ca)
+    elif args.tcp:
+        protocol = "TCP"
+    else:
+        protocol = "UDP"
+
+    if args.reconnect:
+        syslog_options["queue_size"] = args.queue_size
+        syslog_options["spill_dir"] = args.spill_dir
 
     cs = CEFSender(
         host=args.host,
         port=args.port,
         files=args.files,
-        protocol="TCP" if args.tcp else "UDP",
+        protocol=protocol,
+        stream=args.stream,
+        workers=args.load_workers,
+        balance=args.balance,
+        hash_field=args.hash_field,
+        reliable=args.reconnect,
+        send_workers=args.workers,
+        selection=args.select,
+        seed=args.seed,
+        weight_column=args.weight_column,
+        bulk_load=args.bulk_load,
+        compact=args.compact,
+        syslog_options=syslog_options,
     )
 
-    if args.auto_send:
-        cs.auto_send_log(args.eps)
-    else:
-        cs.send_logs()
+    def stop(signum, frame):
+        # A second interrupt exits without flushing
+        if cs.stopped:
+            cs.abort()
+            raise KeyboardInterrupt
+        cs.log("Stopping, interrupt again to exit now")
+        cs.stop()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        if args.replay:
+            cs.replay_log(
+                args.replay,
+                speed=args.speed,
+                window=args.reorder_window,
+                duration=args.duration,
+                count=args.count,
+            )
+        elif profile is not None:
+            cs.auto_send_profile(profile, duration=args.duration, count=args.count)
+        elif args.auto_send:
+            cs.auto_send_log(args.eps, duration=args.duration, count=args.count)
+        else:
+            cs.send_logs(count=args.count)
+    finally:
+        cs.close()
+        if args.profile_report:
+            write_samples(cs.profile_samples, args.profile_report)
+        if args.summary == "-":
+            print(json.dumps(cs.summary(), indent=2))
+        elif args.summary:
+            with open(args.summary, "w") as f:
+                json.dump(cs.summary(), f, indent=2)
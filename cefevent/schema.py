@@ -0,0 +1,249 @@
+import re
+import socket
+from types import MappingProxyType
+from typing import Any, AnyStr, Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from cefevent.extensions import extension_dictionary
+
+DATA_TYPES = (
+    "TimeStamp",
+    "IPv4 Address",
+    "String",
+    "Long",
+    "Integer",
+    "MAC Address",
+    "IPv6 Address",
+    "Floating Point",
+)
+
+PREFIXES = (
+    "name",
+    "deviceVendor",
+    "deviceProduct",
+    "signatureId",
+    "version",
+    "deviceVersion",
+    "severity",
+)
+
+
+class CEFField(NamedTuple):
+    """A single, validated CEF extension field definition."""
+
+    name: str
+    full_name: str
+    data_type: Tuple[str, ...]
+    length: int
+    description: str
+    ordinal: int
+    metadata: Mapping[str, Any]
+    validator: Callable[[Any], Any]
+
+
+INT32_MIN, INT32_MAX = -(2**31), 2**31 - 1
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+_mac_re = re.compile("^" + "[\\:\\-]".join(["([0-9a-f]{2})"] * 6) + "$")
+
+
+# Validators return the normalized value, or False if the value is invalid.
+
+
+def _validate_port(value: Any):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return False
+    if not 0 <= value <= 65535:
+        return False
+    return value
+
+
+def _make_int_validator(low: int, high: int):
+    def validate(value: Any):
+        try:
+            value = int(value)
+        except (TypeError, ValueError, OverflowError):
+            return False
+        if not low <= value <= high:
+            return False
+        return value
+
+    return validate
+
+
+def _validate_ipv4(value: Any):
+    if not isinstance(value, str) or value.count(".") != 3:
+        return False
+    try:
+        socket.inet_pton(socket.AF_INET, value)
+    except OSError:
+        return False
+    return value
+
+
+def _validate_ipv6(value: Any):
+    if not isinstance(value, str) or value.count(":") < 2:
+        return False
+    try:
+        socket.inet_pton(socket.AF_INET6, value)
+    except OSError:
+        return False
+    return value
+
+
+def _validate_mac(value: Any):
+    if not isinstance(value, str):
+        return False
+    value = value.strip().lower()
+    if _mac_re.match(value) is None:
+        return False
+    return value
+
+
+def _validate_float(value: Any):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return False
+
+
+def _validate_timestamp(value: Any):
+    return value
+
+
+def _make_string_validator(length: int):
+    def validate(value: Any):
+        value = str(value).strip()
+        if len(value) > length > 0:
+            return False
+        return value.replace("\\", "\\\\").replace("=", "\\=").replace("\n", "\\n")
+
+    return validate
+
+
+def _chain_validators(validators: Tuple[Callable[[Any], Any], ...]):
+    def validate(value: Any):
+        for validator in validators:
+            v = validator(value)
+            if v is not False:
+                return v
+        return False
+
+    return validate
+
+
+def compile_validator(full_name: AnyStr, data_type: Tuple[AnyStr, ...], length: int):
+    """
+    Build the validator callable for a field definition.
+
+    Arguments:
+    - full_name (`str`): The ArcSight name of the field, ports are detected by their "Port" suffix.
+    - data_type (`tuple`): The data types accepted by the field, tried in order.
+    - length (`int`): The maximum length of string values, 0 means unbounded.
+
+    """
+
+    if full_name.endswith("Port"):
+        return _validate_port
+
+    validators = []
+    for dt in data_type:
+        if dt == "Integer":
+            validators.append(_make_int_validator(INT32_MIN, INT32_MAX))
+        elif dt == "Long":
+            validators.append(_make_int_validator(INT64_MIN, INT64_MAX))
+        elif dt == "IPv4 Address":
+            validators.append(_validate_ipv4)
+        elif dt == "IPv6 Address":
+            validators.append(_validate_ipv6)
+        elif dt == "MAC Address":
+            validators.append(_validate_mac)
+        elif dt == "String":
+            validators.append(_make_string_validator(length))
+        elif dt == "Floating Point":
+            validators.append(_validate_float)
+        else:
+            validators.append(_validate_timestamp)
+
+    if len(validators) == 1:
+        return validators[0]
+    return _chain_validators(tuple(validators))
+
+
+class CEFSchema(object):
+    """
+    Immutable view over the CEF extension dictionary.
+
+    The schema is built and validated once and shared by every CEFEvent, so
+    creating an event does not need to walk the extension dictionary again.
+    """
+
+    def __init__(self, dictionary: Dict[AnyStr, Dict[AnyStr, Any]]):
+        """
+        Build a new CEFSchema.
+
+        Arguments:
+        - dictionary (`dict`): Mapping of CEF short names to field definitions,
+          in the same format as `cefevent.extensions.extension_dictionary`.
+
+        """
+
+        fields = []
+        for ordinal, (name, definition) in enumerate(dictionary.items()):
+            fields.append(self._build_field(ordinal, name, definition))
+
+        self.fields = tuple(fields)
+        self.prefixes = PREFIXES
+
+        self.by_name = MappingProxyType({f.name: f for f in self.fields})
+        self.by_full_name = MappingProxyType({f.full_name: f for f in self.fields})
+
+        # Full names take precedence, mirroring the lookup order of CEFEvent.set_field
+        lookup = dict(self.by_name)
+        lookup.update(self.by_full_name)
+        self.lookup = MappingProxyType(lookup)
+
+    @staticmethod
+    def _build_field(ordinal: int, name: AnyStr, definition: Dict[AnyStr, Any]):
+        data_type = tuple(definition["data_type"])
+        for dt in data_type:
+            if dt not in DATA_TYPES:
+                raise ValueError(
+                    "Invalid data_type in item {}: {}".format(name, data_type)
+                )
+        try:
+            length = int(definition["length"])
+        except (TypeError, ValueError):
+            raise ValueError(
+                "Invalid length in item {}: {}".format(name, definition["length"])
+            )
+
+        metadata = dict(definition)
+        metadata["name"] = name
+
+        full_name = definition["full_name"]
+
+        return CEFField(
+            name=name,
+            full_name=full_name,
+            data_type=data_type,
+            length=length,
+            description=definition.get("description", ""),
+            ordinal=ordinal,
+            metadata=MappingProxyType(metadata),
+            validator=compile_validator(full_name, data_type, length),
+        )
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __contains__(self, field: AnyStr):
+        return field in self.lookup
+
+    def get(self, field: AnyStr) -> Optional[CEFField]:
+        """Return the field definition for a short or full name, or None."""
+        return self.lookup.get(field)
+
+
+schema = CEFSchema(extension_dictionary)
@@ -0,0 +1,167 @@
+"""
+Event selection strategies.
+
+A selector picks the next event to send from the poll. Every selector draws
+from its own random.Random, so a load test with the same seed sends the same
+sequence of events again.
+"""
+
+import random
+from typing import Any, AnyStr, List, Sequence
+
+
+class Selection:
+    """Strategies to pick the next event from the poll"""
+
+    # Uniformly at random, with replacement
+    RANDOM = "random"
+    # Every event in turn, in file order
+    ROUND_ROBIN = "round_robin"
+    # Every event once per epoch, in a new random order every epoch
+    SHUFFLE = "shuffle"
+    # At random, proportionally to the weight column of the definition files
+    WEIGHTED = "weighted"
+
+
+class RandomSelector(object):
+    def __init__(self, events: Sequence, rng: random.Random):
+        self.events = events
+        self.rng = rng
+
+    def __call__(self):
+        return self.rng.choice(self.events)
+
+
+class RoundRobinSelector(object):
+    def __init__(self, events: Sequence, start: int = 0):
+        self.events = events
+        self.idx = start % len(events)
+
+    def __call__(self):
+        ev = self.events[self.idx]
+        self.idx += 1
+        if self.idx == len(self.events):
+            self.idx = 0
+        return ev
+
+
+class ShuffleSelector(object):
+    def __init__(self, events: Sequence, rng: random.Random):
+        self.order = list(events)
+        self.rng = rng
+        self.epoch = 0
+        self.idx = len(self.order)
+
+    def __call__(self):
+        if self.idx == len(self.order):
+            self.rng.shuffle(self.order)
+            self.epoch += 1
+            self.idx = 0
+        ev = self.order[self.idx]
+        self.idx += 1
+        return ev
+
+
+class AliasTable(object):
+    """
+    Sample indexes proportionally to weights in O(1), with Vose's alias method.
+
+    The table has one column per index: a column keeps its own index with
+    probability `prob[i]`, and gives `alias[i]` otherwise. Building it is O(n).
+    """
+
+    def __init__(self, weights: List[float], rng: random.Random):
+        """
+        Arguments:
+        - weights (`list`): The non-negative weight of every index, not all 0.
+        - rng (`random.Random`): The random number generator to sample with.
+
+        """
+
+        count = len(weights)
+        total = float(sum(weights))
+        if not count or total <= 0 or any(w < 0 for w in weights):
+            raise ValueError("The weights must be non-negative and not all 0")
+
+        self.rng = rng
+        self.prob = [0.0] * count
+        self.alias = list(range(count))
+
+        scaled = [w * count / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            # The large column gives what the small one was missing
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # What is left is 1 up to float rounding
+        for idx in small + large:
+            self.prob[idx] = 1.0
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self) -> int:
+        # One draw picks the column with its integer part, and the side with the rest
+        u = self.rng.random() * len(self.prob)
+        idx = int(u)
+        if u - idx < self.prob[idx]:
+            return idx
+        return self.alias[idx]
+
+
+class WeightedSelector(object):
+    def __init__(self, events: Sequence, weights: List[float], rng: random.Random):
+        if len(weights) != len(events):
+            raise ValueError(
+                "Got {} weights for {} events".format(len(weights), len(events))
+            )
+        self.events = events
+        self.table = AliasTable(weights, rng)
+
+    def __call__(self):
+        return self.events[self.table.sample()]
+
+
+def make_selector(
+    selection: AnyStr,
+    events: Sequence,
+    seed: Any = None,
+    weights: List[float] = None,
+    start: int = 0,
+):
+    """
+    Return a callable returning the next event to send.
+
+    Arguments:
+    - selection (`str`): One of the Selection strategies.
+    - events (`list`): The poll to pick events from.
+    - seed (`int` or `str`): The seed of the random number generator, None seeds it
+      from the system.
+    - weights (`list`): The weight of every event, for Selection.WEIGHTED.
+    - start (`int`): The first event of Selection.ROUND_ROBIN.
+
+    """
+
+    if not events:
+        raise ValueError("No events to select from")
+
+    rng = random.Random(seed)
+    if selection == Selection.RANDOM:
+        return RandomSelector(events, rng)
+    if selection == Selection.ROUND_ROBIN:
+        return RoundRobinSelector(events, start)
+    if selection == Selection.SHUFFLE:
+        return ShuffleSelector(events, rng)
+    if selection == Selection.WEIGHTED:
+        if weights is None:
+            raise ValueError("Weighted selection needs the weight of every event")
+        return WeightedSelector(events, weights, rng)
+    raise ValueError("Invalid selection strategy {}".format(selection))
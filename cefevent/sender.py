@@ -1,23 +1,122 @@
-import random
+import itertools
+import json
+import multiprocessing
+import os
 import sched
+import signal
 import time
 from datetime import datetime
 from typing import List, AnyStr, Any, Callable
 
-from cefevent.event import CEFEvent
-from cefevent.syslog import Syslog
+from cefevent.balancer import Balance, MultiSyslog
+from cefevent.delivery import ReliableSyslog
+from cefevent.encoder import CEFEncoder
+from cefevent.event import CEFEvent, CompactCEFEvent
+from cefevent.loader import LoadStats, iter_events, load_events, load_weights
+from cefevent.metrics import percentile
+from cefevent.pacer import TokenBucket
+from cefevent.replay import ReplayStats, order_by_timestamp
+from cefevent.selection import Selection, make_selector
+from cefevent.profiles import (
+    Constant,
+    Profile,
+    ProfileSample,
+    Scaled,
+    saturation_point,
+)
+from cefevent.syslog import DATAGRAM_PROTOCOLS, Syslog
 
 
 class CEFSender(object):
     def __init__(
-        self, files: List[AnyStr], host: AnyStr, port: int, protocol: AnyStr = "UDP"
+        self,
+        files: List[AnyStr],
+        host: AnyStr,
+        port: int,
+        protocol: AnyStr = "UDP",
+        stream: bool = False,
+        workers: int = 1,
+        syslog_options: dict = None,
+        balance: AnyStr = Balance.ROUND_ROBIN,
+        hash_field: AnyStr = None,
+        reliable: bool = False,
+        send_workers: int = 1,
+        selection: AnyStr = Selection.RANDOM,
+        seed: Any = None,
+        weight_column: AnyStr = "weight",
+        bulk_load: bool = False,
+        compact: bool = False,
     ):
+        """
+        Create a new CEFSender.
+
+        Arguments:
+        - files (`list`): The definition files to load events from.
+        - host (`str` or `list`): Syslog destination host. A list, or a comma separated
+          string, of "host:port" destinations spreads events across several collectors.
+        - port (`int`): Syslog destination port, for destinations without one.
+        - protocol (`str`): UDP, TCP, TLS, UNIX_DGRAM or UNIX_STREAM. The socket path of
+          UNIX_DGRAM and UNIX_STREAM, /dev/log by default, is set in syslog_options.
+        - stream (`bool`): Set to True to read the definition files lazily while sending,
+          instead of loading every event in the poll first.
+        - workers (`int`): How many processes to use when loading the poll.
+        - syslog_options (`dict`): Extra keyword arguments for Syslog, like framing.
+        - balance (`str`): How to spread events across several destinations, see Balance.
+        - hash_field (`str`): The field hashed by Balance.HASH, like "src".
+        - reliable (`bool`): Set to True to reconnect to TCP collectors and queue events
+          while they are unreachable, see ReliableSyslog. syslog_options can then hold
+          queue_size and spill_dir.
+        - send_workers (`int`): How many processes send events in auto_send_log, each
+          with its own connection and an even share of the EPS. Needs fork, so POSIX.
+        - selection (`str`): How auto send picks events from the poll, see Selection.
+        - seed (`int` or `str`): The seed of the selection, so a run can be repeated
+          exactly. Send workers use "seed:index".
+        - weight_column (`str`): The column holding the weight of every event, with
+          Selection.WEIGHTED.
+        - bulk_load (`bool`): Set to True to validate the poll a whole column at a
+          time, and log the invalid values of every column, see validate_columns.
+        - compact (`bool`): Set to True to load events as CompactCEFEvent, which takes
+          about half the memory of CEFEvent in large polls.
+
+        """
+
+        if send_workers > 1 and stream:
+            raise ValueError("Streaming is not supported with several send workers")
+        if selection not in (
+            Selection.RANDOM,
+            Selection.ROUND_ROBIN,
+            Selection.SHUFFLE,
+            Selection.WEIGHTED,
+        ):
+            raise ValueError("Invalid selection strategy {}".format(selection))
+        if stream and selection != Selection.RANDOM:
+            raise ValueError("Streamed events are always sent in file order")
+
+        self.files = files
+        self.stream = stream
+        self.event_class = CompactCEFEvent if compact else CEFEvent
+        self.send_workers = send_workers
+        self.load_stats = LoadStats()
+        self._stream_events = None
 
         self.cef_poll = []
         self.host = host
         self.port = port
         self.protocol = protocol
-        self.syslog = Syslog(host, port=port, protocol=self.protocol)
+        self.syslog_options = syslog_options or {}
+        self.hash_field = hash_field
+        self.balance = balance
+        self.reliable = reliable
+        self.selection = selection
+        self.seed = seed
+        self.weight_column = weight_column
+        # The weight of every event of the poll, with Selection.WEIGHTED
+        self.weights = None
+        self._select = None
+        self.syslog = self.open_syslog()
+        # The key is only used to balance several destinations
+        self._hash_field = hash_field if isinstance(self.syslog, MultiSyslog) else None
+        self.encoder = CEFEncoder()
 
         self.max_eps = 100
 
@@ -30,40 +129,129 @@ class CEFSender(object):
 
         self.checkpoint_sent_count = 0
 
-        self.scheduler = sched.scheduler(time.time, time.sleep)
+        # The target and achieved EPS of the last auto send, see auto_send_profile
+        self.profile_samples = []
+        # The lag of the last replay, see replay_log
+        self.replay_stats = ReplayStats()
+        # The achieved EPS of every sample_interval of the last run, see summary
+        self.interval_eps = []
+        # The monotonic start and end times of the last run
+        self.run_start = None
+        self.run_end = None
+        # sent_count at the start of the last run
+        self.run_sent = 0
+        # Set by stop(), the send loops return at their next wakeup
+        self.stopped = False
+        # Set by abort(), buffered events are dropped instead of flushed
+        self.aborted = False
 
-        for fn in files:
-            with open(fn, "r") as f:
-                lines = f.readlines()
+        self.scheduler = sched.scheduler(time.time, time.sleep)
 
-                headers = [i.strip() for i in lines[0].split(";")]
+        if not self.stream:
+            self.cef_poll = load_events(
+                files,
+                workers=workers,
+                stats=self.load_stats,
+                cls=self.event_class,
+                bulk=bulk_load,
+            )
+            if selection == Selection.WEIGHTED:
+                self.weights = load_weights(files, weight_column)
 
-                for line in lines[1:]:
-                    line = line.strip()
-                    fields = [i.strip() for i in line.split(";")]
-                    if len(fields) != len(headers):
-                        continue
-                    cef = CEFEvent()
-                    cef.load(headers, fields)
-                    self.cef_poll.append(cef)
+    def open_syslog(self):
+        """Create the syslog client, or clients, of the sender"""
+        host = self.host
+        syslog_class = ReliableSyslog if self.reliable else Syslog
+        if isinstance(host, str) and "," in host:
+            host = [h.strip() for h in host.split(",")]
+        if isinstance(host, (list, tuple)):
+            return MultiSyslog(
+                host,
+                port=self.port,
+                balance=self.balance,
+                syslog_class=syslog_class,
+                protocol=self.protocol,
+                **self.syslog_options
+            )
+        return syslog_class(
+            host, port=self.port, protocol=self.protocol, **self.syslog_options
+        )
 
     def get_cef_poll(self):
         self.log(self.cef_poll)
 
     def get_info(self):
-        self.log(
-            "There are {} events in the poll. The max EPS is set to {}".format(
-                len(self.cef_poll), self.max_eps
+        if self.stream:
+            self.log(
+                "Streaming events from {} files. The max EPS is set to {}".format(
+                    len(self.files), self.max_eps
+                )
+            )
+        else:
+            self.log(
+                "There are {} events in the poll. The max EPS is set to {}".format(
+                    len(self.cef_poll), self.max_eps
+                )
             )
-        )
+
+    def get_skipped_rows(self):
+        if self.load_stats.skipped:
+            self.log(
+                "{} rows skipped for column count mismatch".format(
+                    self.load_stats.skipped
+                )
+            )
+        for header, count in self.load_stats.invalid.items():
+            self.log("{} invalid {} values left out".format(count, header))
 
     def send_log(self, cef: CEFEvent):
-        self.syslog.send(cef.build_cef())
+        if self._hash_field is None:
+            self.syslog.send_bytes(cef.to_bytes())
+        else:
+            self.syslog.send_bytes(cef.to_bytes(), key=cef.get_field(self._hash_field))
         self.sent_count += 1
         self.checkpoint_sent_count += 1
 
     def send_random_log(self, *args, **kw):
-        self.send_log(random.choice(self.cef_poll))
+        """Send the next event of the poll, picked by the selection strategy"""
+        if self._select is None:
+            self._select = self.make_selector()
+        self.send_log(self._select())
+
+    def make_selector(self, worker: int = None):
+        """
+        Return the selector of the poll, see make_selector.
+
+        Arguments:
+        - worker (`int`): The index of a send worker, which gets its own seed, and
+          starts round-robin at its share of the poll.
+
+        """
+
+        seed, start = self.seed, 0
+        if worker is not None:
+            if seed is not None:
+                seed = "{}:{}".format(seed, worker)
+            start = worker * len(self.cef_poll) // self.send_workers
+        return make_selector(
+            self.selection, self.cef_poll, seed=seed, weights=self.weights, start=start
+        )
+
+    def send_next_log(self, *args, **kw):
+        """Send the next streamed event, starting over when the files are exhausted"""
+        if self._stream_events is not None:
+            ev = next(self._stream_events, None)
+            if ev is not None:
+                self.send_log(ev)
+                return
+
+        # Every pass reads the same files, their rows are counted on the first one
+        stats = self.load_stats if self._stream_events is None else LoadStats()
+        self._stream_events = iter_events(self.files, stats, cls=self.event_class)
+        ev = next(self._stream_events, None)
+        if ev is None:
+            raise ValueError("No events found in {}".format(self.files))
+        self.send_log(ev)
 
     def timed_call(self, calls_per_second: float, callback: Callable, *args, **kw):
         period = 1.0 / calls_per_second
@@ -74,16 +262,54 @@ class CEFSender(object):
 
         self.scheduler.enter(period, 0, reload, ())
 
-    def get_eps(self):
+    def _flush(self):
+        # Datagrams are never buffered, and nothing is flushed once aborted
+        if self.protocol not in DATAGRAM_PROTOCOLS and not self.aborted:
+            self.syslog.flush()
+
+    def get_eps(self, target: float = None):
+        self._flush()
+
         now = datetime.now()
         time_diff = (now - self.auto_send_checkpoint).total_seconds()
         eps = self.checkpoint_sent_count / (time_diff if time_diff > 0 else 1)
 
-        self.log("Current EPS: {}".format(eps))
+        if target is None or target == self.max_eps:
+            self.log("Current EPS: {}".format(eps))
+        else:
+            self.log("Current EPS: {} (target {:.0f})".format(eps, target))
+        self.get_destination_stats()
+        self.get_delivery_stats()
 
         self.auto_send_checkpoint = now
         self.checkpoint_sent_count = 0
 
+    def get_destination_stats(self):
+        if isinstance(self.syslog, MultiSyslog):
+            for stats in self.syslog.stats():
+                self.log(
+                    "{destination}: {messages} events, {bytes} bytes".format(**stats)
+                )
+
+    def get_delivery_stats(self):
+        for client in self._clients():
+            if isinstance(client, ReliableSyslog) and (
+                client.stats.reconnects or not client.connected
+            ):
+                self.log(
+                    "{}:{} {}, {}".format(
+                        client.host,
+                        client.port,
+                        "connected" if client.connected else "disconnected",
+                        client.stats,
+                    )
+                )
+
+    @classmethod
+    def log_metrics(cls, snapshot: dict):
+        """A TransportMetrics callback, logging the snapshot as JSON"""
+        cls.log("Transport metrics: {}".format(json.dumps(snapshot)))
+
     @staticmethod
     def log(msg: Any):
         now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
@@ -94,16 +320,494 @@ class CEFSender(object):
             "{} events sent since {}".format(self.sent_count, self.auto_send_start)
         )
 
-    def auto_send_log(self, eps: int):
-        self.max_eps = eps
+    # Seconds between two reports of the EPS, and of the total event count
+    eps_report_interval = 10
+    total_report_interval = 62.5
+
+    def auto_send_log(self, eps: float, duration: float = None, count: int = None):
+        """
+        Send events picked from the poll by the selection strategy, or the streamed
+        events in order, until interrupted or stopped.
+
+        Events are paced by a TokenBucket, so every wakeup sends a burst of the
+        events due since the previous one, and the achieved EPS stays close to
+        the target up to what the transport can take.
+
+        Arguments:
+        - eps (`float`): The target events per second.
+        - duration (`float`): Stop after this many seconds instead of when interrupted.
+        - count (`int`): Stop after sending this many events.
+
+        """
+
+        self.auto_send_profile(Constant(eps), duration=duration, count=count)
+
+    # Seconds between two samples of the target and achieved EPS of a profile
+    sample_interval = 1.0
+    # The longest sleep of the rate loop, so a changing target is followed closely
+    profile_resolution = 0.1
+
+    def auto_send_profile(
+        self, profile: Profile, duration: float = None, count: int = None
+    ):
+        """
+        Send events like auto_send_log, at the target EPS given by a load-shape
+        profile over time, until the profile ends, interrupted or stopped.
+
+        The target and achieved EPS of every sample_interval are kept in
+        profile_samples, and the first sample the sender fell behind on is logged
+        at the end, see saturation_point.
+
+        Arguments:
+        - profile (`Profile`): The target EPS over time, like Ramp or Sine.
+        - duration (`float`): Stop after this many seconds, defaults to the length of
+          the profile.
+        - count (`int`): Stop after sending this many events.
+
+        """
+
+        if profile.peak_rate() <= 0:
+            raise ValueError("The profile never sends events: {!r}".format(profile))
+        if duration is None:
+            duration = profile.duration
+
+        self.max_eps = profile.peak_rate()
         self.get_info()
-        self.auto_send_start = datetime.now()
-        self.timed_call(eps, self.send_random_log)
-        self.timed_call(0.1, self.get_eps)
-        self.timed_call(0.016, self.get_total_event_count)
-        self.scheduler.run()
-
-    def send_logs(self):
-        for ev in self.cef_poll:
-            self.send_log(ev)
+        self.get_skipped_rows()
+        self.auto_send_start = self.auto_send_checkpoint = datetime.now()
+        self.profile_samples = []
+        if self.send_workers > 1:
+            self.auto_send_workers(profile, duration=duration, count=count)
+            return
+
+        send = self.send_next_log if self.stream else self.send_random_log
+        start = sample_start = self._start_run()
+        first_sent = sample_sent = self.sent_count
+        next_sample = start + self.sample_interval
+        next_eps = start + self.eps_report_interval
+        next_total = start + self.total_report_interval
+        try:
+            for now, due in self._paced(profile, start):
+                if self.stopped or (duration is not None and now - start >= duration):
+                    break
+                if count is not None:
+                    due = min(due, count - (self.sent_count - first_sent))
+                for _ in range(due):
+                    send()
+                if count is not None and self.sent_count - first_sent >= count:
+                    break
+
+                if now >= next_sample:
+                    # Keep the sample schedule, an oversleep is not carried over
+                    next_sample += self.sample_interval
+                    self._add_sample(
+                        profile, start, sample_start, now, self.sent_count - sample_sent
+                    )
+                    sample_start, sample_sent = now, self.sent_count
+                if now >= next_eps:
+                    next_eps = now + self.eps_report_interval
+                    self.get_eps(target=profile.rate(now - start))
+                if now >= next_total:
+                    next_total = now + self.total_report_interval
+                    self.get_total_event_count()
+        finally:
+            self.run_end = time.monotonic()
+            self._flush()
+            if self.stream:
+                self.get_skipped_rows()
+            self.get_saturation()
+
+    def _start_run(self):
+        self.interval_eps = []
+        self.stopped = False
+        self.aborted = False
+        self.run_sent = self.sent_count
+        self.run_start = time.monotonic()
+        self.run_end = None
+        return self.run_start
+
+    def _paced(self, profile: Profile, start: float, tick: float = 0.001):
+        """Yield the monotonic time and the number of events due, at every wakeup"""
+        bucket = TokenBucket(profile.peak_rate(), tick=tick)
+        while True:
+            now = time.monotonic()
+            target = profile.rate(now - start)
+            if target != bucket.rate:
+                bucket.set_rate(target)
+            yield now, bucket.take()
+            self.syslog.flush_if_due()
+            time.sleep(min(max(bucket.delay(), tick), self.profile_resolution))
+
+    def _add_sample(
+        self, profile: Profile, start: float, sample_start: float, now: float, sent: int
+    ):
+        self.profile_samples.append(
+            ProfileSample(
+                sample_start - start,
+                profile.mean_rate(sample_start - start, now - start),
+                self._add_interval(sample_start, now, sent),
+            )
+        )
+
+    def _add_interval(self, sample_start: float, now: float, sent: int) -> float:
+        eps = sent / (now - sample_start)
+        self.interval_eps.append(eps)
+        return eps
+
+    def get_saturation(self):
+        sample = saturation_point(self.profile_samples)
+        if sample is not None:
+            self.log(
+                "The achieved EPS fell behind the target at {:.0f} EPS, {:.0f} "
+                "achieved, {:.1f}s into the run".format(
+                    sample.target, sample.achieved, sample.time
+                )
+            )
+
+    def auto_send_workers(
+        self,
+        eps: Any,
+        report_interval: float = 10,
+        duration: float = None,
+        count: int = None,
+    ):
+        """
+        Send events picked from the poll by forked worker processes, until
+        interrupted or stopped.
+
+        The poll is shared with the workers by fork. Every worker opens its own
+        connection and sends an even share of the target EPS, and the parent
+        logs the aggregated EPS of all workers.
+
+        Arguments:
+        - eps (`float` or `Profile`): The target events per second of all the workers
+          together, or a load-shape profile.
+        - report_interval (`float`): How often to log the achieved EPS, in seconds.
+        - duration (`float`): Stop after this many seconds instead of when interrupted.
+        - count (`int`): Stop after sending this many events, split evenly across the
+          workers.
+
+        """
+
+        profile = eps if isinstance(eps, Profile) else Constant(eps)
+        share = Scaled(profile, 1.0 / self.send_workers)
+        ctx = multiprocessing.get_context("fork")
+        counts = ctx.Array("q", self.send_workers, lock=False)
+        stop = ctx.Event()
+        # The monotonic clock is shared by the processes, so are the profile times
+        start = self._start_run()
+        if count is None:
+            limits = [None] * self.send_workers
+        else:
+            limits = [
+                count // self.send_workers + (idx < count % self.send_workers)
+                for idx in range(self.send_workers)
+            ]
+        workers = [
+            ctx.Process(
+                target=self._send_worker,
+                args=(idx, share, start, limits[idx], counts, stop),
+                daemon=True,
+            )
+            for idx in range(self.send_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        total_interval = report_interval * 6
+        sample_start = last_eps = last_total = next_sample = start
+        sample_sent = eps_sent = self.sent_count
+        try:
+            while any(worker.is_alive() for worker in workers):
+                if self.stopped:
+                    break
+                if duration is not None and time.monotonic() - start >= duration:
+                    break
+                # Wake up early when every worker is done, like after count events
+                next_sample += self.sample_interval
+                for worker in workers:
+                    worker.join(max(0.0, next_sample - time.monotonic()))
+                now = time.monotonic()
+                self.sent_count = self.run_sent + sum(counts)
+                self._add_sample(
+                    profile, start, sample_start, now, self.sent_count - sample_sent
+                )
+                sample_start, sample_sent = now, self.sent_count
+
+                if now - last_eps >= report_interval:
+                    self.log(
+                        "Current EPS: {} ({} workers, target {:.0f})".format(
+                            (self.sent_count - eps_sent) / (now - last_eps),
+                            self.send_workers,
+                            profile.rate(now - start),
+                        )
+                    )
+                    last_eps, eps_sent = now, self.sent_count
+                if now - last_total >= total_interval:
+                    last_total = now
+                    self.get_total_event_count()
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(5)
+                if worker.is_alive():
+                    worker.terminate()
+            self.sent_count = self.run_sent + sum(counts)
+            self.run_end = time.monotonic()
+            self.get_total_event_count()
+            self.get_saturation()
+
+    # The shortest sleep of a send worker between two bursts
+    worker_tick = 0.005
+
+    def _send_worker(
+        self,
+        index: int,
+        profile: Profile,
+        start: float,
+        limit: Any,
+        counts: Any,
+        stop: Any,
+    ):
+        # The parent stops the workers, do not die on the Ctrl-C of the process group
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Otherwise every worker would send the same sequence
+        self._select = self.make_selector(index)
+        # Close the copy of the parent connection without flushing its buffer, queue
+        # or spill log, they are the parent's. Every worker has its own connection
+        self.syslog.detach()
+        if self.syslog_options.get("spill_dir") is not None:
+            # And its own spill log, see SpillLog
+            self.syslog_options = dict(
+                self.syslog_options,
+                spill_dir=os.path.join(
+                    self.syslog_options["spill_dir"], "w{}".format(index)
+                ),
+            )
+        self.syslog = self.open_syslog()
+
+        sent = 0
+        for _, due in self._paced(profile, start, tick=self.worker_tick):
+            # stopped is set by the signal handlers inherited from the parent
+            if stop.is_set() or self.stopped:
+                break
+            if limit is not None:
+                due = min(due, limit - sent)
+            for _ in range(due):
+                self.send_random_log()
+            sent += due
+            counts[index] = sent
+            if sent == limit:
+                break
+
+        self.syslog.close()
+
+    def replay_log(
+        self,
+        field: AnyStr = "rt",
+        speed: float = 1.0,
+        window: int = 10000,
+        duration: float = None,
+        tick: float = 0.001,
+        count: int = None,
+    ) -> ReplayStats:
+        """
+        Replay the events in the order of a timestamp field, each at its original
+        offset from the first one divided by `speed`, then stop.
+
+        The poll is sorted first. Streamed files go through a reorder buffer of
+        `window` events, see order_by_timestamp. The lag of the events behind
+        their schedule is logged with the EPS and at the end, see ReplayStats.
+
+        Arguments:
+        - field (`str`): The timestamp field, like rt, start or end.
+        - speed (`float`): The speed multiplier, 10 replays an hour in 6 minutes.
+        - window (`int`): The size of the reorder buffer when streaming.
+        - duration (`float`): Stop after this many seconds, instead of after the last
+          event.
+        - tick (`float`): Events due in less than this many seconds are sent without
+          sleeping.
+        - count (`int`): Stop after sending this many events.
+
+        """
+
+        if speed <= 0:
+            raise ValueError("The speed must be positive, not {}".format(speed))
+
+        self.log("Replaying events by {} at {}x speed".format(field, speed))
+        self.auto_send_start = self.auto_send_checkpoint = datetime.now()
+        stats = self.replay_stats = ReplayStats()
+        if self.stream:
+            events = iter_events(self.files, self.load_stats, cls=self.event_class)
+        else:
+            events = self.cef_poll
+            window = None
+
+        self._start_run()
+        start = first = None
+        try:
+            for ts, ev in order_by_timestamp(events, field, window, stats):
+                now = time.monotonic()
+                if start is None:
+                    start = sample_start = now
+                    first = ts
+                    sample_sent = self.sent_count
+                    next_sample = now + self.sample_interval
+                    next_eps = now + self.eps_report_interval
+                due = start + (ts - first) / speed
+                if duration is not None and due - start >= duration:
+                    break
+                # Events already sent are due, do not hold them in the buffer
+                # across the gap
+                if due - now >= tick and self.protocol not in DATAGRAM_PROTOCOLS:
+                    self.syslog.flush()
+                # Sleep in short steps, so stop() is noticed during long gaps
+                while due - now >= tick and not self.stopped:
+                    time.sleep(min(due - now, self.profile_resolution))
+                    now = time.monotonic()
+                if self.stopped:
+                    break
+
+                self.send_log(ev)
+                stats.record(now - due)
+                if count is not None and stats.sent >= count:
+                    break
+
+                if now >= next_sample:
+                    next_sample += self.sample_interval
+                    self._add_interval(sample_start, now, self.sent_count - sample_sent)
+                    sample_start, sample_sent = now, self.sent_count
+                if now >= next_eps:
+                    next_eps = now + self.eps_report_interval
+                    self.get_eps()
+                    self.get_replay_stats()
+        finally:
+            self.run_end = time.monotonic()
+            self._flush()
+            self.get_total_event_count()
+            self.get_replay_stats()
+            self.get_skipped_rows()
+        return stats
+
+    def get_replay_stats(self):
+        self.log("Replay stats: {}".format(json.dumps(self.replay_stats.as_dict())))
+
+    # Events encoded at once by send_logs, only one batch is held encoded
+    send_batch_size = 1024
+
+    def send_logs(self, count: int = None):
+        """
+        Send every event of the definition files once, until stopped.
+
+        Arguments:
+        - count (`int`): Stop after sending this many events.
+
+        """
+
+        self._start_run()
+        if self.stream:
+            events = iter_events(self.files, self.load_stats, cls=self.event_class)
+        else:
+            events = self.cef_poll
+        if count is not None:
+            events = itertools.islice(events, count)
+
+        if self.stream or self._hash_field is not None:
+            for ev in events:
+                if self.stopped:
+                    break
+                self.send_log(ev)
+        else:
+            events = iter(events)
+            while not self.stopped:
+                batch = self.encoder.encode_many(
+                    itertools.islice(events, self.send_batch_size)
+                )
+                if not batch:
+                    break
+                for data in batch:
+                    if self.stopped:
+                        break
+                    self.syslog.send_bytes(data)
+                    self.sent_count += 1
+                    self.checkpoint_sent_count += 1
+        self.run_end = time.monotonic()
+        self._flush()
         self.log("{} events sent".format(self.sent_count))
+        self.get_skipped_rows()
+
+    def stop(self):
+        """Make the running send loop return at its next wakeup, like on SIGTERM"""
+        self.stopped = True
+
+    def abort(self):
+        """Like stop, and drop the buffered events instead of flushing them on close"""
+        self.stopped = True
+        self.aborted = True
+
+    def _clients(self):
+        if isinstance(self.syslog, MultiSyslog):
+            return self.syslog.clients
+        return [self.syslog]
+
+    def summary(self):
+        """
+        Return the statistics of the last run as a dict, ready for JSON.
+
+        - sent (`int`): Events sent by the last run.
+        - wall_seconds (`float`): The length of the run, loading excluded.
+        - eps (`dict`): The mean EPS of the run, and the p50 and p99 of the EPS of
+          every sample_interval, None for send_logs, which is not sampled.
+        - stopped (`bool`): Whether the run was cut short by stop().
+        - load (`dict`): Definition file rows loaded and skipped.
+        - transport (`list`): The TransportMetrics snapshot of every destination, since
+          the sender was created, not available from the parent of send workers.
+        - delivery (`list`): The DeliveryStats of every ReliableSyslog destination.
+        - replay (`dict`): The ReplayStats of replay_log.
+        """
+
+        end = self.run_end if self.run_end is not None else time.monotonic()
+        wall = end - self.run_start if self.run_start is not None else 0.0
+        sent = self.sent_count - self.run_sent
+        summary = {
+            "sent": sent,
+            "wall_seconds": wall,
+            "eps": {
+                "mean": sent / wall if wall > 0 else 0.0,
+                "p50": percentile(self.interval_eps, 50),
+                "p99": percentile(self.interval_eps, 99),
+                "intervals": len(self.interval_eps),
+                "interval_seconds": self.sample_interval,
+            },
+            "stopped": self.stopped,
+            "selection": self.selection,
+            "seed": self.seed,
+            "load": {
+                "rows": self.load_stats.rows,
+                "loaded": self.load_stats.loaded,
+                "skipped": self.load_stats.skipped,
+            },
+        }
+
+        clients = self._clients()
+        if self.send_workers <= 1:
+            summary["transport"] = [
+                dict(destination="{}:{}".format(c.host, c.port), **c.metrics.snapshot())
+                for c in clients
+            ]
+        summary["delivery"] = [
+            dict(destination="{}:{}".format(c.host, c.port), **c.stats.as_dict())
+            for c in clients
+            if isinstance(c, ReliableSyslog)
+        ]
+        if self.replay_stats.sent or self.replay_stats.skipped:
+            summary["replay"] = self.replay_stats.as_dict()
+        return summary
+
+    def close(self):
+        """Flush and close the syslog connections, or only close them after abort"""
+        if self.aborted:
+            self.syslog.detach()
+            return
+        self.syslog.close()
+        self.get_delivery_stats()
@@ -2,15 +2,29 @@
 Remote syslog client.
 
 Works by sending UDP messages to a remote syslog server. The remote server
-must be configured to accept logs from the network.
+must be configured to accept logs from the network. TCP, TLS, and Unix domain
+sockets of a local agent such as /dev/log are also supported.
 
 License: PUBLIC DOMAIN
 Author: Christian Stigen Larsen
 
-For more information, see RFC 3164.
+For more information, see RFC 3164 and RFC 5424 for the headers, RFC 6587 for
+framing over TCP, and RFC 5425 for TLS.
 """
 
+import os
 import socket
+import ssl
+import sys
+import time
+
+from cefevent.metrics import TransportMetrics
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # not available on Windows
+    fcntl = termios = None
 
 
 class Facility:
@@ -40,6 +54,133 @@ class Level:
     EMERG, ALERT, CRIT, ERR, WARNING, NOTICE, INFO, DEBUG = range(8)
 
 
+class Framing:
+    """Framing of messages on stream transports (RFC 6587)"""
+
+    NONE = None
+    LF = "LF"
+    OCTET_COUNTING = "OCTET_COUNTING"
+
+
+class HeaderFormat:
+    """Syslog headers written before the message, after the <PRI> part"""
+
+    NONE = None
+    RFC3164 = "RFC3164"
+    RFC5424 = "RFC5424"
+
+
+PROTOCOLS = ("UDP", "TCP", "TLS", "UNIX_DGRAM", "UNIX_STREAM")
+
+# One message per datagram, without framing nor buffering
+DATAGRAM_PROTOCOLS = ("UDP", "UNIX_DGRAM")
+
+# Max buffers per sendmsg call, the usual IOV_MAX
+_MAX_IOV = 1024
+
+
+def format_message(message, level, facility):
+    """Prepend the <PRI> part to a str or bytes message, returning bytes"""
+    if isinstance(message, bytes):
+        return b"<%d>%s" % (level + facility * 8, message)
+    return ("<%d>%s" % (level + facility * 8, message)).encode("utf-8")
+
+
+class HeaderFormatter(object):
+    """
+    Render RFC 3164 or RFC 5424 syslog headers.
+
+    The <PRI> of every level and the hostname and app-name part are rendered
+    once. The timestamp is rendered at most once per second, plus a cheap
+    milliseconds suffix for RFC 5424, so only time.time() runs per message.
+
+    RFC 3164: <PRI>Mmm dd hh:mm:ss HOSTNAME APP-NAME[PROCID]: MSG
+    RFC 5424: <PRI>1 YYYY-MM-DDThh:mm:ss.sssZ HOSTNAME APP-NAME PROCID - - MSG
+    """
+
+    def __init__(
+        self,
+        header_format=HeaderFormat.RFC5424,
+        facility=0,
+        hostname=None,
+        app_name="cefevent",
+        procid=None,
+    ):
+        """
+        Arguments:
+        - header_format: HeaderFormat.RFC3164 or HeaderFormat.RFC5424.
+        - facility: The syslog facility of the <PRI> part.
+        - hostname: Defaults to socket.gethostname().
+        - app_name: The RFC 5424 APP-NAME, or the RFC 3164 TAG.
+        - procid: Defaults to the current process id.
+        """
+        if header_format not in (HeaderFormat.RFC3164, HeaderFormat.RFC5424):
+            raise ValueError("Invalid header format {}".format(header_format))
+        self.header_format = header_format
+        self.hostname = hostname or socket.gethostname() or "-"
+        self.app_name = app_name or "-"
+        self.procid = os.getpid() if procid is None else procid
+
+        version = b"1 " if header_format == HeaderFormat.RFC5424 else b""
+        self._pri = [b"<%d>%s" % (level + facility * 8, version) for level in range(8)]
+        if header_format == HeaderFormat.RFC5424:
+            suffix = " {} {} {} - - ".format(self.hostname, self.app_name, self.procid)
+        else:
+            suffix = " {} {}[{}]: ".format(self.hostname, self.app_name, self.procid)
+        self._suffix = suffix.encode("utf-8")
+
+        self._second = None
+        self._second_stamp = b""
+        self._millisecond = None
+        self._stamp = b""
+
+    def timestamp(self, now=None):
+        """The timestamp of the header, as bytes, for now or time.time()"""
+        if now is None:
+            now = time.time()
+        second = int(now)
+
+        if self.header_format == HeaderFormat.RFC3164:
+            if second != self._second:
+                self._second = second
+                local = time.localtime(second)
+                # The day of the month is padded with a space, not a zero
+                self._stamp = b"%s %2d %s" % (
+                    time.strftime("%b", local).encode("ascii"),
+                    local.tm_mday,
+                    time.strftime("%H:%M:%S", local).encode("ascii"),
+                )
+            return self._stamp
+
+        millisecond = int(now * 1000)
+        if millisecond != self._millisecond:
+            if second != self._second:
+                self._second = second
+                self._second_stamp = time.strftime(
+                    "%Y-%m-%dT%H:%M:%S", time.gmtime(second)
+                ).encode("ascii")
+            self._millisecond = millisecond
+            self._stamp = b"%s.%03dZ" % (self._second_stamp, millisecond % 1000)
+        return self._stamp
+
+    def format(self, message, level, now=None):
+        """Prepend the header to a str or bytes message, returning bytes"""
+        if not isinstance(message, bytes):
+            message = message.encode("utf-8")
+        return b"".join(
+            (self._pri[level], self.timestamp(now), self._suffix, message)
+        )
+
+
+def frame_message(data, framing):
+    """Frame a message for a stream transport"""
+    if framing == Framing.OCTET_COUNTING:
+        return b"%d %s" % (len(data), data)
+    elif framing == Framing.LF:
+        return data + b"\n"
+    return data
+
+
 class Syslog:
     """A syslog client that logs to a remote server.
 
@@ -49,31 +190,292 @@ class Syslog:
     """
 
     def __init__(
-        self, host="localhost", port=514, facility=Facility.DAEMON, protocol="UDP"
+        self,
+        host="localhost",
+        port=514,
+        facility=Facility.DAEMON,
+        protocol="UDP",
+        framing=Framing.NONE,
+        buffer_size=0,
+        flush_interval=None,
+        ssl_context=None,
+        server_hostname=None,
+        path="/dev/log",
+        header_format=HeaderFormat.NONE,
+        hostname=None,
+        app_name="cefevent",
+        metrics_callback=None,
+        metrics_interval=10.0,
     ):
+        """
+        Arguments:
+        - protocol: UDP, TCP, TLS for TCP wrapped with ssl (RFC 5425), or UNIX_DGRAM and
+          UNIX_STREAM for the Unix domain socket of a local agent, at path.
+        - framing: How TCP messages are delimited, Framing.LF appends a newline and
+          Framing.OCTET_COUNTING prefixes the message length. Ignored for UDP, and
+          defaults to Framing.OCTET_COUNTING for TLS and Framing.LF for UNIX_STREAM.
+        - buffer_size: Coalesce TCP messages until this many bytes are buffered,
+          0 writes every message immediately.
+        - flush_interval: Also flush buffered TCP messages when the oldest write
+          is older than this many seconds. Checked on send and by flush_if_due().
+        - ssl_context: The ssl.SSLContext of TLS connections, defaults to
+          ssl.create_default_context(), which verifies the collector certificate.
+        - server_hostname: The name to verify the certificate against, defaults to host.
+        - path: The Unix domain socket of UNIX_DGRAM and UNIX_STREAM, host and port
+          are then ignored.
+        - header_format: HeaderFormat.RFC3164 or HeaderFormat.RFC5424 to add a timestamp,
+          hostname and app-name after the <PRI>, see HeaderFormatter.
+        - hostname, app_name: The header hostname and app-name.
+        - metrics_callback: Called with metrics.snapshot() every metrics_interval
+          seconds, see TransportMetrics.
+        """
         self.host = host
         self.port = port
         self.facility = facility
         self.protocol = protocol
-        if self.protocol == "UDP":
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        elif self.protocol == "TCP":
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-        else:
+        self.path = path
+        if framing not in (Framing.NONE, Framing.LF, Framing.OCTET_COUNTING):
+            raise ValueError("Invalid framing {}".format(framing))
+        if protocol == "TLS" and framing == Framing.NONE:
+            framing = Framing.OCTET_COUNTING
+        elif protocol == "UNIX_STREAM" and framing == Framing.NONE:
+            # Local agents read stream sockets one line at a time
+            framing = Framing.LF
+        self.framing = framing
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.metrics = TransportMetrics(metrics_callback, metrics_interval)
+        self._buffer = []
+        self._buffered = 0
+        self._buffered_messages = 0
+        self._last_flush = time.monotonic()
+        if self.protocol not in PROTOCOLS:
             raise Exception(
-                "Invalid protocol {}, valid options are UDP and TCP".format(
-                    self.protocol
+                "Invalid protocol {}, valid options are {}".format(
+                    self.protocol, ", ".join(PROTOCOLS)
                 )
             )
+        if self.protocol == "TLS" and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+        self.ssl_context = ssl_context
+        self.server_hostname = server_hostname or host
+        # The last TLS session, resumed by the next connection to skip a full handshake
+        self._tls_session = None
+        # The encoded <PRI> of every level
+        self._pri = [b"<%d>" % (level + facility * 8) for level in range(8)]
+        if header_format == HeaderFormat.NONE:
+            self.header = None
+        else:
+            self.header = HeaderFormatter(header_format, facility, hostname, app_name)
+        self.socket = None
+        # The destination of an unconnected UDP socket, see _send
+        self._peer = None
+        self._connect()
 
-    def send(self, message, level=Level.NOTICE):
-        """Send a syslog message to remote host using UDP or TCP"""
-        data = "<%d>%s" % (level + self.facility * 8, message)
+    def _connect(self):
+        """Create and connect the socket"""
         if self.protocol == "UDP":
-            self.socket.sendto(data.encode("utf-8"), (self.host, self.port))
+            # Connected, so the destination is resolved once and not on every send
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        elif self.protocol == "UNIX_DGRAM":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        elif self.protocol == "UNIX_STREAM":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            if sock.family == socket.AF_INET:
+                sock.connect((self.host, self.port))
+            else:
+                sock.connect(self.path)
+            if self.protocol == "TLS":
+                sock = self.ssl_context.wrap_socket(
+                    sock,
+                    server_hostname=self.server_hostname,
+                    session=self._tls_session,
+                )
+                self._tls_session = sock.session
+        except OSError:
+            sock.close()
+            raise
+        self.socket = sock
+
+    @property
+    def session_reused(self):
+        """True if the current TLS connection resumed the previous session"""
+        return isinstance(self.socket, ssl.SSLSocket) and self.socket.session_reused
+
+    def _save_session(self):
+        """Keep the TLS session of the connection, for the next _connect"""
+        if not isinstance(self.socket, ssl.SSLSocket):
+            return
+        # TLS 1.3 session tickets arrive after the handshake, read them if they are here
+        self.socket.setblocking(False)
+        try:
+            self.socket.recv(1)
+        except (ssl.SSLWantReadError, OSError):
+            pass
+        finally:
+            self.socket.setblocking(True)
+        if self.socket.session is not None:
+            self._tls_session = self.socket.session
+
+    @property
+    def datagram(self):
+        """True if every message is sent as its own datagram, see DATAGRAM_PROTOCOLS"""
+        return self.protocol in DATAGRAM_PROTOCOLS
+
+    def format(self, message, level=Level.NOTICE):
+        """Prepend the <PRI> part, and the header if any, to a message"""
+        if self.header is not None:
+            return self.header.format(message, level)
+        if isinstance(message, bytes):
+            return self._pri[level] + message
+        return self._pri[level] + message.encode("utf-8")
+
+    def send(self, message, level=Level.NOTICE):
+        """Send a syslog message to remote host using UDP or TCP
+
+        The message may be a str, or bytes that are already encoded.
+        """
+        self._send(self.format(message, level))
+
+    def send_bytes(self, payload, level=Level.NOTICE):
+        """Send a bytes message, like CEFEvent.to_bytes(), without str formatting"""
+        if self.header is not None:
+            self._send(self.header.format(payload, level))
+        else:
+            self._send(self._pri[level] + payload)
+
+    def _send(self, data):
+        if not self.datagram:
+            self._write(data)
+            return
+        # Unix datagram sockets block instead of dropping when the agent is behind
+        start = time.perf_counter_ns()
+        try:
+            try:
+                if self._peer is None:
+                    self.socket.send(data)
+                else:
+                    self.socket.sendto(data, self._peer)
+            except ConnectionRefusedError as e:
+                if self.protocol != "UDP":
+                    raise
+                # An ICMP port unreachable for an earlier datagram, nobody is listening.
+                # A connected socket reports one instead of every other send while the
+                # collector is down, an unconnected one ignores them
+                self.metrics.error(e.errno)
+                self._disconnect_udp()
+                self.socket.sendto(data, self._peer)
+        except OSError as e:
+            # Datagrams are lost like on the wire, an oversized one or a full send
+            # buffer does not end the run
+            self.metrics.error(e.errno)
+            self.metrics.dropped += 1
+            return
+        self.metrics.record(1, len(data), start, time.perf_counter_ns())
+
+    def _disconnect_udp(self):
+        self._peer = self.socket.getpeername()
+        self.socket.close()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _write(self, data):
+        if self.framing == Framing.OCTET_COUNTING:
+            self._buffer.append(b"%d " % len(data))
+            self._buffer.append(data)
+            self._buffered += len(data) + len(self._buffer[-2])
+        elif self.framing == Framing.LF:
+            self._buffer.append(data)
+            self._buffer.append(b"\n")
+            self._buffered += len(data) + 1
         else:
-            self.socket.send(data.encode("utf-8"))
+            self._buffer.append(data)
+            self._buffered += len(data)
+        self._buffered_messages += 1
+
+        if self._buffered >= self.buffer_size or self._flush_due():
+            self.flush()
+
+    def _flush_due(self):
+        return (
+            self.flush_interval is not None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def flush_if_due(self):
+        """
+        Flush buffered messages older than flush_interval. Writes only check the
+        interval on send, so an idle sender calls this while it sleeps.
+        """
+        if self._buffer and self._flush_due():
+            self.flush()
+
+    def flush(self):
+        """Write every buffered message to the socket"""
+        buffers = self._buffer
+        size = self._buffered
+        messages = self._buffered_messages
+        self._buffer = []
+        self._buffered = 0
+        self._buffered_messages = 0
+        self._last_flush = time.monotonic()
+
+        if not buffers:
+            return
+        start = time.perf_counter_ns()
+        try:
+            self._write_buffers(buffers)
+        except OSError as e:
+            self.metrics.error(e.errno)
+            raise
+        self.metrics.record(messages, size, start, time.perf_counter_ns())
+
+    def _write_buffers(self, buffers):
+        # SSLSocket has no sendmsg
+        if (
+            len(buffers) == 1
+            or not hasattr(self.socket, "sendmsg")
+            or isinstance(self.socket, ssl.SSLSocket)
+        ):
+            self.socket.sendall(b"".join(buffers))
+            return
+
+        # Scatter-gather writes, finishing partial sends with sendall
+        for start in range(0, len(buffers), _MAX_IOV):
+            chunk = buffers[start : start + _MAX_IOV]
+            sent = self.socket.sendmsg(chunk)
+            total = sum(map(len, chunk))
+            if sent < total:
+                self.socket.sendall(b"".join(chunk)[sent:])
+
+    def outstanding_bytes(self):
+        """Unsent bytes, buffered or queued in the kernel, always 0 for datagrams"""
+        if self.datagram:
+            return 0
+        queued = 0
+        if fcntl is not None and hasattr(termios, "TIOCOUTQ"):
+            buf = fcntl.ioctl(self.socket.fileno(), termios.TIOCOUTQ, b"\0\0\0\0")
+            queued = int.from_bytes(buf, sys.byteorder)
+        return self._buffered + queued
+
+    def detach(self):
+        """
+        Close the socket without flushing, in a forked process that shares the
+        connection of its parent, which still sends the buffered messages.
+        """
+        self._buffer = []
+        self._buffered = 0
+        self._buffered_messages = 0
+        self.socket.close()
+
+    def close(self):
+        """Flush buffered messages and close the socket"""
+        if not self.datagram:
+            self.flush()
+            self._save_session()
+        self.socket.close()
 
     def warn(self, message):
         """Send a syslog warning message."""
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+
+from cefevent.aio import AsyncCEFSender, AsyncSyslog
+from cefevent.syslog import Framing, Level
+
+
+class Sink(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.received = []
+
+    def datagram_received(self, data, addr):
+        self.received.append(data)
+
+
+async def udp_sink():
+    loop = asyncio.get_running_loop()
+    transport, sink = await loop.create_datagram_endpoint(
+        Sink, local_addr=("127.0.0.1", 0)
+    )
+    return transport, sink
+
+
+def write_definition():
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;sourceAddress\nFirst;10.0.0.1\nSecond;10.0.0.2\n")
+    return fn
+
+
+def test_async_syslog_udp():
+    async def run():
+        transport, sink = await udp_sink()
+        async with AsyncSyslog(
+            "127.0.0.1", port=transport.get_extra_info("sockname")[1]
+        ) as log:
+            await log.send("hello")
+            await log.warn(b"bytes")
+        await asyncio.sleep(0.1)
+        transport.close()
+        return sink.received
+
+    assert asyncio.run(run()) == [b"<29>hello", b"<28>bytes"]
+
+
+def test_async_syslog_tcp():
+    async def run():
+        received = asyncio.Queue()
+
+        async def handle(reader, writer):
+            await received.put(await reader.read())
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        log = AsyncSyslog(
+            "127.0.0.1",
+            port=server.sockets[0].getsockname()[1],
+            protocol="TCP",
+            framing=Framing.OCTET_COUNTING,
+            high_water=16,
+        )
+        for idx in range(100):
+            await log.send("message {}".format(idx), Level.ERR)
+        await log.close()
+
+        data = await asyncio.wait_for(received.get(), 1)
+        server.close()
+        return data
+
+    data = asyncio.run(run())
+    assert data.startswith(b"13 <27>message 013 <27>message 1")
+    assert data.count(b"<27>message") == 100
+
+
+def test_async_sender():
+    fn = write_definition()
+
+    async def run():
+        transport, sink = await udp_sink()
+        sender = AsyncCEFSender(
+            [fn], "127.0.0.1", transport.get_extra_info("sockname")[1]
+        )
+
+        await sender.send_logs()
+        assert sender.sent_count == 2
+
+        task = asyncio.ensure_future(sender.auto_send_log(200))
+        await asyncio.sleep(0.5)
+        task.cancel()
+
+        await asyncio.sleep(0.1)
+        await sender.close()
+        transport.close()
+        return sender, sink.received
+
+    sender, received = asyncio.run(run())
+    os.remove(fn)
+
+    assert len(received) == sender.sent_count
+    assert received[0].endswith(b"|First|5|src=10.0.0.1")
+    # 100 events are due in 0.5s, allow for a slow test runner
+    assert 50 <= sender.sent_count - 2 <= 110
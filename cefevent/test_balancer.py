@@ -0,0 +1,126 @@
+import socket
+
+import pytest
+
+from cefevent.balancer import Balance, MultiSyslog, parse_destination
+from cefevent.event import CEFEvent, CompactCEFEvent
+
+
+def udp_servers(count):
+    servers = []
+    for _ in range(count):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(1)
+        servers.append(server)
+    return servers
+
+
+def destinations(servers):
+    return ["127.0.0.1:{}".format(s.getsockname()[1]) for s in servers]
+
+
+def test_parse_destination():
+    assert parse_destination("collector") == ("collector", 514)
+    assert parse_destination("collector:1514") == ("collector", 1514)
+    assert parse_destination("[::1]:1514") == ("::1", 1514)
+    assert parse_destination("::1", 10514) == ("::1", 10514)
+    assert parse_destination(("collector", "1514")) == ("collector", 1514)
+
+
+def test_invalid_balance():
+    with pytest.raises(ValueError):
+        MultiSyslog(["127.0.0.1"], balance="random")
+    with pytest.raises(ValueError):
+        MultiSyslog([])
+
+
+def test_round_robin():
+    servers = udp_servers(3)
+    log = MultiSyslog(destinations(servers))
+
+    for idx in range(6):
+        log.send("message {}".format(idx))
+
+    for idx, server in enumerate(servers):
+        assert server.recv(1024) == "<29>message {}".format(idx).encode()
+        assert server.recv(1024) == "<29>message {}".format(idx + 3).encode()
+
+    assert [s["messages"] for s in log.stats()] == [2, 2, 2]
+    assert [s["bytes"] for s in log.stats()] == [18, 18, 18]
+
+    log.close()
+    for server in servers:
+        server.close()
+
+
+def test_hash_is_sticky():
+    servers = udp_servers(2)
+    log = MultiSyslog(destinations(servers), balance=Balance.HASH)
+
+    for idx in range(20):
+        log.send("message", key="10.0.0.{}".format(idx % 4))
+
+    picks = {}
+    for idx in range(4):
+        picks[idx] = log._pick("10.0.0.{}".format(idx))
+    assert sum(s["messages"] for s in log.stats()) == 20
+    for idx, counters in enumerate(log.counters):
+        assert counters.messages == 5 * list(picks.values()).count(idx)
+
+    log.close()
+    for server in servers:
+        server.close()
+
+
+def test_least_bytes_udp_spreads_evenly():
+    servers = udp_servers(2)
+    log = MultiSyslog(destinations(servers), balance=Balance.LEAST_BYTES)
+
+    for idx in range(4):
+        log.send("message")
+
+    assert [s["messages"] for s in log.stats()] == [2, 2]
+
+    log.close()
+    for server in servers:
+        server.close()
+
+
+def test_least_bytes_tcp_prefers_empty_buffer():
+    servers = []
+    for _ in range(2):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        servers.append(server)
+
+    log = MultiSyslog(
+        destinations(servers),
+        balance=Balance.LEAST_BYTES,
+        protocol="TCP",
+        buffer_size=1024,
+    )
+    # Leave bytes in the buffer of the first client
+    log.clients[0].send("pending " * 20)
+
+    for _ in range(3):
+        log.send("message")
+
+    assert [s["messages"] for s in log.stats()] == [0, 3]
+
+    log.close()
+    for server in servers:
+        server.close()
+
+
+def test_get_field():
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = cls()
+        ev.set_prefix("name", "Test")
+        ev.set_field("sourceAddress", "10.0.0.1")
+        assert ev.get_field("src") == "10.0.0.1"
+        assert ev.get_field("sourceAddress") == "10.0.0.1"
+        assert ev.get_field("name") == "Test"
+        assert ev.get_field("dst") is None
+        assert ev.get_field("unknown") is None
@@ -0,0 +1,61 @@
+import pytest
+
+from cefevent.bulk import events_from_report, validate_columns
+from cefevent.event import CEFEvent, CompactCEFEvent
+
+HEADERS = ["name", "severity", "src", "sourcePort", "cnt", "cfp1", "msg", "smac"]
+ROWS = [
+    ["First", "5", "10.0.0.1", "80", "1", "1.5", "a=b", "00:11:22:33:44:55"],
+    ["Second", "11", "10.0.0.500", "70000", "2147483648", "x", "c", "invalid"],
+    ["Third", "Low", "10.0.0.3", "443", "-1", "2", "d\\e", "AA-BB-CC-DD-EE-FF"],
+]
+
+
+def check_report(report):
+    assert report.errors == {
+        "severity": [(1, "11")],
+        "sourceAddress": [(1, "10.0.0.500")],
+        "sourcePort": [(1, "70000")],
+        "baseEventCount": [(1, "2147483648")],
+        "deviceCustomFloatingPoint1": [(1, "x")],
+        "sourceMacAddress": [(1, "invalid")],
+    }
+    assert report.columns["sourcePort"] == [80, False, 443]
+    assert report.columns["deviceCustomFloatingPoint1"] == [1.5, False, 2.0]
+    assert not report.valid
+
+
+def test_validate_columns():
+    check_report(validate_columns(HEADERS, ROWS, use_numpy=False))
+
+    report = validate_columns(HEADERS + ["notAField"], [row + ["x"] for row in ROWS])
+    assert report.unknown == ["notAField"]
+
+
+def test_validate_columns_numpy():
+    pytest.importorskip("numpy")
+
+    check_report(validate_columns(HEADERS, ROWS, use_numpy=True))
+
+
+def test_string_columns_are_stripped():
+    report = validate_columns(["msg", "act"], [["a\t", "allow"], ["b", " deny"]])
+    assert report.columns == {
+        "message": ["a", "b"],
+        "deviceAction": ["allow", "deny"],
+    }
+
+
+def test_events_from_report():
+    report = validate_columns(HEADERS, ROWS)
+
+    for cls in (CEFEvent, CompactCEFEvent):
+        events = events_from_report(report, cls=cls)
+
+        for row, ev in zip(ROWS, events):
+            expected = cls()
+            expected.load(HEADERS, row)
+            assert ev.build_cef() == expected.build_cef()
+
+    with pytest.raises(ValueError):
+        events_from_report(report, strict=True)
@@ -0,0 +1,76 @@
+import threading
+
+from cefevent.cache import HeaderCache, header_cache
+from cefevent.encoder import CEFEncoder
+from cefevent.event import CEFEvent, CompactCEFEvent
+
+
+def test_header_cache():
+    cache = HeaderCache(maxsize=2)
+
+    a = (0, "Vendor", "Product", "1.0", "1", "Name", 5)
+    b = (0, "Vendor", "Product", "1.0", "2", "Name", 5)
+    c = (0, "Vendor", "Product", "1.0", "3", "Name", 5)
+
+    assert cache.get(a) == (
+        "CEF:0|Vendor|Product|1.0|1|Name|5|",
+        b"CEF:0|Vendor|Product|1.0|1|Name|5|",
+    )
+    cache.get(a)
+    cache.get(b)
+    cache.get(c)
+
+    assert cache.stats() == {"hits": 1, "misses": 3, "size": 2, "maxsize": 2}
+
+    # a was the least recently used header and has been evicted
+    cache.get(a)
+    assert cache.misses == 4
+
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2}
+
+
+def test_header_cache_is_shared():
+    header_cache.clear()
+
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = cls()
+        ev.set_prefix("name", "Cached | Event")
+        ev.build_cef()
+        CEFEncoder().encode(ev)
+
+    assert header_cache.misses == 1
+    assert header_cache.hits == 3
+
+    encoder = CEFEncoder(cache=None)
+    assert encoder.encode(ev) == ev.build_cef().encode("utf-8")
+    assert header_cache.hits == 4
+
+
+def test_header_cache_threads():
+    # More distinct headers than the cache holds, so evictions race with lookups
+    header_cache.clear()
+    errors = []
+
+    def build(offset):
+        try:
+            for idx in range(3000):
+                signature = (idx + offset) % (header_cache.maxsize * 2)
+                ev = CEFEvent()
+                ev.set_prefix("signatureId", str(signature))
+                assert ev.build_cef().startswith(
+                    "CEF:0|CEF Vendor|CEF Product|1.0|{}|".format(signature)
+                )
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build, args=(idx * 7,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert header_cache.hits + header_cache.misses == 8 * 3000
+    assert len(header_cache) == header_cache.maxsize
+    header_cache.clear()
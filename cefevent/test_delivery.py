@@ -0,0 +1,251 @@
+import os
+import socket
+import tempfile
+
+import pytest
+
+from cefevent.balancer import MultiSyslog, spill_dirname
+from cefevent.delivery import ReliableSyslog, SpillLog
+from cefevent.syslog import Framing
+from cefevent.test_syslog import recv_all
+
+
+def tcp_server(port=0):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("127.0.0.1", port))
+    server.listen(1)
+    server.settimeout(1)
+    return server
+
+
+def unused_port():
+    server = tcp_server()
+    port = server.getsockname()[1]
+    server.close()
+    return port
+
+
+def test_udp_is_rejected():
+    with pytest.raises(ValueError):
+        ReliableSyslog("127.0.0.1", protocol="UDP")
+
+
+def test_reconnect_and_replay_in_order():
+    server = tcp_server()
+    port = server.getsockname()[1]
+    # Checks for the restart on every flush
+    log = ReliableSyslog(
+        "127.0.0.1", port=port, framing=Framing.LF, backoff=0, health_interval=0
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    log.send("message 0")
+    assert conn.recv(1024) == b"<29>message 0\n"
+
+    # The collector restarts
+    conn.close()
+    server.close()
+    log.send("message 1")
+    log.send("message 2")
+    assert not log.connected
+    assert log.stats.queued == 2
+
+    server = tcp_server(port)
+    log.send("message 3")
+    assert log.connected
+    conn, _ = server.accept()
+    conn.settimeout(1)
+    log.close()
+
+    assert recv_all(conn) == b"<29>message 1\n<29>message 2\n<29>message 3\n"
+    assert log.stats.as_dict() == {
+        "queued": 2,
+        "spilled": 0,
+        "replayed": 2,
+        "dropped": 0,
+        "reconnects": 1,
+    }
+    conn.close()
+    server.close()
+
+
+def test_health_interval():
+    server = tcp_server()
+    port = server.getsockname()[1]
+    log = ReliableSyslog("127.0.0.1", port=port, framing=Framing.LF, backoff=0)
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    checks = []
+    peer_closed = log._peer_closed
+    log._peer_closed = lambda: checks.append(1) or peer_closed()
+
+    # The flush after connecting checked the connection, the next flushes wait for
+    # the interval
+    for idx in range(100):
+        log.send("message {}".format(idx))
+    assert checks == []
+
+    log._check_at = 0.0
+    log.send("message 100")
+    log.send("message 101")
+    assert checks == [1]
+
+    log.close()
+    assert recv_all(conn).count(b"\n") == 102
+    conn.close()
+    server.close()
+
+
+def test_spill_to_disk():
+    port = unused_port()
+    spill_dir = tempfile.mkdtemp()
+    log = ReliableSyslog(
+        "127.0.0.1",
+        port=port,
+        framing=Framing.LF,
+        queue_size=2,
+        spill_dir=spill_dir,
+        segment_size=40,
+        backoff=0,
+    )
+    assert not log.connected
+
+    for idx in range(5):
+        log.send("message {}".format(idx))
+
+    assert log.stats.queued == 2
+    assert log.stats.spilled == 3
+    # 17 bytes records, the segments are rotated every 3 records
+    assert len(os.listdir(spill_dir)) == 1
+
+    server = tcp_server(port)
+    log.flush()
+    assert log.connected
+    conn, _ = server.accept()
+    conn.settimeout(1)
+    log.close()
+
+    assert recv_all(conn) == b"".join(
+        b"<29>message %d\n" % idx for idx in range(5)
+    )
+    assert log.stats.replayed == 5
+    assert os.listdir(spill_dir) == []
+    conn.close()
+    server.close()
+
+
+def test_drop_without_spill_dir():
+    log = ReliableSyslog("127.0.0.1", port=unused_port(), queue_size=2, backoff=60)
+
+    for idx in range(5):
+        log.send("message {}".format(idx))
+
+    assert log.stats.queued == 2
+    assert log.stats.dropped == 3
+    log.close()
+    assert log.stats.dropped == 5
+
+
+def test_unsent_messages_are_kept_for_the_next_run():
+    spill_dir = tempfile.mkdtemp()
+    port = unused_port()
+    log = ReliableSyslog(
+        "127.0.0.1", port=port, queue_size=2, spill_dir=spill_dir, backoff=60
+    )
+    for idx in range(4):
+        log.send("message {}".format(idx))
+    log.close()
+
+    # Both the queue and the spilled messages are on disk, in order
+    spill = SpillLog(spill_dir)
+    assert [spill.pop() for _ in range(5)] == [
+        b"<29>message 0",
+        b"<29>message 1",
+        b"<29>message 2",
+        b"<29>message 3",
+        None,
+    ]
+
+
+def test_detach_leaves_messages_to_the_parent():
+    server = tcp_server()
+    log = ReliableSyslog("127.0.0.1", port=server.getsockname()[1], buffer_size=1 << 20)
+    conn, _ = server.accept()
+    conn.settimeout(1)
+    log.send("buffered")
+    log.detach()
+    assert recv_all(conn) == b""
+    conn.close()
+    server.close()
+
+    spill_dir = tempfile.mkdtemp()
+    log = ReliableSyslog(
+        "127.0.0.1", port=unused_port(), queue_size=1, spill_dir=spill_dir, backoff=60
+    )
+    for idx in range(3):
+        log.send("message {}".format(idx))
+    log.detach()
+    del log
+
+    # The queue is not prepended to the spill log, written once
+    spill = SpillLog(spill_dir)
+    assert [spill.pop() for _ in range(3)] == [
+        b"<29>message 1",
+        b"<29>message 2",
+        None,
+    ]
+
+
+def test_spill_log():
+    spill_dir = tempfile.mkdtemp()
+    spill = SpillLog(spill_dir, segment_size=10)
+    for idx in range(5):
+        spill.append(b"record %d" % idx)
+    assert len(os.listdir(spill_dir)) == 5
+
+    assert spill.pop() == b"record 0"
+    assert spill.pop() == b"record 1"
+    spill.prepend([b"first", b"second"])
+    spill.close()
+
+    spill = SpillLog(spill_dir)
+    records = []
+    while not spill.empty:
+        records.append(spill.pop())
+    assert records == [
+        b"first",
+        b"second",
+        b"record 2",
+        b"record 3",
+        b"record 4",
+        None,
+    ]
+    assert os.listdir(spill_dir) == []
+
+
+def test_destinations_spill_to_their_own_directory():
+    spill_dir = tempfile.mkdtemp()
+    ports = [unused_port(), unused_port()]
+    log = MultiSyslog(
+        ["127.0.0.1:{}".format(port) for port in ports],
+        syslog_class=ReliableSyslog,
+        protocol="TCP",
+        queue_size=0,
+        spill_dir=spill_dir,
+        backoff=60,
+    )
+    for idx in range(4):
+        log.send("message {}".format(idx))
+    log.close()
+
+    # Round-robin: even messages to the first destination, odd to the second
+    for first, port in enumerate(ports):
+        spill = SpillLog(os.path.join(spill_dir, spill_dirname("127.0.0.1", port)))
+        assert [spill.pop() for _ in range(3)] == [
+            b"<29>message %d" % first,
+            b"<29>message %d" % (first + 2),
+            None,
+        ]
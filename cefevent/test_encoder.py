@@ -0,0 +1,34 @@
+import io
+
+from cefevent.encoder import CEFEncoder
+from cefevent.event import CEFEvent, CompactCEFEvent
+
+
+def build_events(cls):
+    events = []
+    for idx in range(10):
+        ev = cls()
+        ev.set_prefix("deviceVendor", "Hyades | Inc.")
+        ev.set_prefix("severity", idx)
+        ev.set_field("sourceAddress", "10.0.0.{}".format(idx))
+        ev.set_field("message", "Answer=42 ção")
+        ev.set_field("sourcePort", 1024 + idx)
+        ev.set_field("deviceCustomFloatingPoint1", idx / 3)
+        events.append(ev)
+    events.append(cls())
+    return events
+
+
+def test_encode():
+    encoder = CEFEncoder()
+    for cls in (CEFEvent, CompactCEFEvent):
+        events = build_events(cls)
+        expected = [ev.build_cef().encode("utf-8") for ev in events]
+
+        assert encoder.encode(events[0]) == expected[0]
+        assert encoder.encode_many(events) == expected
+        assert encoder.encode_joined(events) == b"\n".join(expected) + b"\n"
+
+        fp = io.BytesIO()
+        encoder.dump(events, fp)
+        assert fp.getvalue() == b"\n".join(expected) + b"\n"
@@ -1,4 +1,6 @@
-from cefevent.event import CEFEvent
+import pickle
+
+from cefevent.event import CEFEvent, CompactCEFEvent
 
 
 def test_load():
@@ -132,3 +134,68 @@ def test_strict():
         pass
     else:
         assert False, "The strict test passed event if ev.strict=False"
+
+
+def test_compact_event():
+    headers = ["sourceAddress", "name", "message", "sourcePort"]
+    fields = ["127.0.0.1", "Test Event", "Answer=42", 1234]
+
+    ev = CEFEvent()
+    ev.load(headers, fields)
+    compact = CompactCEFEvent()
+    compact.load(headers, fields)
+
+    assert compact.build_cef() == ev.build_cef()
+    assert compact.get_fields() == ev.get_fields()
+    assert compact.set_field("sourcePort", 80) == 80
+    assert compact.extensions["sourcePort"] == 80
+    assert compact.set_field("sourcePort", "INVALID_DATA") is False
+    assert compact.set_prefix("severity", 42) is False
+
+    other = CompactCEFEvent()
+    other.set_prefix("name", "Test Event")
+    assert other._prefixes is compact._prefixes
+
+    compact.reset()
+    assert compact.build_cef() == CEFEvent().build_cef()
+
+
+def test_cached_bytes():
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = cls()
+        ev.set_field("sourceAddress", "127.0.0.1")
+
+        data = ev.to_bytes()
+        assert data == ev.build_cef().encode("utf-8")
+        assert ev.to_bytes() is data
+
+        # Setting the same values keeps the cache
+        ev.set_field("sourceAddress", "127.0.0.1")
+        ev.set_prefix("severity", 5)
+        assert ev.to_bytes() is data
+
+        ev.set_field("startTime", 1.0)
+        data = ev.to_bytes()
+        ev.set_field("startTime", 1)
+        assert ev.to_bytes() is not data
+        assert ev.to_bytes().endswith(b"start=1")
+
+        ev.set_prefix("name", "Changed")
+        assert b"|Changed|" in ev.to_bytes()
+
+        ev.reset()
+        assert ev.to_bytes() == cls().build_cef().encode("utf-8")
+
+
+def test_pickle():
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = cls(strict=True)
+        ev.set_prefix("name", "Pickled")
+        ev.set_field("sourceAddress", "127.0.0.1")
+        ev.to_bytes()
+
+        copy = pickle.loads(pickle.dumps(ev))
+
+        assert copy.strict
+        assert copy.build_cef() == ev.build_cef()
+        assert copy.to_bytes() == ev.to_bytes()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+
+import pytest
+
+from cefevent.event import CEFEvent, CompactCEFEvent
+from cefevent.loader import LoadStats, iter_definition_rows, iter_events, load_events
+
+DEFINITION = """sourceAddress;name;message;sourcePort
+127.0.0.1;Test Event;"Answer;42";1234
+127.0.0.2;Short row
+
+127.0.0.3;Other Event;Hello;80;extra
+127.0.0.4;Last Event;Bye;443
+"""
+
+
+def write_definition(content: str = DEFINITION):
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    return fn
+
+
+def test_iter_definition_rows():
+    fn = write_definition()
+    stats = LoadStats()
+
+    rows = list(iter_definition_rows(fn, stats))
+    os.remove(fn)
+
+    assert rows[0] == (
+        ["sourceAddress", "name", "message", "sourcePort"],
+        ["127.0.0.1", "Test Event", "Answer;42", "1234"],
+    )
+    assert len(rows) == 2
+    assert stats.rows == 4
+    assert stats.skipped == 2
+    assert stats.files == 1
+
+
+def test_iter_events():
+    fn = write_definition()
+    stats = LoadStats()
+
+    events = iter_events([fn, fn], stats, cls=CompactCEFEvent)
+    first = next(events)
+
+    # Rows are read lazily
+    assert stats.loaded == 1
+    assert first.build_cef().endswith("src=127.0.0.1 msg=Answer;42 spt=1234")
+
+    assert len(list(events)) == 3
+    os.remove(fn)
+
+    assert stats.files == 2
+    assert stats.loaded == 4
+    assert stats.skipped == 4
+
+
+def test_load_events_parallel():
+    rows = ["127.0.0.{};Event {};Message {};{}".format(i % 256, i, i, i) for i in range(500)]
+    rows[42] = "bad row"
+    rows[43] = "127.0.0.500;Invalid;Values;70000"
+    fn = write_definition("sourceAddress;name;message;sourcePort\n" + "\n".join(rows))
+
+    # Workers send validated columns back, the events are built by the parent
+    for cls in (CEFEvent, CompactCEFEvent):
+        sequential_stats = LoadStats()
+        sequential = load_events([fn, fn], stats=sequential_stats, cls=cls)
+
+        parallel_stats = LoadStats()
+        parallel = load_events(
+            [fn, fn], workers=2, stats=parallel_stats, cls=cls, chunk_size=1000
+        )
+
+        assert len(parallel) == 998
+        assert all(isinstance(ev, cls) for ev in parallel)
+        assert [ev.build_cef() for ev in parallel] == [
+            ev.build_cef() for ev in sequential
+        ]
+        assert repr(parallel_stats) == repr(sequential_stats)
+
+    with pytest.raises(ValueError):
+        load_events([fn], workers=2, strict=True, chunk_size=1000)
+    os.remove(fn)
+
+
+def test_load_events_bulk():
+    fn = write_definition(
+        "sourceAddress;name;sourcePort\n127.0.0.1;First;80\n127.0.0.500;Second;80\n"
+    )
+
+    stats = LoadStats()
+    events = load_events([fn], stats=stats, bulk=True)
+    os.remove(fn)
+
+    assert [ev.build_cef() for ev in events] == [
+        "CEF:0|CEF Vendor|CEF Product|1.0|0|First|5|src=127.0.0.1 spt=80",
+        "CEF:0|CEF Vendor|CEF Product|1.0|0|Second|5|spt=80",
+    ]
+    assert stats.invalid == {"sourceAddress": 1}
@@ -0,0 +1,88 @@
+import socket
+import time
+
+from cefevent.metrics import TransportMetrics, percentile
+from cefevent.syslog import Framing, Syslog
+from cefevent.test_syslog import recv_all, tcp_server
+
+
+def test_record():
+    metrics = TransportMetrics()
+    for elapsed in (500, 1500, 3000, 3500, 100000):
+        metrics.record(2, 10, 0, elapsed)
+    metrics.error(90)
+
+    assert metrics.latency[:3] == [1, 1, 2]
+    assert metrics.percentile(50) == 4
+    assert metrics.percentile(100) == 128
+
+    snapshot = metrics.snapshot()
+    assert snapshot["messages"] == 10
+    assert snapshot["bytes"] == 50
+    assert snapshot["calls"] == 5
+    assert snapshot["errors"] == {"EMSGSIZE": 1}
+    assert snapshot["latency_us"]["histogram"] == {1: 1, 2: 1, 4: 2, 128: 1}
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3, 10, 6, 7, 9, 8]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 99) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) is None
+
+
+def test_callback():
+    snapshots = []
+    metrics = TransportMetrics(callback=snapshots.append, interval=0)
+    for _ in range(2):
+        now = time.perf_counter_ns()
+        metrics.record(1, 10, now - 1000, now)
+    assert [s["messages"] for s in snapshots] == [1, 2]
+
+
+def test_udp_metrics():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+
+    log = Syslog("127.0.0.1", port=server.getsockname()[1])
+    log.send_bytes(b"hello")
+    log.send_bytes(b"world")
+    # Too large for a datagram, dropped without raising
+    log.send_bytes(b"x" * 70000)
+    log.send_bytes(b"again")
+
+    snapshot = log.metrics.snapshot()
+    assert snapshot["messages"] == 3
+    assert snapshot["bytes"] == 27
+    assert snapshot["errors"] == {"EMSGSIZE": 1}
+    assert snapshot["dropped"] == 1
+    assert sum(log.metrics.latency) == 3
+
+    log.close()
+    server.close()
+
+
+def test_tcp_metrics():
+    server = tcp_server()
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        protocol="TCP",
+        framing=Framing.LF,
+        buffer_size=1024,
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    for _ in range(3):
+        log.send("hello")
+    log.close()
+
+    # One flush of 3 framed messages
+    assert log.metrics.messages == 3
+    assert log.metrics.bytes == 30
+    assert log.metrics.calls == 1
+    assert recv_all(conn) == b"<29>hello\n" * 3
+    conn.close()
+    server.close()
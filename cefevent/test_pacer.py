@@ -0,0 +1,95 @@
+import os
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from cefevent.pacer import TokenBucket
+from cefevent.sender import CEFSender
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(100, burst=10, clock=clock)
+    assert bucket.take() == 0
+    assert bucket.delay() == pytest.approx(0.01)
+
+    clock.now = 0.055
+    assert bucket.take() == 5
+    assert bucket.take() == 0
+
+    # Drift is kept: the half token left accrues with the next ones
+    clock.now = 0.065
+    assert bucket.take() == 1
+
+    # A long pause is capped at the burst size
+    clock.now = 10
+    assert bucket.take(limit=4) == 4
+    assert bucket.take() == 6
+
+    bucket.set_rate(1000)
+    clock.now = 10.0055
+    assert bucket.take() == 5
+
+    # A rate of 0 pauses the bucket
+    bucket.set_rate(0)
+    clock.now = 20
+    assert bucket.take() == 0
+    assert bucket.delay() == float("inf")
+
+    # A paused wait() returns once another thread resumes the bucket
+    bucket = TokenBucket(1000)
+    bucket.set_rate(0)
+    timer = threading.Timer(0.05, bucket.set_rate, (1000,))
+    timer.start()
+    assert bucket.wait() >= 1
+    timer.join()
+
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        bucket.set_rate(-1)
+
+
+def test_achieved_rate():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.5)
+
+    received = []
+
+    def listen():
+        count = 0
+        try:
+            while True:
+                receiver.recv(1024)
+                count += 1
+        except socket.timeout:
+            received.append(count)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;src\nFirst;10.0.0.1\nSecond;10.0.0.2\n")
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1])
+    t = threading.Thread(target=listen)
+    t.start()
+    sender.auto_send_log(5000, duration=1)
+    t.join()
+
+    # Within 5% of the target
+    assert 4750 <= sender.sent_count <= 5250
+    assert received == [sender.sent_count]
+
+    receiver.close()
+    os.remove(fn)
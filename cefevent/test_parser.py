@@ -0,0 +1,139 @@
+import pytest
+
+from cefevent.event import CEFEvent, CompactCEFEvent
+from cefevent.parser import iter_parse_cef, parse_cef
+from cefevent.schema import schema
+
+SAMPLE_VALUES = {
+    "String": "spaces a=b\\c\nd",
+    "Integer": 1234,
+    "Long": 2**40,
+    "Floating Point": 3.1415,
+    "IPv4 Address": "192.168.67.1",
+    "IPv6 Address": "2001:db8:85a3::1",
+    "MAC Address": "00:11:22:33:44:55",
+    "TimeStamp": "Jul 21 2016 03:27:30",
+}
+
+
+def build_event(cls=CEFEvent):
+    ev = cls()
+    ev.set_prefix("deviceVendor", "Hyades | Inc.")
+    ev.set_prefix("deviceProduct", "cef\\event")
+    ev.set_prefix("name", "Event = Name")
+    ev.set_prefix("severity", 8)
+    for field in schema.fields:
+        assert ev.set_field(field.full_name, SAMPLE_VALUES[field.data_type[0]]) is not False
+    return ev
+
+
+def test_round_trip():
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = build_event(cls)
+        line = ev.build_cef()
+
+        parsed = parse_cef(line, cls=cls)
+
+        assert isinstance(parsed, cls)
+        assert parsed.build_cef() == line
+        assert parsed.get_fields() == ev.get_fields()
+        assert cls.from_string(line).build_cef() == line
+
+
+def test_parse_values():
+    ev = CEFEvent.from_string(
+        "<13>May 11 03:12:40 host CEF:0|Vendor\\|Inc|Product|1.0|100|Name a\\\\b|Low|"
+        "src=10.0.0.1 msg=hello world a\\=b\\nc spt=80 act=allow\n"
+    )
+
+    assert ev.prefixes["deviceVendor"] == "Vendor\\|Inc"
+    assert ev.prefixes["name"] == "Name a\\\\b"
+    assert ev.prefixes["severity"] == "Low"
+    assert ev.extensions == {
+        "sourceAddress": "10.0.0.1",
+        "message": "hello world a\\=b\\nc",
+        "sourcePort": 80,
+        "deviceAction": "allow",
+    }
+
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        parse_cef("not a cef line")
+    with pytest.raises(ValueError):
+        parse_cef("CEF:0|Vendor|Product|1.0")
+    with pytest.raises(ValueError):
+        parse_cef("CEF:0|V|P|1.0|1|N|5|unknownField=1", strict=True)
+
+    assert parse_cef("CEF:0|V|P|1.0|1|N|5|unknownField=1").extensions == {}
+
+
+def test_parse_invalid_severity():
+    # Unknown severities keep the default, and still raise in strict mode once the
+    # header was parsed
+    for severity in ("medium", "42", ""):
+        line = "CEF:0|V|P|1.0|1|N|{}|src=10.0.0.1".format(severity)
+        assert parse_cef(line).prefixes["severity"] == 5
+        assert parse_cef(line, cls=CompactCEFEvent).get_field("severity") == 5
+        with pytest.raises(ValueError):
+            parse_cef(line, strict=True)
+
+
+def test_iter_parse():
+    lines = [build_event().build_cef() + "\n", "\n", CEFEvent().build_cef() + "\n"]
+
+    assert [ev.build_cef() + "\n" for ev in iter_parse_cef(lines)] == [
+        lines[0],
+        lines[2],
+    ]
+
+
+def test_parse_without_validation():
+    line = build_event().build_cef()
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = parse_cef(line, cls=cls, validate=False)
+
+        assert isinstance(ev, cls)
+        assert ev.build_cef() == line
+        assert ev.extensions["sourcePort"] == "1234"
+        assert ev.extensions["message"] == "spaces a\\=b\\\\c\\nd"
+
+
+def test_parse_plain_values():
+    # Lines without escapes are split and validated in a single pass
+    line = "CEF:0|V|P|1.0|1|N|5|spt=80 msg=hello world  act={} src=10.0.0.1"
+    for cls in (CEFEvent, CompactCEFEvent):
+        ev = parse_cef(line.format("allow"), cls=cls)
+        assert ev.extensions == {
+            "sourcePort": 80,
+            "message": "hello world",
+            "deviceAction": "allow",
+            "sourceAddress": "10.0.0.1",
+        }
+
+        # deviceAction holds at most 63 characters
+        ev = parse_cef(line.format("a" * 64), cls=cls)
+        assert "deviceAction" not in ev.extensions
+        with pytest.raises(ValueError):
+            parse_cef(line.format("a" * 64), cls=cls, strict=True)
+
+        # A bare "=" in a value falls back to the regex split
+        ev = parse_cef("CEF:0|V|P|1.0|1|N|5|msg=a=b spt=80", cls=cls)
+        assert ev.extensions == {"message": "a\\=b", "sourcePort": 80}
+
+
+def test_parse_custom_class():
+    class Event(object):
+        def __init__(self, strict=False):
+            self.fields = {}
+
+        def set_prefix(self, prefix, value):
+            self.fields[prefix] = value
+
+        def set_field(self, field, value):
+            self.fields[field] = value
+
+    ev = parse_cef("CEF:0|V|P|1.0|1|N|5|spt=80", cls=Event)
+    assert ev.fields["spt"] == "80"
+    with pytest.raises(ValueError):
+        parse_cef("CEF:0|V|P|1.0|1|N|5|spt=80", cls=Event, validate=False)
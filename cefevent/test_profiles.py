@@ -0,0 +1,145 @@
+import json
+import os
+import socket
+import tempfile
+
+import pytest
+
+from cefevent.profiles import (
+    Burst,
+    Constant,
+    ProfileSample,
+    Ramp,
+    Sequence,
+    Sine,
+    Step,
+    load_profile,
+    profile_from_spec,
+    saturation_point,
+    write_samples,
+)
+from cefevent.sender import CEFSender
+
+
+def test_profiles():
+    ramp = Ramp(100, 1100, 10)
+    assert ramp.rate(0) == 100
+    assert ramp.rate(5) == 600
+    assert ramp.rate(20) == 1100
+    assert ramp.mean_rate(0, 10) == pytest.approx(600)
+    assert ramp.peak_rate() == 1100
+
+    step = Step([(2, 100), (1, 500)])
+    assert [step.rate(t) for t in (0, 1.9, 2, 2.5, 4)] == [100, 100, 500, 500, 500]
+    assert step.duration == 3
+    repeated = Step([(2, 100), (1, 500)], repeat=True)
+    assert repeated.rate(3.5) == 100
+    assert repeated.duration is None
+
+    sine = Sine(1000, 500, 4)
+    assert sine.rate(0) == pytest.approx(1000)
+    assert sine.rate(1) == pytest.approx(1500)
+    assert sine.rate(3) == pytest.approx(500)
+    assert sine.mean_rate(0, 4) == pytest.approx(1000)
+    # The rate never goes below 0
+    assert Sine(100, 500, 4).rate(3) == 0
+
+    burst = Burst(100, 5000, period=10, length=2)
+    assert [burst.rate(t) for t in (0, 1.9, 2, 9.9, 11)] == [5000, 5000, 100, 100, 5000]
+
+    sequence = Sequence([Ramp(0, 1000, 10), Constant(1000, 5), Constant(50)])
+    assert sequence.rate(5) == 500
+    assert sequence.rate(12) == 1000
+    assert sequence.rate(100) == 50
+    assert sequence.duration is None
+    assert sequence.peak_rate() == 1000
+
+    with pytest.raises(ValueError):
+        Sequence([Constant(10), Constant(20)])
+    with pytest.raises(ValueError):
+        Burst(100, 5000, period=1, length=2)
+
+
+def test_profile_from_spec():
+    profile = profile_from_spec(
+        [
+            {"type": "ramp", "start": 0, "end": 1000, "duration": 10},
+            {"type": "step", "steps": [[5, 200], [5, 400]]},
+            {"type": "sine", "mean": 500, "amplitude": 100, "period": 60},
+        ]
+    )
+    assert isinstance(profile, Sequence)
+    assert profile.rate(5) == 500
+    assert profile.rate(16) == 400
+    assert profile.rate(20) == pytest.approx(500)
+
+    with pytest.raises(ValueError):
+        profile_from_spec({"type": "square", "eps": 10})
+    with pytest.raises(ValueError):
+        profile_from_spec({"type": "ramp", "start": 0})
+    with pytest.raises(ValueError):
+        profile_from_spec("ramp")
+
+    fd, fn = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"type": "burst", "base": 10, "peak": 100, "period": 5, "length": 1}, f)
+    assert load_profile(fn).rate(0.5) == 100
+    os.remove(fn)
+
+
+def test_samples():
+    samples = [
+        ProfileSample(0, 1000, 1001),
+        ProfileSample(1, 2000, 1950),
+        ProfileSample(2, 3000, 2400),
+        ProfileSample(3, 4000, 2450),
+    ]
+    assert saturation_point(samples) is samples[2]
+    assert saturation_point(samples, tolerance=0.5) is None
+
+    fd, fn = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    write_samples(samples, fn)
+    with open(fn) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "time,target,achieved"
+    assert lines[3] == "2.000,3000.0,2400.0"
+    os.remove(fn)
+
+
+def test_auto_send_profile():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    receiver.bind(("127.0.0.1", 0))
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;src\nFirst;10.0.0.1\nSecond;10.0.0.2\n")
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1])
+    sender.sample_interval = 0.25
+    sender.profile_resolution = 0.01
+    # Paused in the middle, the profile sets the duration of the run
+    profile = Step([(0.5, 1000), (0.5, 0), (0.5, 4000)])
+    sender.auto_send_profile(profile)
+
+    # Samples start late by up to a wakeup, only the ones within a single step
+    # have a known target
+    samples = sender.profile_samples
+    assert 4 <= len(samples) <= 6
+    steady = [
+        sample
+        for sample in samples
+        if profile.rate(sample.time) == profile.rate(sample.time + 0.3)
+    ]
+    assert len(steady) >= 3
+    for sample in steady:
+        assert sample.target == pytest.approx(profile.rate(sample.time))
+        assert sample.achieved == pytest.approx(sample.target, rel=0.1, abs=20)
+    assert 2400 <= sender.sent_count <= 2600
+
+    with pytest.raises(ValueError):
+        sender.auto_send_profile(Constant(0))
+
+    receiver.close()
+    os.remove(fn)
@@ -0,0 +1,174 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from cefevent.event import CEFEvent
+from cefevent.replay import ReplayStats, order_by_timestamp, parse_timestamp
+from cefevent.sender import CEFSender
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1690000000123") == pytest.approx(1690000000.123)
+    assert parse_timestamp(1690000000123) == pytest.approx(1690000000.123)
+    assert parse_timestamp("Jul 22 2023 04:26:40") == 1690000000
+    assert parse_timestamp("jul 22 2023 04:26:40.250 UTC") == pytest.approx(
+        1690000000.25
+    )
+    assert parse_timestamp("2023-07-22T06:26:40+02:00") == 1690000000
+    assert parse_timestamp("2023-07-22 04:26:40") == 1690000000
+    # Without a year, only the offsets are right
+    assert parse_timestamp("Jul 22 04:26:41") - parse_timestamp(
+        "Jul 22 04:26:40"
+    ) == pytest.approx(1)
+
+    invalid = (None, "", "yesterday", "Foo 22 2023 04:26:40", "Feb 30 2023 04:26:40")
+    for value in invalid:
+        assert parse_timestamp(value) is None
+
+
+def make_event(name, rt=None):
+    ev = CEFEvent()
+    ev.set_field("name", name)
+    if rt is not None:
+        ev.set_field("rt", rt)
+    return ev
+
+
+def test_order_by_timestamp():
+    events = [
+        make_event("c", "3000"),
+        make_event("a", "1000"),
+        make_event("none"),
+        make_event("b", "2000"),
+        make_event("b2", "2000"),
+        make_event("e", "5000"),
+        make_event("d", "4000"),
+        # Too late for a window of 2 events
+        make_event("late", "1500"),
+        make_event("f", "6000"),
+    ]
+
+    stats = ReplayStats()
+    ordered = [
+        (ts, ev.get_field("name"))
+        for ts, ev in order_by_timestamp(events, "rt", 2, stats)
+    ]
+    assert ordered == [
+        (1, "a"),
+        (2, "b"),
+        (2, "b2"),
+        (3, "c"),
+        # Sent straight after the last event sent
+        (3, "late"),
+        (4, "d"),
+        (5, "e"),
+        (6, "f"),
+    ]
+    assert stats.skipped == 1
+    assert stats.out_of_order == 1
+
+    stats = ReplayStats()
+    ordered = [
+        ev.get_field("name") for _, ev in order_by_timestamp(events, "rt", None, stats)
+    ]
+    assert ordered == ["a", "late", "b", "b2", "c", "d", "e", "f"]
+    assert stats.out_of_order == 0
+
+
+def test_replay_stats():
+    stats = ReplayStats()
+    for lag in (0.002, 0.004, -0.0005, 0):
+        stats.record(lag)
+    summary = stats.as_dict()
+    assert summary["sent"] == 4
+    assert summary["late"] == 2
+    assert summary["early"] == 1
+    assert summary["mean_late_ms"] == pytest.approx(3)
+    assert summary["max_late_ms"] == pytest.approx(4)
+    assert summary["max_early_ms"] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_replay_log(stream):
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write(
+            "name;rt\n"
+            "Third;Jul 22 2023 04:26:42\n"
+            "First;Jul 22 2023 04:26:40\n"
+            "Second;Jul 22 2023 04:26:41\n"
+            "Invalid;sometime\n"
+            "Fourth;Jul 22 2023 04:26:45\n"
+        )
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1], stream=stream)
+    start = time.monotonic()
+    stats = sender.replay_log("rt", speed=10)
+    elapsed = time.monotonic() - start
+
+    received = []
+    for _ in range(4):
+        data = receiver.recv(1024)
+        received.append(data.split(b"|")[5].decode())
+    assert received == ["First", "Second", "Third", "Fourth"]
+
+    # The last event is 5s after the first one, 0.5s at 10x
+    assert 0.5 <= elapsed < 0.7
+    assert stats.sent == 4
+    assert stats.skipped == 1
+    assert stats.max_late < 0.05
+
+    with pytest.raises(ValueError):
+        sender.replay_log("rt", speed=0)
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_replay_log_flushes_before_gaps():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    server.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;rt\nFirst;Jul 22 2023 04:26:40\nSecond;Jul 22 2023 04:26:45\n")
+
+    sender = CEFSender(
+        [fn],
+        "127.0.0.1",
+        server.getsockname()[1],
+        protocol="TCP",
+        syslog_options={"buffer_size": 1 << 20, "flush_interval": 60},
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    received = []
+
+    def receive():
+        received.append((time.monotonic(), conn.recv(65536)))
+
+    # The first event is written before the 0.5s gap, not with the second one
+    thread = threading.Thread(target=receive)
+    thread.start()
+    start = time.monotonic()
+    sender.replay_log("rt", speed=10)
+    thread.join()
+    arrival, data = received[0]
+    assert b"|First|" in data and b"|Second|" not in data
+    assert arrival - start < 0.3
+
+    sender.syslog.close()
+    conn.close()
+    server.close()
+    os.remove(fn)
@@ -0,0 +1,57 @@
+import pytest
+
+from cefevent.event import CEFEvent
+from cefevent.extensions import extension_dictionary
+from cefevent.schema import CEFSchema, schema
+
+
+def test_schema_lookup():
+    assert schema.get("src") is schema.get("sourceAddress")
+    assert schema.get("sourceAddress").name == "src"
+    assert schema.get("not a field") is None
+    assert len(schema) == len(extension_dictionary)
+
+
+def test_schema_is_shared():
+    a = CEFEvent()
+    b = CEFEvent()
+
+    assert a._schema is b._schema is schema
+    assert a._reverse_extension_dictionary is b._reverse_extension_dictionary
+    assert "name" not in extension_dictionary["src"]
+
+
+def test_schema_metadata_is_read_only():
+    with pytest.raises(TypeError):
+        schema.get("src").metadata["length"] = 1
+
+    metadata = CEFEvent().get_field_metadata("src")
+    metadata["length"] = 1
+    assert schema.get("src").metadata["length"] == 0
+
+
+def test_schema_rejects_invalid_definitions():
+    with pytest.raises(ValueError):
+        CEFSchema(
+            {"x": {"full_name": "x", "data_type": ["Bogus"], "length": 0}}
+        )
+    with pytest.raises(ValueError):
+        CEFSchema(
+            {"x": {"full_name": "x", "data_type": ["String"], "length": "big"}}
+        )
+
+
+def test_compiled_validators():
+    assert schema.get("spt").validator("65535") == 65535
+    assert schema.get("spt").validator(65536) is False
+    assert schema.get("bytesIn").validator("4096") == 4096
+    assert schema.get("bytesIn").validator(2**31) == 2**31
+    assert schema.get("fileSize").validator("4096") == 4096
+    assert schema.get("fileSize").validator(2**31) is False
+    assert schema.get("cn1").validator(2**40) == 2**40
+    assert schema.get("cfp1").validator("1.5") == 1.5
+    assert schema.get("cfp1").validator("x") is False
+    assert schema.get("src").validator(1234) is False
+    assert schema.get("smac").validator(" 00-11-22-33-44-55 ") == "00-11-22-33-44-55"
+    assert schema.get("msg").validator("a=b\\c\n") == "a\\=b\\\\c"
+    assert schema.get("act").validator("x" * 64) is False
@@ -0,0 +1,98 @@
+import collections
+import os
+import random
+import tempfile
+
+import pytest
+
+from cefevent.loader import load_weights
+from cefevent.selection import AliasTable, Selection, make_selector
+from cefevent.sender import CEFSender
+
+
+def test_alias_table():
+    weights = [1, 10, 100, 0, 39]
+    table = AliasTable(weights, random.Random(1))
+    samples = 200000
+    counts = collections.Counter(table.sample() for _ in range(samples))
+
+    assert counts[3] == 0
+    for idx, weight in enumerate(weights):
+        if weight:
+            expected = samples * weight / sum(weights)
+            assert abs(counts[idx] - expected) < expected * 0.1
+
+    for invalid in ([], [0, 0], [1, -1]):
+        with pytest.raises(ValueError):
+            AliasTable(invalid, random.Random())
+
+
+def test_selectors():
+    events = ["a", "b", "c", "d", "e"]
+
+    select = make_selector(Selection.ROUND_ROBIN, events, start=3)
+    assert [select() for _ in range(7)] == ["d", "e", "a", "b", "c", "d", "e"]
+
+    select = make_selector(Selection.SHUFFLE, events, seed=7)
+    first, second = [select() for _ in range(5)], [select() for _ in range(5)]
+    # Every event once per epoch, in a new order
+    assert sorted(first) == sorted(second) == events
+    assert first != second
+
+    for selection in (Selection.RANDOM, Selection.SHUFFLE, Selection.WEIGHTED):
+        sequences = []
+        for _ in range(2):
+            select = make_selector(selection, events, seed=42, weights=[1, 2, 3, 4, 5])
+            sequences.append([select() for _ in range(50)])
+        assert sequences[0] == sequences[1]
+
+    with pytest.raises(ValueError):
+        make_selector(Selection.WEIGHTED, events)
+    with pytest.raises(ValueError):
+        make_selector(Selection.WEIGHTED, events, weights=[1, 2])
+    with pytest.raises(ValueError):
+        make_selector("zipf", events)
+    with pytest.raises(ValueError):
+        make_selector(Selection.RANDOM, [])
+
+
+def test_weighted_sender():
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write(
+            "name;weight;src\n"
+            "Common;100;10.0.0.1\n"
+            "Skipped row;1\n"
+            "Never;0;10.0.0.2\n"
+            "Rare;1;10.0.0.3\n"
+        )
+
+    assert load_weights([fn]) == [100, 0, 1]
+
+    sender = CEFSender([fn], "127.0.0.1", 514, selection=Selection.WEIGHTED, seed=3)
+    select = sender.make_selector()
+    names = collections.Counter(select().get_field("name") for _ in range(10100))
+    assert names["Never"] == 0
+    assert 50 <= names["Rare"] <= 150
+
+    # The same seed sends the same events, every worker its own sequence
+    sender = CEFSender([fn], "127.0.0.1", 514, seed=3, send_workers=2)
+    first, again = sender.make_selector(), sender.make_selector()
+    sequence = [first() for _ in range(20)]
+    assert [again() for _ in range(20)] == sequence
+    worker = sender.make_selector(1)
+    assert [worker() for _ in range(20)] != sequence
+
+    with pytest.raises(ValueError):
+        CEFSender([fn], "127.0.0.1", 514, selection="zipf")
+    with pytest.raises(ValueError):
+        CEFSender([fn], "127.0.0.1", 514, selection=Selection.SHUFFLE, stream=True)
+
+    with open(fn, "a") as f:
+        f.write("Invalid;often;10.0.0.4\n")
+    with pytest.raises(ValueError):
+        load_weights([fn])
+    with pytest.raises(ValueError):
+        load_weights([fn], column="priority")
+
+    os.remove(fn)
@@ -5,10 +5,12 @@ import select
 import socket
 import tempfile
 import threading
-from time import sleep
+from time import monotonic, sleep
 
+from cefevent.event import CompactCEFEvent
 from cefevent.generator import generate_random_events
 from cefevent.sender import CEFSender
+from cefevent.syslog import Framing
 
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 sock.bind(("127.0.0.1", 0))
@@ -64,3 +66,316 @@ def test_sender():
         assert recvd_pkt == len(sender.cef_poll)
 
     map(os.remove, fnames)
+
+
+def test_sender_stream():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write('name;message\nFirst;"a;b"\nBad\nSecond;c\n')
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1], stream=True)
+    assert sender.cef_poll == []
+
+    sender.send_logs()
+    assert sender.sent_count == 2
+    assert sender.load_stats.skipped == 1
+    assert receiver.recv(1024).endswith(b"|First|5|msg=a;b")
+    assert receiver.recv(1024).endswith(b"|Second|5|msg=c")
+
+    # Auto send starts over when the files are exhausted
+    for _ in range(3):
+        sender.send_next_log()
+    assert receiver.recv(1024).endswith(b"|First|5|msg=a;b")
+    assert receiver.recv(1024).endswith(b"|Second|5|msg=c")
+    assert receiver.recv(1024).endswith(b"|First|5|msg=a;b")
+
+    # The rows of streamed auto sends are counted once, on the first pass
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1], stream=True)
+    sender.auto_send_log(1000, count=5)
+    assert sender.summary()["load"] == {"rows": 3, "loaded": 2, "skipped": 1}
+    for _ in range(5):
+        receiver.recv(1024)
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_sender_send_logs_batches():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name\n" + "".join("Event {}\n".format(idx) for idx in range(5)))
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1])
+    sender.send_batch_size = 2
+    encode_many = sender.encoder.encode_many
+    batches = []
+
+    def record(events):
+        batch = encode_many(events)
+        batches.append(len(batch))
+        return batch
+
+    sender.encoder.encode_many = record
+    sender.send_logs()
+    assert sender.sent_count == 5
+    assert batches == [2, 2, 1, 0]
+
+    # stop() is noticed between two events, only the current batch was encoded
+    send_bytes = sender.syslog.send_bytes
+    sent = []
+
+    def send_and_stop(data):
+        send_bytes(data)
+        sent.append(data)
+        if len(sent) == 3:
+            sender.stop()
+
+    sender.syslog.send_bytes = send_and_stop
+    batches = []
+    sender.send_logs()
+    assert sender.sent_count == 8
+    assert batches == [2, 2]
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_sender_compact():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;src\nFirst;10.0.0.1\nSecond;10.0.0.2\n")
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1], compact=True)
+    assert [ev.__class__ for ev in sender.cef_poll] == [CompactCEFEvent] * 2
+    sender.send_logs()
+    assert receiver.recv(1024).endswith(b"|First|5|src=10.0.0.1")
+    assert receiver.recv(1024).endswith(b"|Second|5|src=10.0.0.2")
+
+    # Streamed events too
+    sender = CEFSender(
+        [fn], "127.0.0.1", receiver.getsockname()[1], stream=True, compact=True
+    )
+    sent = []
+    send_log = sender.send_log
+
+    def record(ev):
+        sent.append(ev.__class__)
+        send_log(ev)
+
+    sender.send_log = record
+    sender.send_logs()
+    sender.send_next_log()
+    assert sent == [CompactCEFEvent] * 3
+    assert receiver.recv(1024).endswith(b"|First|5|src=10.0.0.1")
+    assert receiver.recv(1024).endswith(b"|Second|5|src=10.0.0.2")
+    assert receiver.recv(1024).endswith(b"|First|5|src=10.0.0.1")
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_sender_bulk_load(capsys):
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;src;spt\nFirst;10.0.0.1;80\nSecond;10.0.0.500;443\n")
+
+    sender = CEFSender([fn], "127.0.0.1", 514, bulk_load=True)
+    assert [ev.build_cef() for ev in sender.cef_poll] == [
+        "CEF:0|CEF Vendor|CEF Product|1.0|0|First|5|src=10.0.0.1 spt=80",
+        "CEF:0|CEF Vendor|CEF Product|1.0|0|Second|5|spt=443",
+    ]
+    assert sender.load_stats.invalid == {"sourceAddress": 1}
+
+    sender.get_skipped_rows()
+    assert "1 invalid sourceAddress values left out" in capsys.readouterr().out
+
+    os.remove(fn)
+
+
+def test_sender_flushes_buffered_runs():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    server.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;message\nFirst;a\nSecond;b\n")
+
+    sender = CEFSender(
+        [fn],
+        "127.0.0.1",
+        server.getsockname()[1],
+        protocol="TCP",
+        syslog_options={"framing": Framing.LF, "buffer_size": 1 << 20},
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    # Every event counted is written when the run returns, not on close
+    sender.auto_send_log(1000, count=50)
+    assert sender.summary()["transport"][0]["messages"] == 50
+    received = b""
+    while received.count(b"\n") < 50:
+        received += conn.recv(65536)
+    assert received.count(b"\n") == 50
+
+    sender.syslog.close()
+
+    conn.close()
+    server.close()
+    os.remove(fn)
+
+
+def test_sender_abort_drops_buffered_events():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    server.settimeout(1)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;message\nFirst;a\nSecond;b\n")
+
+    sender = CEFSender(
+        [fn],
+        "127.0.0.1",
+        server.getsockname()[1],
+        protocol="TCP",
+        syslog_options={"framing": Framing.LF, "buffer_size": 1 << 20},
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    for _ in range(10):
+        sender.send_random_log()
+    sender.abort()
+    sender.close()
+
+    # The connection is closed without writing the buffered events
+    assert sender.stopped
+    assert conn.recv(65536) == b""
+
+    conn.close()
+    server.close()
+    os.remove(fn)
+
+
+def test_sender_workers():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.5)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;message\nFirst;a\nSecond;b\n")
+
+    sender = CEFSender(
+        [fn], "127.0.0.1", receiver.getsockname()[1], send_workers=2
+    )
+    sender.auto_send_workers(200, report_interval=0.25, duration=1)
+
+    # 2 workers at 100 EPS for about a second
+    assert 150 <= sender.sent_count <= 250
+
+    received = 0
+    try:
+        while True:
+            receiver.recv(1024)
+            received += 1
+    except socket.timeout:
+        pass
+    assert received == sender.sent_count
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_sender_limits():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    receiver.bind(("127.0.0.1", 0))
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;message\nFirst;a\nSecond;b\nThird;c\n")
+
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1])
+    sender.send_logs(count=2)
+    assert sender.sent_count == 2
+
+    sender.sample_interval = 0.1
+    sender.auto_send_log(1000, count=250)
+    assert sender.sent_count == 252
+
+    # The summary covers the last run only
+    summary = sender.summary()
+    assert summary["sent"] == 250
+    assert 0.2 <= summary["wall_seconds"] < 1
+    assert summary["eps"]["mean"] < 1300
+    assert summary["eps"]["intervals"] == 2
+    assert 900 <= summary["eps"]["p50"] <= 1100
+    assert summary["stopped"] is False
+    assert summary["load"] == {"rows": 3, "loaded": 3, "skipped": 0}
+    assert summary["transport"][0]["messages"] == 252
+
+    # stop() ends the run at the next wakeup, like SIGTERM in run.py
+    timer = threading.Timer(0.3, sender.stop)
+    timer_start = monotonic()
+    timer.start()
+    sender.auto_send_log(1000)
+    assert monotonic() - timer_start >= 0.3
+    timer.join()
+    summary = sender.summary()
+    assert summary["stopped"] is True
+    assert summary["wall_seconds"] < 1
+
+    # The next run starts again
+    sender.send_logs()
+    summary = sender.summary()
+    assert summary["sent"] == 3
+    assert summary["stopped"] is False
+
+    sender = CEFSender(
+        [fn], "127.0.0.1", receiver.getsockname()[1], send_workers=2
+    )
+    sender.auto_send_workers(10000, count=1001)
+    sender.auto_send_workers(10000, count=99)
+    assert sender.sent_count == 1100
+    assert sender.summary()["sent"] == 99
+    assert "transport" not in sender.summary()
+
+    receiver.close()
+    os.remove(fn)
+
+
+def test_sender_hash_field_single_host():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(0.5)
+
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.write("name;src\nFirst;10.0.0.1\nSecond;10.0.0.2\n")
+
+    # A single destination has nothing to balance, the hash field is ignored
+    sender = CEFSender([fn], "127.0.0.1", receiver.getsockname()[1], hash_field="src")
+    sender.send_logs()
+    sender.send_random_log()
+    assert sender.sent_count == 3
+    for _ in range(3):
+        receiver.recv(1024)
+
+    receiver.close()
+    os.remove(fn)
@@ -0,0 +1,399 @@
+import os
+import re
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+import pytest
+
+from cefevent.syslog import (
+    Facility,
+    Framing,
+    HeaderFormat,
+    HeaderFormatter,
+    Level,
+    Syslog,
+)
+
+
+def tcp_server():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    server.settimeout(1)
+    return server
+
+
+def recv_all(conn):
+    chunks = []
+    while True:
+        data = conn.recv(65536)
+        if not data:
+            return b"".join(chunks)
+        chunks.append(data)
+
+
+def test_tcp_octet_counting():
+    server = tcp_server()
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        protocol="TCP",
+        framing=Framing.OCTET_COUNTING,
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    log.send("hello", Level.NOTICE)
+    log.send(b"\xc3\xa7a va", Level.WARNING)
+    log.close()
+
+    assert recv_all(conn) == b"9 <29>hello10 <28>\xc3\xa7a va"
+    conn.close()
+    server.close()
+
+
+def test_tcp_buffering():
+    server = tcp_server()
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        protocol="TCP",
+        framing=Framing.LF,
+        buffer_size=64,
+    )
+    conn, _ = server.accept()
+    conn.settimeout(0.2)
+
+    for idx in range(5):
+        log.send("message {}".format(idx))
+
+    # Messages are 14 bytes long, so the first 5 are written together
+    assert log._buffered == 0
+    log.send("message 5")
+    assert log._buffered == 14
+
+    log.close()
+    assert recv_all(conn) == b"".join(
+        b"<29>message %d\n" % idx for idx in range(6)
+    )
+    conn.close()
+    server.close()
+
+
+def test_tcp_flush_interval():
+    server = tcp_server()
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        protocol="TCP",
+        framing=Framing.LF,
+        buffer_size=1 << 20,
+        flush_interval=0,
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+
+    log.send("hello")
+    assert conn.recv(1024) == b"<29>hello\n"
+
+    log.close()
+    conn.close()
+    server.close()
+
+
+def test_tcp_flush_if_due():
+    server = tcp_server()
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        protocol="TCP",
+        framing=Framing.LF,
+        buffer_size=1 << 20,
+        flush_interval=0.05,
+    )
+    conn, _ = server.accept()
+    conn.settimeout(0.2)
+
+    log.flush()
+    log.send("hello")
+    log.flush_if_due()
+    with pytest.raises(socket.timeout):
+        conn.recv(1024)
+
+    # No other message comes, the idle buffer is written anyway
+    time.sleep(0.05)
+    log.flush_if_due()
+    assert conn.recv(1024) == b"<29>hello\n"
+
+    log.close()
+    conn.close()
+    server.close()
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    openssl = shutil.which("openssl")
+    if openssl is None:
+        pytest.skip("openssl is required to create a self-signed certificate")
+
+    path = tmp_path_factory.mktemp("tls")
+    cert, key = str(path / "cert.pem"), str(path / "key.pem")
+    subprocess.run(
+        [
+            openssl,
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def tls_server(certificate, connections, maximum_version=None):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    if maximum_version is not None:
+        context.maximum_version = maximum_version
+
+    server = tcp_server()
+    received = []
+
+    def serve():
+        for _ in range(connections):
+            conn, _ = server.accept()
+            try:
+                tls = context.wrap_socket(conn, server_side=True)
+            except ssl.SSLError:
+                conn.close()
+                continue
+            received.append(recv_all(tls))
+            tls.close()
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return server.getsockname()[1], thread, received
+
+
+def test_tls_octet_counting(certificate):
+    port, thread, received = tls_server(certificate, 1)
+    log = Syslog(
+        "127.0.0.1",
+        port=port,
+        protocol="TLS",
+        ssl_context=ssl.create_default_context(cafile=certificate[0]),
+    )
+    assert log.framing == Framing.OCTET_COUNTING
+
+    log.send("hello", Level.NOTICE)
+    log.send("world", Level.WARNING)
+    log.close()
+    thread.join(2)
+
+    assert received == [b"9 <29>hello9 <28>world"]
+
+
+def test_tls_untrusted_certificate(certificate):
+    port, thread, _ = tls_server(certificate, 1)
+    with pytest.raises(ssl.SSLCertVerificationError):
+        Syslog("127.0.0.1", port=port, protocol="TLS")
+    thread.join(2)
+
+
+def test_tls_session_reuse(certificate):
+    port, thread, received = tls_server(
+        certificate, 2, maximum_version=ssl.TLSVersion.TLSv1_2
+    )
+    log = Syslog(
+        "localhost",
+        port=port,
+        protocol="TLS",
+        ssl_context=ssl.create_default_context(cafile=certificate[0]),
+    )
+    assert not log.session_reused
+    log.send("first")
+    log.close()
+
+    log._connect()
+    assert log.session_reused
+    log.send("second")
+    log.close()
+    thread.join(2)
+
+    assert received == [b"9 <29>first", b"10 <29>second"]
+
+
+def test_unix_dgram():
+    path = os.path.join(tempfile.mkdtemp(), "log")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    server.bind(path)
+    server.settimeout(1)
+
+    log = Syslog(protocol="UNIX_DGRAM", path=path, framing=Framing.LF)
+    log.send("hello", Level.NOTICE)
+    log.send(b"world", Level.WARNING)
+    log.close()
+
+    # One message per datagram, without framing
+    assert server.recv(1024) == b"<29>hello"
+    assert server.recv(1024) == b"<28>world"
+    server.close()
+
+
+def test_unix_stream():
+    path = os.path.join(tempfile.mkdtemp(), "log")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    server.settimeout(1)
+
+    log = Syslog(
+        protocol="UNIX_STREAM", path=path, framing=Framing.LF, buffer_size=1024
+    )
+    conn, _ = server.accept()
+    conn.settimeout(1)
+    log.send("hello")
+    log.send("world")
+    assert log.outstanding_bytes() == 20
+    log.close()
+
+    assert recv_all(conn) == b"<29>hello\n<29>world\n"
+    conn.close()
+    server.close()
+
+
+def test_unix_stream_default_framing():
+    path = os.path.join(tempfile.mkdtemp(), "log")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    server.settimeout(1)
+
+    log = Syslog(protocol="UNIX_STREAM", path=path)
+    conn, _ = server.accept()
+    conn.settimeout(1)
+    log.send("hello")
+    log.send("world")
+    log.close()
+
+    # Two records, not one run-together message
+    assert recv_all(conn).splitlines() == [b"<29>hello", b"<29>world"]
+    conn.close()
+    server.close()
+
+
+def test_invalid_protocol():
+    with pytest.raises(Exception, match="UNIX_STREAM"):
+        Syslog(protocol="SCTP")
+
+
+def test_rfc5424_header():
+    header = HeaderFormatter(
+        HeaderFormat.RFC5424, Facility.LOCAL0, hostname="host", procid=42
+    )
+    assert (
+        header.format("hello", Level.NOTICE, now=1065910455.5)
+        == b"<133>1 2003-10-11T22:14:15.500Z host cefevent 42 - - hello"
+    )
+
+    # The timestamp is reused within the same millisecond
+    stamp = header.timestamp(1065910455.5001)
+    assert header.timestamp(1065910455.5004) is stamp
+    assert header.timestamp(1065910456.25) == b"2003-10-11T22:14:16.250Z"
+
+
+def test_rfc3164_header():
+    header = HeaderFormatter(
+        HeaderFormat.RFC3164, hostname="host", app_name="cef", procid=42
+    )
+    now = time.mktime((2003, 10, 1, 22, 14, 15, 0, 0, -1))
+    assert (
+        header.format(b"hello", Level.WARNING, now=now)
+        == b"<4>Oct  1 22:14:15 host cef[42]: hello"
+    )
+    assert header.timestamp(now + 0.9) is header.timestamp(now)
+
+
+def test_send_with_header():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(1)
+
+    log = Syslog(
+        "127.0.0.1",
+        port=server.getsockname()[1],
+        header_format=HeaderFormat.RFC5424,
+        hostname="host",
+    )
+    log.send("hello")
+    log.close()
+
+    assert re.match(
+        rb"<29>1 \d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z host cefevent \d+ - - hello$",
+        server.recv(1024),
+    )
+    server.close()
+
+
+def test_send_bytes():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(1)
+
+    log = Syslog("127.0.0.1", port=server.getsockname()[1], facility=Facility.LOCAL7)
+    log.send_bytes(b"hello", Level.WARNING)
+    log.send_bytes(b"world")
+    log.close()
+
+    assert server.recv(1024) == b"<188>hello"
+    assert server.recv(1024) == b"<189>world"
+    server.close()
+
+
+def test_udp_without_listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    server.close()
+
+    # The port unreachable errors of the connected socket are not raised
+    log = Syslog("127.0.0.1", port=port)
+    for _ in range(5):
+        log.send_bytes(b"hello")
+        time.sleep(0.01)
+
+    # The first refusal switches to an unconnected socket, refused only once
+    for _ in range(100):
+        log.send_bytes(b"hello")
+    snapshot = log.metrics.snapshot()
+    assert snapshot["errors"] == {"ECONNREFUSED": 1}
+    assert snapshot["calls"] == 105
+    assert snapshot["dropped"] == 0
+
+    # And still reaches the collector once it is back
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", port))
+    server.settimeout(1)
+    log.send_bytes(b"back")
+    assert server.recv(1024) == b"<29>back"
+    server.close()
+    log.close()